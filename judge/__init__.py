@@ -0,0 +1,6 @@
+"""
+THE JUDGE - game rules and tooling.
+
+The interactive game lives in The-Judge.py; this package holds the headless
+rules engine it is built on, so the same rules can be driven from code.
+"""
@@ -0,0 +1,244 @@
+"""
+Hints for THE JUDGE: Monte Carlo tree search under a wall-clock budget.
+
+Advisor.advise(state) searches the current decision for a fixed time (50 ms
+by default) and ranks the moves the player has - execute target N, with or
+without their detective, or lay low - by the share of simulated futures in
+which the player survives. Each iteration walks the tree from the current
+state, picking moves by UCB1 and letting the real rules (engine.step) roll
+the dice, until it reaches a state the tree hasn't seen; from there one
+rollout plays the game out with a fast policy (protection_chaser by
+default) and the result is counted on the way back up. Futures are followed
+for at most HORIZON turns, which only matters in endless games: there a win
+means surviving that long.
+
+Forking the game for an iteration costs nothing: GameStates are immutable
+and step() shares every field it doesn't change, so the root state is never
+copied, only referenced. Dice outcomes are grouped by what the next turn
+screen would show (stats, and each target's danger and whether their
+detective can be killed), which keeps move indexes meaning the same thing
+within a tree node.
+
+The deadline is checked between iterations: none starts unless the longest
+one so far would still finish in time, so a hint stays within its budget
+however busy the machine is (apart from the first visit to each move, and
+from the scheduler stalling an iteration); a loaded machine just searches
+fewer futures. Executing a target asks two questions (who, then whether to
+kill the detective) and the advisor keeps its tree between them: asked again
+about the same state with `criminal=N`, it carries on from the first search
+and only considers target N's two moves.
+
+The advisor draws from its own random stream, so asking for hints never
+changes how a seeded game plays out.
+
+Usage:
+    python -m judge.advisor --positions 200 --budget 50
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+
+from judge import engine
+from judge.engine import SKIP_INDEX, can_kill_detective, legal_actions
+from judge.policies import get_policy
+
+DEFAULT_BUDGET = 0.05  # seconds per hint
+DEFAULT_ROLLOUT = "protection_chaser"
+HORIZON = engine.MAX_TURNS  # turns a future is followed for; surviving them counts as a win
+EXPLORATION = math.sqrt(2)  # UCB1 exploration constant; results are 0 or 1
+
+
+class Node:
+    """A decision the search has reached: visits and the moves tried from it"""
+
+    __slots__ = ("visits", "edges")
+
+    def __init__(self):
+        self.visits = 0
+        self.edges = {}  # Action -> Edge
+
+
+class Edge:
+    """A move from a Node: visits, wins and the Nodes its dice have led to"""
+
+    __slots__ = ("visits", "wins", "outcomes")
+
+    def __init__(self):
+        self.visits = 0
+        self.wins = 0
+        self.outcomes = {}  # observation -> Node
+
+
+def observation(state):
+    """What the next decision depends on, as shown on the turn screen"""
+    return (state.turn, state.popularity, state.capture_risk, state.killed_detectives,
+            state.skips_remaining, state.game_over,
+            tuple((c.danger_level, can_kill_detective(state, i))
+                  for i, c in enumerate(state.current_criminals)))
+
+
+def describe(action):
+    """A move as the hint shows it"""
+    if action.index == SKIP_INDEX:
+        return "Lay low"
+    if action.kill_detective:
+        return "Judge #%d and their detective" % (action.index + 1)
+    return "Judge #%d, spare the detective" % (action.index + 1)
+
+
+# One ranked move: the action, its estimated win probability and visits
+Advice = namedtuple("Advice", ["action", "win_probability", "visits"])
+
+
+class Advisor:
+    """Ranks the player's moves by searching for `budget` seconds"""
+
+    def __init__(self, budget=DEFAULT_BUDGET, rollout=DEFAULT_ROLLOUT, table=None, rng=None,
+                 mode=None, horizon=HORIZON):
+        self.budget = budget
+        self.rollout_policy = get_policy(rollout)
+        self.table = table
+        self.mode = mode  # judge.endless.Endless, or None for the classic game
+        self.horizon = horizon
+        self.rng = rng or random.Random()
+        self.state = None  # the state self.root searches
+        self.root = None
+        self.iterations = 0  # of the last advise() call
+        self.elapsed = 0.0
+
+    def advise(self, state, criminal=None, budget=None):
+        """[Advice] for `state`, best first; `criminal` limits it to one target's moves"""
+        if state.game_over:
+            raise ValueError("the game is already over")
+        if state is not self.state:
+            self.state, self.root = state, Node()
+        moves = legal_actions(state)
+        if criminal is not None:
+            moves = [action for action in moves if action.index == criminal]
+            if not moves:
+                raise ValueError("no criminal at index %d" % criminal)
+        budget = self.budget if budget is None else budget
+        start = time.perf_counter()
+        deadline = start + budget
+        iterations = 0
+        longest = 0.0
+        now = start
+        # At least one visit per move, so every move gets an estimate; after
+        # that, no iteration starts unless the longest one so far still fits
+        while iterations < len(moves) or now + longest < deadline:
+            self._iterate(moves)
+            iterations += 1
+            last, now = now, time.perf_counter()
+            longest = max(longest, now - last)
+        self.iterations = iterations
+        self.elapsed = now - start
+        edges = self.root.edges
+        ranked = [Advice(action, edges[action].wins / edges[action].visits, edges[action].visits)
+                  for action in moves if action in edges]
+        ranked.sort(key=lambda advice: (-advice.visits, -advice.win_probability))
+        return ranked
+
+    def _select(self, node, moves):
+        """The move to follow from `node`: an untried one, else the best by UCB1"""
+        edges = node.edges
+        for action in moves:
+            if action not in edges:
+                edge = edges[action] = Edge()
+                return action, edge
+        log_visits = math.log(node.visits)
+        best, best_score = None, -1.0
+        for action in moves:
+            edge = edges[action]
+            score = edge.wins / edge.visits + EXPLORATION * math.sqrt(log_visits / edge.visits)
+            if score > best_score:
+                best, best_score = action, score
+        return best, edges[best]
+
+    def _iterate(self, root_moves):
+        rng, table, mode, step = self.rng, self.table, self.mode, engine.step
+        state, node, moves = self.state, self.root, root_moves
+        path = [node]
+        while True:
+            action, edge = self._select(node, moves)
+            fresh = edge.visits == 0
+            state, _ = step(state, action, rng, table, mode=mode)
+            path.append(edge)
+            if fresh or state.game_over:
+                break
+            key = observation(state)
+            child = edge.outcomes.get(key)
+            if child is None:
+                edge.outcomes[key] = Node()
+                path.append(edge.outcomes[key])
+                break
+            node = child
+            path.append(node)
+            moves = legal_actions(state)
+        won = self._rollout(state)
+        for visited in path:
+            visited.visits += 1
+            if type(visited) is Edge:
+                visited.wins += won
+
+    def _rollout(self, state):
+        """Play the game out with the rollout policy; 1 if the player survives"""
+        rng, table, mode, step, policy = self.rng, self.table, self.mode, engine.step, self.rollout_policy
+        end = self.state.turn + self.horizon
+        while not state.game_over:
+            if state.turn >= end:
+                return 1
+            state, _ = step(state, policy(state, rng), rng, table, mode=mode)
+        return 1 if state.won else 0
+
+
+def _positions(count, seed):
+    """Decision states from seeded games played with the rollout policy"""
+    rng = random.Random(seed)
+    policy = get_policy(DEFAULT_ROLLOUT)
+    states = []
+    while len(states) < count:
+        state = engine.new_game(rng)
+        while not state.game_over and len(states) < count:
+            states.append(state)
+            state, _ = engine.step(state, policy(state, rng), rng)
+    return states
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time THE JUDGE's hint advisor against its budget")
+    parser.add_argument("--positions", type=int, default=200, help="decision states to advise on")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET * 1000, help="milliseconds per hint")
+    parser.add_argument("--rollout", default=DEFAULT_ROLLOUT, help="rollout policy")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the positions and the search")
+    args = parser.parse_args(argv)
+    if args.budget <= 0:
+        parser.error("--budget must be positive")
+
+    advisor = Advisor(args.budget / 1000, args.rollout, rng=random.Random(args.seed))
+    latencies, iterations = [], []
+    for state in _positions(args.positions, args.seed):
+        advice = advisor.advise(state)
+        latencies.append(advisor.elapsed)
+        iterations.append(advisor.iterations)
+        if state.current_criminals and can_kill_detective(state, advice[0].action.index):
+            # The detective prompt, carrying on with the same tree
+            advisor.advise(state, criminal=advice[0].action.index)
+            latencies.append(advisor.elapsed)
+    latencies.sort()
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    print("%d hints, budget %.1f ms" % (len(latencies), args.budget))
+    print("latency   p50 %.2f ms   p99 %.2f ms   max %.2f ms"
+          % (percentile(0.5), percentile(0.99), latencies[-1] * 1000))
+    print("futures   %.0f per hint on average" % (sum(iterations) / len(iterations)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
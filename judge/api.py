@@ -0,0 +1,309 @@
+"""
+Stateless HTTP JSON API for THE JUDGE.
+
+The whole game travels with the client: every response carries a token,
+and the next request sends it back. No worker keeps anything between
+requests, so any number of workers behind a load balancer can serve any
+request without session affinity.
+
+A token is the game's judge.snapshot (stats, skips, executed names as
+bitmasks over the content databases, this turn's offer, the rules when they
+aren't the classic ones) behind an 8-byte game nonce, signed with a
+truncated HMAC-SHA256 and base64url encoded: about a hundred bytes for a
+classic game. The random number generator's state is not in it. The dice of
+each turn come from a generator seeded with HMAC(secret, nonce, turn), so a
+token is enough to carry on, and a client can't work out what the dice will
+be without the secret. A client can send an old token again - that undoes a
+move - but the dice for a turn stay the same, so undoing can't reroll them.
+Workers must share the secret (--secret, or JUDGE_API_SECRET).
+
+Endpoints (JSON in, JSON out):
+
+    POST /new                                   {"token", "state"}
+    GET  /state?token=...                       {"token", "state"}
+    POST /act    {"token", "action": {"target": 0, "kill_detective": false}}
+                 or {"token", "action": "skip"}  {"token", "state", "events"}
+
+"target" is an index into state["targets"]. Errors are {"error": ...} with
+status 400 (malformed request or illegal move), 403 (token not signed by
+this service) or 404.
+
+Usage:
+    python -m judge.api --port 8080 --workers 4 --secret s3cret
+    curl -X POST localhost:8080/new
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import socket
+import struct
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from judge import engine, rules as rulesets, snapshot
+from judge.policies import ELIMINATED, NAMED, REDACTED
+
+DEFAULT_PORT = 8080
+TAG_BYTES = 16  # truncated HMAC-SHA256 tag
+NONCE_BYTES = 8
+MAX_BODY = 4096
+
+_NONCE = struct.Struct("<Q")
+_TURN = struct.Struct("<I")
+
+
+class TokenError(ValueError):
+    """A token is malformed or wasn't signed with this secret"""
+
+
+class Tokens:
+    """Signs and checks game tokens, and seeds each turn's dice"""
+
+    def __init__(self, secret):
+        self.secret = secret if isinstance(secret, bytes) else secret.encode("utf-8")
+
+    def _tag(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[:TAG_BYTES]
+
+    def encode(self, nonce, state):
+        payload = _NONCE.pack(nonce) + snapshot.dumps(state)
+        return base64.urlsafe_b64encode(payload + self._tag(payload)).rstrip(b"=").decode("ascii")
+
+    def decode(self, token):
+        """(nonce, state) of a token"""
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (TypeError, ValueError) as error:
+            raise TokenError("token is not base64url") from error
+        payload, tag = data[:-TAG_BYTES], data[-TAG_BYTES:]
+        if len(payload) <= NONCE_BYTES or not hmac.compare_digest(tag, self._tag(payload)):
+            raise TokenError("token signature doesn't match")
+        (nonce,) = _NONCE.unpack_from(payload)
+        state, _ = snapshot.loads(payload[NONCE_BYTES:])
+        return nonce, state
+
+    def rng(self, nonce, turn):
+        """The generator for a game's turn (turn 0 draws the opening)"""
+        seed = hmac.new(self.secret, b"rng" + _NONCE.pack(nonce) + _TURN.pack(turn), hashlib.sha256)
+        return random.Random(int.from_bytes(seed.digest()[:16], "little"))
+
+
+def view(state):
+    """What a client may see of a state, as JSON-ready data"""
+    hidden = state.killed_detectives >= state.rules.detective_names_hidden_threshold
+    targets = []
+    for i, criminal in enumerate(state.current_criminals):
+        detective = criminal.detective_in_charge
+        if hidden:
+            status, detective = REDACTED, None
+        elif detective is None:
+            status = None
+        elif detective in state.executed_names:
+            status, detective = ELIMINATED, None
+        else:
+            status = NAMED
+        targets.append({"name": criminal.name, "crime": criminal.crime, "danger": criminal.danger_level,
+                        "detective": detective, "detective_status": status,
+                        "can_kill_detective": engine.can_kill_detective(state, i)})
+    out = {
+        "turn": state.turn,
+        "max_turns": state.rules.max_turns,
+        "effectiveness": state.effectiveness,
+        "popularity": state.popularity,
+        "capture_risk": state.capture_risk,
+        "skips_remaining": state.skips_remaining,
+        "can_skip": engine.can_skip(state),
+        "headline": state.headline,
+        "targets": targets,
+        "game_over": state.game_over,
+        "won": state.won,
+    }
+    if state.game_over:
+        out["ending"] = engine.ending(state)
+    return out
+
+
+def event_json(event):
+    """One engine Event as JSON-ready data"""
+    kind, payload = event
+    if kind in (engine.EXECUTE, engine.CRIMINAL_KILLED):
+        return {"kind": kind, "criminal": payload.name}
+    if kind == engine.DETECTIVE_KILLED:
+        return {"kind": kind, "detective": payload[0], "capture_risk_change": payload[1]}
+    if kind == engine.PROTECTION:
+        return {"kind": kind, "capture_risk_change": -payload}
+    if kind == engine.STATS:
+        return {"kind": kind, "criminal": payload[0].name, "capture_risk_change": payload[1]}
+    if kind == engine.SKIP:
+        return {"kind": kind, "skips_remaining": payload}
+    if kind in (engine.BREAKING_NEWS, engine.SKIP_NEWS):
+        return {"kind": kind, "text": payload}
+    return {"kind": kind}
+
+
+def parse_action(data):
+    """An engine.Action from the "action" of an /act request"""
+    if data == "skip":
+        return engine.SKIP_TURN
+    if not isinstance(data, dict):
+        raise ValueError("action must be \"skip\" or {\"target\": index, \"kill_detective\": bool}")
+    target, kill = data.get("target"), data.get("kill_detective", False)
+    if not isinstance(target, int) or isinstance(target, bool) or not isinstance(kill, bool):
+        raise ValueError("target must be a whole number and kill_detective true or false")
+    return engine.Action(target, kill)
+
+
+class Service:
+    """The API's logic, free of HTTP: tokens in, JSON-ready dicts out"""
+
+    def __init__(self, secret, rules=(rulesets.CLASSIC,)):
+        self.tokens = Tokens(secret)
+        self.rules = tuple(rules)  # a new game plays by rules[nonce % len(rules)]
+
+    def new_game(self, nonce=None):
+        if nonce is None:
+            nonce = int.from_bytes(os.urandom(NONCE_BYTES), "little")
+        state = engine.new_game(self.tokens.rng(nonce, 0), rules=self.rules[nonce % len(self.rules)])
+        return {"token": self.tokens.encode(nonce, state), "state": view(state)}
+
+    def state(self, token):
+        _, state = self.tokens.decode(token)
+        return {"token": token, "state": view(state)}
+
+    def act(self, token, action):
+        nonce, state = self.tokens.decode(token)
+        if state.game_over:
+            raise ValueError("the game is already over")
+        state, events = engine.step(state, action, self.tokens.rng(nonce, state.turn))
+        return {"token": self.tokens.encode(nonce, state), "state": view(state),
+                "events": [event_json(event) for event in events]}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive front end of a Service (server.service)"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # else a reply's header and body writes wait on delayed ACKs
+    wbufsize = -1  # and send them in one write, flushed after each request
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body):
+        data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ValueError("request body too large")
+        data = self.rfile.read(length) if length else b""
+        return json.loads(data) if data else {}
+
+    def handle_request(self, method):
+        service = self.server.service
+        url = urlsplit(self.path)
+        try:
+            if method == "POST" and url.path == "/new":
+                self.body()
+                return self.reply(201, service.new_game())
+            if method == "GET" and url.path == "/state":
+                token = parse_qs(url.query).get("token", [""])[0]
+                return self.reply(200, service.state(token))
+            if method == "POST" and url.path == "/act":
+                data = self.body()
+                if not isinstance(data, dict) or not isinstance(data.get("token"), str):
+                    raise ValueError("send {\"token\": ..., \"action\": ...}")
+                return self.reply(200, service.act(data["token"], parse_action(data.get("action"))))
+            self.reply(404, {"error": "no such endpoint: %s %s" % (method, url.path)})
+        except TokenError as error:
+            self.reply(403, {"error": str(error)})
+        except ValueError as error:  # also bad JSON, bad snapshots and illegal moves
+            self.reply(400, {"error": str(error)})
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, service, bind_and_activate=True):
+        self.service = service
+        super().__init__(address, Handler, bind_and_activate)
+
+
+def serve(host, port, service, workers=1, ready=None):
+    """Serve until interrupted, forking `workers` processes that share the socket
+
+    `ready` is called with the bound (host, port) once the socket listens.
+    """
+    server = APIServer((host, port), service)
+    if ready is not None:
+        ready(server.server_address[:2])
+    children = []
+    if workers > 1 and hasattr(os, "fork"):
+        for _ in range(workers - 1):
+            pid = os.fork()
+            if pid == 0:
+                children = []
+                break
+            children.append(pid)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stateless HTTP JSON API for THE JUDGE")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--workers", type=int, default=1, help="processes sharing the socket")
+    parser.add_argument("--secret", default=os.environ.get("JUDGE_API_SECRET"),
+                        help="token signing secret, the same for every worker (default: $JUDGE_API_SECRET, "
+                             "or a random one - tokens then only work with this server)")
+    parser.add_argument("--rules", metavar="FILE", action="append", default=[],
+                        help="ruleset file (see judge.rules); repeat to split new games between rulesets")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        rules = [rulesets.load(path) for path in args.rules] or [rulesets.CLASSIC]
+    except (OSError, ValueError) as error:
+        parser.error("can't load rules: %s" % error)
+    if any(ruleset.content is not None for ruleset in rules):
+        parser.error("games with a content pack can't travel in tokens; use judge.server for them")
+    secret = args.secret or base64.b64encode(os.urandom(24)).decode("ascii")
+    try:
+        serve(args.host, args.port, Service(secret, rules), args.workers,
+              ready=lambda address: print("Serving THE JUDGE API on http://%s:%d" % address, flush=True))
+    except socket.error as error:
+        print("can't listen on %s:%d: %s" % (args.host, args.port, error), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Load test for judge.api.
+
+Client threads each play whole games over keep-alive HTTP connections -
+POST /new, POST /act with a random legal move until the game ends, then
+GET /state - and the run reports requests per second (overall and per
+server worker), latency percentiles per endpoint and token sizes. `--local`
+starts the API in a separate process (so the clients don't share its
+interpreter) with --workers worker processes.
+
+Usage:
+    python -m judge.apiload --local --games 2000
+    python -m judge.apiload --local --workers 4 --clients 16
+    python -m judge.api --port 8080 & python -m judge.apiload --port 8080
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+
+from judge.api import DEFAULT_PORT, APIServer, Service
+from judge.loadgen import percentile
+
+ENDPOINTS = ("new", "act", "state")
+
+
+class APILoadStats:
+    def __init__(self):
+        self.latency = {name: [] for name in ENDPOINTS}
+        self.token_sizes = []
+        self.games = 0
+        self.failed = 0
+
+    def merge(self, other):
+        for name in ENDPOINTS:
+            self.latency[name] += other.latency[name]
+        self.token_sizes += other.token_sizes
+        self.games += other.games
+        self.failed += other.failed
+
+    def report(self, elapsed, workers):
+        requests = sum(len(values) for values in self.latency.values())
+        rate = requests / elapsed if elapsed else 0
+        lines = ["Games: %d played, %d failed in %.2fs" % (self.games, self.failed, elapsed),
+                 "Requests: %d (%.0f requests/s, %.0f per worker over %d worker%s)"
+                 % (requests, rate, rate / workers, workers, "" if workers == 1 else "s")]
+        if self.token_sizes:
+            lines.append("Token size: mean %.0f B, max %d B"
+                         % (sum(self.token_sizes) / len(self.token_sizes), max(self.token_sizes)))
+        lines.append("%-10s %9s %9s %9s %9s" % ("latency", "p50", "p90", "p99", "max"))
+        for name in ENDPOINTS:
+            ordered = sorted(self.latency[name])
+            lines.append("%-10s %7.2fms %7.2fms %7.2fms %7.2fms" % (
+                (name,) + tuple(1000 * percentile(ordered, q) for q in (50, 90, 99, 100))))
+        return "\n".join(lines)
+
+
+def choose(state, rng):
+    """Scripted player: a random legal move of a state view"""
+    if state["can_skip"] and rng.random() < 0.3:
+        return "skip"
+    target = rng.randrange(len(state["targets"]))
+    return {"target": target,
+            "kill_detective": state["targets"][target]["can_kill_detective"] and rng.random() < 0.5}
+
+
+def request(connection, stats, name, method, path, body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    start = time.perf_counter()
+    connection.request(method, path, data, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    reply = json.loads(response.read())
+    stats.latency[name].append(time.perf_counter() - start)
+    if response.status >= 300:
+        raise RuntimeError("%s %s: %d %s" % (method, path, response.status, reply.get("error")))
+    stats.token_sizes.append(len(reply["token"]))
+    return reply
+
+
+def play_games(host, port, games, rng, stats):
+    """Play `games` games over one connection"""
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        for _ in range(games):
+            try:
+                reply = request(connection, stats, "new", "POST", "/new", {})
+                while not reply["state"]["game_over"]:
+                    reply = request(connection, stats, "act", "POST", "/act",
+                                    {"token": reply["token"], "action": choose(reply["state"], rng)})
+                request(connection, stats, "state", "GET", "/state?token=" + reply["token"])
+                stats.games += 1
+            except (OSError, RuntimeError, http.client.HTTPException, ValueError):
+                stats.failed += 1
+                connection.close()
+    finally:
+        connection.close()
+
+
+def run_load(games, clients, host, port, seed=0):
+    """Play `games` games from `clients` threads; returns (APILoadStats, seconds)"""
+    per_client = [games // clients + (i < games % clients) for i in range(clients)]
+    results = [APILoadStats() for _ in range(clients)]
+    threads = [threading.Thread(target=play_games, args=(
+        host, port, count, random.Random("judge-apiload:%s:%d" % (seed, i)), results[i]))
+        for i, count in enumerate(per_client)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = APILoadStats()
+    for stats in results:
+        total.merge(stats)
+    return total, elapsed
+
+
+def start_local(host, workers):
+    """Bind an API socket here and serve it from `workers` processes; (processes, port)"""
+    server = APIServer((host, 0), Service("judge-apiload"))
+    processes = [multiprocessing.Process(target=server.serve_forever, daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    server.socket.close()  # the workers have their own copies
+    return processes, server.server_address[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for judge.api")
+    parser.add_argument("--games", type=int, default=1000, help="games to play")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client connections")
+    parser.add_argument("--host", default="127.0.0.1", help="API address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="API port")
+    parser.add_argument("--local", action="store_true", help="start the API in a separate process")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="API worker processes (started with --local; otherwise for the per-worker rate)")
+    parser.add_argument("--seed", default="0", help="seed for the scripted players")
+    args = parser.parse_args(argv)
+    if args.games < 1 or args.clients < 1 or args.workers < 1:
+        parser.error("--games, --clients and --workers must be at least 1")
+
+    processes = []
+    port = args.port
+    if args.local:
+        processes, port = start_local(args.host, args.workers)
+    try:
+        stats, elapsed = run_load(args.games, min(args.clients, args.games), args.host, port, args.seed)
+        print(stats.report(elapsed, args.workers))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+    return 0 if stats.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
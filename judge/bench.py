@@ -0,0 +1,386 @@
+"""
+Benchmarks for the hot paths of THE JUDGE's turn loop, with regression gates.
+
+Each benchmark times one operation over and over on fixed, seeded fixtures:
+
+    generate_criminals      drawing a turn's targets, over turns of real games
+    calculate_capture_risk  one capture risk roll
+    execute                 step() executing a target, sparing the detective
+    execute_detective       step() executing a target and their detective
+    generate_news_headline  picking a headline, over a spread of stats
+    forecast_panel          exact forecasts of every move, over turns of real games
+                            (memoized, so this is the warm cost of the panel)
+    game                    one whole headless game (engine only, cautious policy)
+    game_telemetry          the same game with every turn recorded by a
+                            TelemetryWriter (to os.devnull); against game,
+                            the cost of --telemetry
+    session                 one whole interactive session: Game narration through
+                            the typewriter renderer into a null stream
+
+Output is sent to os.devnull and time.sleep does nothing while they run.
+For each benchmark the best of REPEATS timing runs gives the operations per
+second, and tracemalloc gives the bytes allocated per call (the peak it holds
+at once, above what was already allocated).
+
+Results are compared with the baseline stored in judge/data/bench_baseline.json.
+Right before each benchmark a pure-Python reference loop is timed too, and
+the baseline's ops/s are scaled by how fast that loop ran then against when
+the baseline was recorded. Load on the machine slows both alike, so it
+mostly cancels out, and a baseline from another machine is roughly usable.
+--absolute compares raw ops/s instead, which is only meaningful on the
+machine the baseline was recorded on. A benchmark fails when it is slower,
+or allocates more, than the baseline by more than the threshold; the exit
+status is then 1. Benchmarks that fail are measured again (--retries times)
+and keep their best result, so one burst of load doesn't fail the gate.
+Record a new baseline with --update in the same change as anything that
+makes a hot path faster, slower or allocate differently.
+
+Usage:
+    python -m judge.bench
+    python -m judge.bench --only execute,game --threshold 0.1
+    python -m judge.bench --update
+    python -m judge.bench --absolute
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from unittest import mock
+
+from judge import engine
+from judge.engine import Action
+from judge.policies import cautious
+from judge.simulate import play_game
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "data", "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.25  # allowed slowdown (or extra allocation) before failing
+DEFAULT_RETRIES = 3
+DEFAULT_TIME = 1.0  # seconds of timing per benchmark
+REPEATS = 15  # best of; short runs dodge bursts of load from other processes
+ALLOCATION_CALLS = 50
+ALLOCATION_SLACK = 256  # bytes; tracemalloc jitter that never counts as a regression
+SEED = 2024
+
+Benchmark = namedtuple("Benchmark", ["name", "setup"])
+# `reference` is the reference loop's ops/s, timed right before the benchmark
+Result = namedtuple("Result", ["name", "ops", "alloc", "reference"])
+
+
+def _fixture_states(games=20):
+    """Decision states from a few seeded games, for realistic inputs"""
+    rng = random.Random(SEED)
+    states = []
+    for _ in range(games):
+        state = engine.new_game(rng)
+        while not state.game_over:
+            states.append(state)
+            state, _ = engine.step(state, cautious(state, rng), rng)
+    return states
+
+
+def _mid_game_state(kill_detective):
+    """A turn-8 state whose first target can (or has no detective to) be killed"""
+    rng = random.Random(SEED)
+    while True:
+        state = engine.new_game(rng)
+        state = state._replace(turn=8, popularity=40, capture_risk=30)
+        state = engine.begin_turn(state, rng)
+        for index in range(len(state.current_criminals)):
+            if engine.can_kill_detective(state, index) == kill_detective:
+                return state, Action(index, kill_detective)
+
+
+def _generate_criminals():
+    rng = random.Random(SEED)
+    inputs = itertools.cycle([(s.turn, s.executed_names) for s in _fixture_states()])
+    generate = engine.generate_criminals
+    return lambda: generate(*next(inputs), rng)
+
+
+def _calculate_capture_risk():
+    rng = random.Random(SEED)
+    criminal = engine.Criminal("Rico 'Blade' Santos", "Armed robbery", 5, "Detective Sarah Chen")
+    calculate = engine.calculate_capture_risk
+    return lambda: calculate(criminal, rng)
+
+
+def _execute(kill_detective):
+    def setup():
+        rng = random.Random(SEED)
+        state, action = _mid_game_state(kill_detective)
+        step = engine.step
+        return lambda: step(state, action, rng)
+    return setup
+
+
+def _generate_news_headline():
+    rng = random.Random(SEED)
+    inputs = itertools.cycle([(p, r, streak) for p in range(0, 101, 10)
+                              for r in range(0, 100, 15) for streak in (0, 3, 6)])
+    generate = engine.generate_news_headline
+    return lambda: generate(*next(inputs), rng)
+
+
+def _forecast_panel():
+    from judge.forecast import forecasts
+
+    states = _fixture_states()
+    for state in states:
+        forecasts(state)  # warm the memo
+    inputs = itertools.cycle(states)
+    return lambda: forecasts(next(inputs))
+
+
+def _game():
+    rng = random.Random(SEED)
+    return lambda: play_game(cautious, rng)
+
+
+def _game_telemetry():
+    from judge.telemetry import TelemetryWriter
+
+    rng = random.Random(SEED)
+    writer = TelemetryWriter(os.devnull)
+    return lambda: play_game(cautious, rng, writer)
+
+
+def _session():
+    from judge.game import Game
+    from judge.render import AnimatedRenderer
+
+    rng = random.Random(SEED)
+    null = open(os.devnull, "w")
+
+    def play():
+        game = Game(rng)
+
+        def answer(prompt):
+            if "Kill the detective" in prompt or "Press Enter" in prompt:
+                return ""
+            action = cautious(game.state, rng)
+            return "s" if action.index == engine.SKIP_INDEX else str(action.index + 1)
+
+        game.play(AnimatedRenderer(stream=null, answer=answer))
+    return play
+
+
+BENCHMARKS = (
+    Benchmark("generate_criminals", _generate_criminals),
+    Benchmark("calculate_capture_risk", _calculate_capture_risk),
+    Benchmark("execute", _execute(False)),
+    Benchmark("execute_detective", _execute(True)),
+    Benchmark("generate_news_headline", _generate_news_headline),
+    Benchmark("forecast_panel", _forecast_panel),
+    Benchmark("game", _game),
+    Benchmark("game_telemetry", _game_telemetry),
+    Benchmark("session", _session),
+)
+
+
+@contextlib.contextmanager
+def quiet():
+    """No output and no sleeping while benchmarks run"""
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null), \
+            mock.patch("time.sleep", lambda seconds: None):
+        yield
+
+
+def _timed(op, number):
+    start = time.perf_counter()
+    for _ in itertools.repeat(None, number):
+        op()
+    return time.perf_counter() - start
+
+
+def ops_per_second(op, seconds=DEFAULT_TIME):
+    """Best of REPEATS runs, each about seconds / REPEATS long"""
+    number = 1
+    while True:
+        elapsed = _timed(op, number)
+        if elapsed >= 0.02:
+            break
+        number *= 4
+    per_run = max(1, int(number * seconds / REPEATS / elapsed))
+    return per_run / min(_timed(op, per_run) for _ in range(REPEATS))
+
+
+def allocated_per_call(op, calls=ALLOCATION_CALLS):
+    """Mean tracemalloc peak of one call, in bytes above the memory held before it"""
+    op()  # warm up caches so they don't count
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(calls):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            op()
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / calls
+
+
+def reference_speed(seconds=DEFAULT_TIME):
+    """Ops/sec of a fixed pure-Python workload, to compare machines"""
+    rng = random.Random(SEED)
+    data = [rng.random() for _ in range(64)]
+
+    def op():
+        table = {}
+        for i, value in enumerate(sorted(data)):
+            table[i] = value * i
+        return sum(table.values())
+    return ops_per_second(op, seconds)
+
+
+def run(names=None, seconds=DEFAULT_TIME):
+    """[Result] for the named benchmarks (all by default)"""
+    results = []
+    with quiet():
+        for benchmark in BENCHMARKS:
+            if names and benchmark.name not in names:
+                continue
+            op = benchmark.setup()
+            reference = reference_speed(seconds / 4)
+            results.append(Result(benchmark.name, ops_per_second(op, seconds), allocated_per_call(op), reference))
+    return results
+
+
+def _best(result, other):
+    if other is None:
+        return result
+    # Keep the faster run relative to its own reference
+    timing = result if result.ops / result.reference >= other.ops / other.reference else other
+    return timing._replace(alloc=min(result.alloc, other.alloc))
+
+
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    data = {
+        "python": platform.python_version(),
+        "benchmarks": {r.name: {"ops": round(r.ops, 1), "alloc": round(r.alloc),
+                                "reference": round(r.reference, 1)} for r in results},
+    }
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(temporary, path)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, normalize=True):
+    """[(result, expected ops, expected alloc, failures)] against a baseline
+
+    With `normalize`, expected ops are the baseline's scaled by the
+    reference speed measured with each result over the one recorded with it.
+    Benchmarks missing from the baseline get None expectations and no failures.
+    """
+    rows = []
+    for result in results:
+        base = baseline["benchmarks"].get(result.name)
+        if base is None:
+            rows.append((result, None, None, []))
+            continue
+        expected_ops = base["ops"]
+        if normalize:
+            expected_ops *= result.reference / base.get("reference", baseline.get("reference"))
+        failures = []
+        if result.ops < expected_ops * (1 - threshold):
+            failures.append("slower")
+        if result.alloc > base["alloc"] * (1 + threshold) + ALLOCATION_SLACK:
+            failures.append("allocates more")
+        rows.append((result, expected_ops, base["alloc"], failures))
+    return rows
+
+
+def report(rows):
+    out = io.StringIO()
+    out.write("%-24s %12s %12s %8s %12s %12s  %s\n"
+              % ("benchmark", "ops/s", "expected", "change", "alloc B/call", "baseline B", "status"))
+    for result, expected_ops, expected_alloc, failures in rows:
+        if expected_ops is None:
+            out.write("%-24s %12.0f %12s %8s %12.0f %12s  new\n"
+                      % (result.name, result.ops, "-", "-", result.alloc, "-"))
+            continue
+        change = (result.ops / expected_ops - 1) * 100
+        out.write("%-24s %12.0f %12.0f %+7.1f%% %12.0f %12.0f  %s\n"
+                  % (result.name, result.ops, expected_ops, change, result.alloc, expected_alloc,
+                     "FAIL (%s)" % ", ".join(failures) if failures else "ok"))
+    return out.getvalue().rstrip("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark THE JUDGE's hot paths against a baseline")
+    parser.add_argument("--only", help="comma separated benchmarks to run (%s)"
+                        % ", ".join(b.name for b in BENCHMARKS))
+    parser.add_argument("--time", type=float, default=DEFAULT_TIME, help="seconds of timing per benchmark")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional regression before failing (default %.2f)" % DEFAULT_THRESHOLD)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="times to re-measure failing benchmarks before giving up")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file")
+    parser.add_argument("--update", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--absolute", action="store_true",
+                        help="compare raw ops/s, without scaling by the reference loop")
+    args = parser.parse_args(argv)
+
+    names = None
+    if args.only:
+        names = set(args.only.split(","))
+        unknown = names - {b.name for b in BENCHMARKS}
+        if unknown:
+            parser.error("unknown benchmark(s): %s" % ", ".join(sorted(unknown)))
+
+    results = run(names, args.time)
+
+    if args.update:
+        if names:
+            parser.error("--update records every benchmark; drop --only")
+        save_baseline(results, args.baseline)
+        for result in results:
+            print("%-24s %12.0f ops/s %10.0f B/call" % (result.name, result.ops, result.alloc))
+        print("Baseline written to %s" % args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        for result in results:
+            print("%-24s %12.0f ops/s %10.0f B/call" % (result.name, result.ops, result.alloc))
+        print("No baseline at %s; record one with --update" % args.baseline)
+        return 0
+    normalize = not args.absolute
+    rows = compare(results, baseline, args.threshold, normalize)
+    for _ in range(args.retries):
+        failed = {result.name for result, _, _, failures in rows if failures}
+        if not failed:
+            break
+        again = {result.name: result for result in run(failed, args.time)}
+        results = [_best(result, again.get(result.name)) for result in results]
+        rows = compare(results, baseline, args.threshold, normalize)
+    print(report(rows))
+    failed = [result.name for result, _, _, failures in rows if failures]
+    if failed:
+        print("\nREGRESSION in %s (threshold %.0f%%)" % (", ".join(failed), args.threshold * 100))
+        return 1
+    print("\nAll benchmarks within %.0f%% of the baseline" % (args.threshold * 100))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,517 @@
+"""
+Spectator broadcasts for THE JUDGE.
+
+One game publishes its run and any number of viewers watch it live over
+plain TCP. Every frame is a line of JSON:
+
+    {"seq": 0, "type": "turn", "state": {...}}       the turn screen: stats,
+                                                     headline, targets
+    {"seq": 1, "type": "step", "turn": 1, "action": {"target": 0,
+     "kill_detective": true} or "skip", "events": [...]}
+                                                     what the decision did:
+                                                     executions, detectives,
+                                                     breaking news
+    {"seq": 2, "type": "game_over", "state": {...}}  the final state and ending
+
+"state" and "events" are what judge.api sends its clients. Turn and game
+over frames are keyframes: each holds everything a viewer needs to show the
+game from there on.
+
+The Hub lives on one asyncio event loop. publish() serializes each frame
+once and writes the same bytes to every viewer's transport, without a task
+or a queue per viewer; a decision's step frame goes out together with the
+turn after it, in one write. A viewer whose transport has more than `high_water` bytes
+it couldn't send yet (asyncio tells its protocol to pause writing) gets no
+more frames until it has caught up and the next keyframe comes along. The
+frames in between are dropped and counted, so a slow viewer skips ahead to
+the current turn, and it never holds more than about `high_water` bytes of
+the server's memory. A viewer who joins late is first sent the latest
+keyframe and the frames published since.
+
+Broadcast runs a Hub on a thread of its own, for a game played outside
+asyncio (The-Judge.py play --broadcast PORT). `bench` watches one game with
+thousands of simulated viewers in other processes and reports how long
+frames take to reach them and the hub's memory per viewer. Some viewers
+stop reading for the first half of the run and some join halfway; it fails
+unless the slow ones had frames dropped and every skip ahead and late join
+started at a keyframe.
+
+Usage:
+    python The-Judge.py play --broadcast 4001
+    python -m judge.broadcast watch localhost:4001
+    python -m judge.broadcast bench --viewers 5000
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from judge import engine
+from judge.api import event_json, view
+
+DEFAULT_PORT = 4001
+HIGH_WATER = 16 * 1024  # bytes waiting to go out to one viewer before its frames are dropped
+MAX_SINCE = 64  # frames after the latest keyframe kept for viewers joining late
+
+TURN, STEP, GAME_OVER = "turn", "step", "game_over"
+
+
+def encode(frame):
+    """The bytes of one frame on the wire"""
+    return json.dumps(frame, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def action_json(action):
+    """An engine.Action as judge.api spells it"""
+    if action == engine.SKIP_TURN:
+        return "skip"
+    return {"target": action.index, "kill_detective": action.kill_detective}
+
+
+def state_json(state, mode=None):
+    """judge.api's view of a state, with endless mode's turn count"""
+    out = view(state)
+    if mode is not None:
+        out["max_turns"] = mode.max_turns
+    return out
+
+
+class Viewer(asyncio.Protocol):
+    """One spectator's connection. Viewers only listen; whatever they send is ignored."""
+
+    __slots__ = ("hub", "transport", "paused", "stale")
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.transport = None
+        self.paused = False  # more than high_water bytes are waiting to go out
+        self.stale = False  # frames were dropped; wait for the next keyframe
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self.hub.high_water)
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            # The kernel's send buffer would otherwise grow to megabytes per viewer
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.hub.high_water)
+        self.hub.join(self)
+
+    def connection_lost(self, exc):
+        self.hub.leave(self)
+
+    def data_received(self, data):
+        pass
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+
+
+class Hub:
+    """Publishes one game's frames to every viewer, serializing each frame once"""
+
+    def __init__(self, mode=None, high_water=HIGH_WATER):
+        self.mode = mode  # judge.endless.Endless of the game watched, if it is endless
+        self.high_water = high_water
+        self.viewers = set()
+        self.seq = 0
+        self.keyframe = None  # bytes of the latest turn or game over frame
+        self.since = deque(maxlen=MAX_SINCE)  # frames published after it
+        self.sent = 0  # frames written to a viewer
+        self.dropped = 0  # frames a viewer missed for being slow
+        self.joined = 0
+
+    def publish(self, *frames):
+        """Send (type, fields) frames to every viewer, in one write each; returns their bytes.
+
+        A keyframe may only come last.
+        """
+        data = keyframe = b""
+        for kind, fields in frames:
+            frame = encode(dict(seq=self.seq, type=kind, **fields))
+            self.seq += 1
+            if kind == STEP:
+                self.since.append(frame)
+            else:
+                self.keyframe = keyframe = frame
+                self.since.clear()
+            data += frame
+        sent = 0
+        for viewer in self.viewers:
+            if viewer.paused or (viewer.stale and not keyframe):
+                # Rather than queue them, skip ahead: the next keyframe has it all
+                viewer.stale = True
+                continue
+            if viewer.stale:
+                viewer.stale = False
+                viewer.transport.write(keyframe)
+                sent += 1
+                continue
+            viewer.transport.write(data)
+            sent += len(frames)
+        self.sent += sent
+        self.dropped += len(self.viewers) * len(frames) - sent
+        return data
+
+    def start(self, state):
+        """Publish the first turn of a game"""
+        self.publish((GAME_OVER if state.game_over else TURN, {"state": state_json(state, self.mode)}))
+
+    def step(self, before, action, events, state):
+        """Publish what one decision did together with the turn it led to (or the game over)"""
+        self.publish((STEP, {"turn": before.turn, "action": action_json(action),
+                             "events": [event_json(event) for event in events]}),
+                     (GAME_OVER if state.game_over else TURN, {"state": state_json(state, self.mode)}))
+
+    def join(self, viewer):
+        self.joined += 1
+        if self.keyframe is not None:
+            viewer.transport.write(self.keyframe + b"".join(self.since))
+        self.viewers.add(viewer)
+
+    def leave(self, viewer):
+        self.viewers.discard(viewer)
+
+    async def listen(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start accepting viewers and return the asyncio Server"""
+        loop = asyncio.get_running_loop()
+        return await loop.create_server(lambda: Viewer(self), host, port, backlog=4096)
+
+    def close(self):
+        """Hang up on every viewer once what they were sent has gone out"""
+        for viewer in list(self.viewers):
+            viewer.transport.close()
+
+
+class Broadcast:
+    """A Hub on its own thread and event loop, fed by a game played outside asyncio.
+
+    start() and step() only hand the states to the hub's thread; the game
+    never waits on a viewer. Raises OSError if the port can't be listened on.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, mode=None, high_water=HIGH_WATER):
+        self.hub = Hub(mode, high_water)
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(self.hub.listen(host, port))
+        self.thread = threading.Thread(target=self.loop.run_forever, name="broadcast", daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()[:2]
+
+    def start(self, state):
+        self.loop.call_soon_threadsafe(self.hub.start, state)
+
+    def step(self, before, action, events, state):
+        self.loop.call_soon_threadsafe(self.hub.step, before, action, events, state)
+
+    def close(self, timeout=2.0):
+        """Stop listening, let the last frames go out to viewers and stop the thread"""
+        async def shut():
+            self.server.close()
+            self.hub.close()
+            deadline = time.monotonic() + timeout
+            while self.hub.viewers and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        asyncio.run_coroutine_threadsafe(shut(), self.loop).result(timeout + 1)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def describe(frame):
+    """A frame as a few lines of text, for watch"""
+    if frame["type"] == STEP:
+        lines = []
+        for event in frame["events"]:
+            kind = event["kind"]
+            if kind == engine.CRIMINAL_KILLED:
+                lines.append("  %s dies of a heart attack" % event["criminal"])
+            elif kind == engine.DETECTIVE_KILLED:
+                lines.append("  %s dies too (capture risk %+d%%)" % (event["detective"], event["capture_risk_change"]))
+            elif kind == engine.SKIP:
+                lines.append("  The Judge lays low (%d skips left)" % event["skips_remaining"])
+            elif kind in (engine.BREAKING_NEWS, engine.SKIP_NEWS):
+                lines.append("  NEWS: %s" % event["text"])
+        return "\n".join(lines)
+    state = frame["state"]
+    if frame["type"] == GAME_OVER:
+        return "\n%s - %s after %d turns, popularity %d%%\n" % (
+            "VICTORY" if state["won"] else "ARRESTED", state["ending"], state["turn"] - 1, state["popularity"])
+    lines = ["\nTURN %d%s - popularity %d%%, capture risk %d%%, effectiveness %d" % (
+        state["turn"], "" if state["max_turns"] is None else " OF %d" % state["max_turns"],
+        state["popularity"], state["capture_risk"], state["effectiveness"]),
+        "  \"%s\"" % state["headline"]]
+    for i, target in enumerate(state["targets"], 1):
+        lines.append("  [%d] %s - %s (danger %d)" % (i, target["name"], target["crime"], target["danger"]))
+    return "\n".join(lines)
+
+
+async def watch(host, port):
+    """Print a broadcast until it ends"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for line in reader:
+            print(describe(json.loads(line)), flush=True)
+    finally:
+        writer.close()
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    """(host, port) from "PORT" or "HOST:PORT"; ValueError if it isn't one"""
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+
+# -- benchmark ---------------------------------------------------------------
+
+class _Watcher(asyncio.Protocol):
+    """A simulated viewer: notes when each frame arrives"""
+
+    def __init__(self, done, halfway=None):
+        self.done = done  # future set once the hub hangs up
+        self.halfway = halfway  # if given, a future to stop reading until
+        self.arrivals = []  # (seq, monotonic time, keyframe?) of every frame received
+        self.partial = b""
+
+    def connection_made(self, transport):
+        if self.halfway is not None:
+            transport.pause_reading()
+            self.halfway.add_done_callback(lambda _: transport.resume_reading())
+
+    def data_received(self, data):
+        now = time.monotonic()
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        for line in lines:
+            # {"seq":N,"type":"...",...}: read both without parsing the frame
+            comma = line.index(b",", 7)
+            self.arrivals.append((int(line[7:comma]), now, not line.startswith(b'"type":"step"', comma + 1)))
+
+    def connection_lost(self, exc):
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+def _bench_viewers(conn, count, slow, late):
+    """Child process: connect `count` viewers to the address sent on `conn`, then send back what they saw.
+
+    The first `slow` of them stop reading, and the last `late` of them wait
+    to join, until the hub says it is halfway through.
+    """
+    address = conn.recv()
+
+    async def viewer(halfway, stall, join_late):
+        loop = asyncio.get_running_loop()
+        if join_late:
+            await halfway
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if stall:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)  # so the hub sees it fall behind
+        sock.setblocking(False)
+        await loop.sock_connect(sock, address)
+        done = loop.create_future()
+        _, watcher = await loop.create_connection(lambda: _Watcher(done, halfway if stall else None), sock=sock)
+        await done
+        return stall, join_late, watcher.arrivals
+
+    async def run():
+        halfway = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(None, conn.recv))
+        stalled, joining_late = round(count * slow), round(count * late)
+        return await asyncio.gather(*(viewer(halfway, i < stalled, i >= count - joining_late) for i in range(count)))
+
+    conn.send(asyncio.run(run()))
+    conn.close()
+
+
+def bench(viewers=2000, turns=300, interval=0.005, processes=4, slow=0.05, late=0.05, high_water=HIGH_WATER,
+          seed=0):
+    """Publish `turns` turns of scripted games to `viewers` viewers; returns the measurements.
+
+    The viewers run in `processes` other processes, so the hub's memory and
+    CPU are its own. `slow` of them stop reading for the first half of the
+    run and `late` of them join halfway through.
+    """
+    import multiprocessing
+    import random
+
+    from judge.content import private_kb
+
+    # Fork the viewers before this process has an event loop
+    context = multiprocessing.get_context("fork")
+    counts = [viewers // processes + (i < viewers % processes) for i in range(processes)]
+    conns, children = [], []
+    for count in counts:
+        conn, child_conn = context.Pipe()
+        child = context.Process(target=_bench_viewers, args=(child_conn, count, slow, late))
+        child.start()
+        conns.append(conn)
+        children.append(child)
+    on_time = sum(count - round(count * late) for count in counts)
+
+    async def run():
+        hub = Hub(high_water=high_water)
+        baseline = private_kb()
+        server = await hub.listen("127.0.0.1", 0)
+        address = server.sockets[0].getsockname()[:2]
+        for conn in conns:
+            conn.send(address)
+        deadline = time.monotonic() + 60
+        while hub.joined < on_time and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        joined_kb = private_kb()
+
+        rng = random.Random(seed)
+        published = {}  # seq: monotonic time it was published at
+        fanout = []  # seconds each publish() took
+        sizes = []  # bytes of each turn frame
+
+        def timed(publish, *args):
+            first = hub.seq
+            start = time.monotonic()
+            publish(*args)
+            for seq in range(first, hub.seq):
+                published[seq] = start
+            fanout.append(time.monotonic() - start)
+            sizes.append(len(hub.keyframe))
+
+        state = engine.new_game(rng)
+        timed(hub.start, state)
+        for turn in range(turns):
+            if turn == turns // 2:
+                for conn in conns:
+                    conn.send("halfway")
+            await asyncio.sleep(interval)
+            if state.game_over:
+                state = engine.new_game(rng)
+                timed(hub.start, state)
+                continue
+            if engine.can_skip(state) and rng.random() < 0.3:
+                action = engine.SKIP_TURN
+            else:
+                index = rng.randrange(len(state.current_criminals))
+                action = engine.Action(index, engine.can_kill_detective(state, index) and rng.random() < 0.5)
+            after, events = engine.step(state, action, rng)
+            timed(hub.step, state, action, events, after)
+            state = after
+        end_kb = private_kb()
+        await asyncio.sleep(1)  # let the stalled viewers catch up
+        server.close()
+        hub.close()
+        while hub.viewers:
+            await asyncio.sleep(0.05)
+        return hub, published, fanout, sizes, baseline, joined_kb, end_kb
+
+    hub, published, fanout, sizes, baseline, joined_kb, end_kb = asyncio.run(run())
+    seen = [result for conn in conns for result in conn.recv()]
+    for child in children:
+        child.join()
+
+    latency, slow_frames, late_first_key = [], [], []
+    resumed = resumed_on_key = 0  # gaps in what slow viewers received; those that ended at a keyframe
+    for stalled, joined_late, arrivals in seen:
+        if joined_late:
+            late_first_key.append(bool(arrivals) and arrivals[0][2])
+        elif stalled:
+            slow_frames.append(len(arrivals))
+            for (previous, _, _), (seq, _, key) in zip(arrivals, arrivals[1:]):
+                if seq != previous + 1:
+                    resumed += 1
+                    resumed_on_key += key
+        else:
+            latency.extend(now - published[seq] for seq, now, _ in arrivals)
+    return {
+        "viewers": len(seen),
+        "frames": hub.seq,
+        "frame_bytes": sum(sizes) / len(sizes),
+        "sent": hub.sent,
+        "dropped": hub.dropped,
+        "latency": sorted(latency),
+        "fanout": sorted(fanout),
+        "slow_frames": slow_frames,
+        "resumed": resumed,
+        "resumed_on_key": resumed_on_key,
+        "late_first_key": late_first_key,
+        "kb_per_viewer": None if baseline is None else (joined_kb - baseline) / on_time,
+        "growth_kb": None if baseline is None else end_kb - joined_kb,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch or benchmark THE JUDGE's spectator broadcasts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    watching = commands.add_parser("watch", help="print a broadcast as it happens")
+    watching.add_argument("address", metavar="[HOST:]PORT", help="where the game broadcasts")
+    timing = commands.add_parser("bench", help="fan one game out to many simulated viewers")
+    timing.add_argument("--viewers", type=int, default=2000, help="simulated viewers")
+    timing.add_argument("--turns", type=int, default=300, help="turns published (new games start as they end)")
+    timing.add_argument("--interval", type=float, default=0.005, help="seconds between turns")
+    timing.add_argument("--processes", type=int, default=4, help="processes the viewers run in")
+    timing.add_argument("--slow", type=float, default=0.05,
+                        help="share of viewers that stop reading for the first half of the run")
+    timing.add_argument("--late", type=float, default=0.05, help="share of viewers that join halfway through")
+    timing.add_argument("--high-water", type=int, default=HIGH_WATER,
+                        help="bytes waiting for a viewer before its frames are dropped")
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        try:
+            host, port = parse_address(args.address)
+        except ValueError:
+            parser.error("address must be PORT or HOST:PORT")
+        try:
+            asyncio.run(watch(host, port))
+        except (OSError, KeyboardInterrupt) as error:
+            if isinstance(error, OSError):
+                print("can't watch %s: %s" % (args.address, error), file=sys.stderr)
+                return 1
+        return 0
+
+    if args.viewers < args.processes or args.processes < 1:
+        parser.error("need at least one viewer per process")
+    from judge.loadgen import percentile
+
+    result = bench(args.viewers, args.turns, args.interval, args.processes, args.slow, args.late,
+                   args.high_water)
+    latency, fanout = result["latency"], result["fanout"]
+    print("%d viewers, %d frames (%.0f bytes per turn frame), each serialized once" % (
+        result["viewers"], result["frames"], result["frame_bytes"]))
+    print("%-22s %9s %9s %9s %9s" % ("ms", "p50", "p90", "p99", "max"))
+    for name, ordered in (("fan-out per publish", fanout), ("frame to viewer", latency)):
+        print("%-22s %9.2f %9.2f %9.2f %9.2f" % ((name,) + tuple(
+            1000 * percentile(ordered, q) for q in (50, 90, 99, 100))))
+    print("frames written %d, dropped for slow viewers %d" % (result["sent"], result["dropped"]))
+    if result["slow_frames"]:
+        print("slow viewers received %.0f of %d frames on average; %d of %d skips ahead resumed at a keyframe" % (
+            sum(result["slow_frames"]) / len(result["slow_frames"]), result["frames"],
+            result["resumed_on_key"], result["resumed"]))
+    if result["late_first_key"]:
+        print("late joiners starting from a keyframe: %d of %d" % (
+            sum(result["late_first_key"]), len(result["late_first_key"])))
+    if result["kb_per_viewer"] is not None:
+        print("hub memory: %.1f kB per viewer, %+d kB more by the end of the run" % (
+            result["kb_per_viewer"], result["growth_kb"]))
+
+    failures = []
+    if result["slow_frames"] and not result["dropped"]:
+        failures.append("no slow viewer fell behind, so dropping frames wasn't tested (try more --turns)")
+    if result["resumed_on_key"] < result["resumed"]:
+        failures.append("a slow viewer skipped ahead to a frame that isn't a keyframe")
+    if not all(result["late_first_key"]):
+        failures.append("a late joiner didn't start from a keyframe")
+    for failure in failures:
+        print("FAIL: " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
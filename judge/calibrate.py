@@ -0,0 +1,222 @@
+"""
+Difficulty calibration for THE JUDGE.
+
+Searches the rules judge.difficulty tunes for the values that give a
+reference policy each preset's target win rate, and writes the presets to
+judge/data/presets/.
+
+Every candidate - the Ruleset of one combination from the grid in SEARCH,
+all of them played side by side by the same worker processes - plays the same
+numbered games (common random numbers, so candidates are compared on the
+same luck), in looks of --look games. After each look its win rate's
+confidence interval is checked against every target's band (target plus or
+minus --tolerance); once the interval clears all of them the candidate is
+dropped. Checking after every look would inflate the error rate, so the
+interval uses the z of a Bonferroni correction over the planned looks: a
+candidate that is good enough survives all its looks with 95% confidence,
+and a clearly bad one is gone after a look or two instead of costing
+--max-games games. For each target, the FINALISTS candidates preferred by
+the search's estimates - the fewest changes from the defaults among those
+within half the tolerance, or else the closest - are measured again with
+--confirm fresh games, and the preferred one by those measurements is
+written as a preset.
+
+Usage:
+    python -m judge.calibrate
+    python -m judge.calibrate --policy cautious --targets easy=0.9,normal=0.8,hard=0.5
+    python -m judge.calibrate --max-games 1000 --out /tmp/presets
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from judge import difficulty, engine
+from judge.rules import CLASSIC
+from judge.policies import POLICIES, get_policy
+from judge.simulate import wilson_interval
+
+DEFAULT_POLICY = "cautious"
+DEFAULT_TARGETS = {"easy": 0.90, "normal": 0.80, "hard": 0.50}
+DEFAULT_TOLERANCE = 0.03
+DEFAULT_LOOK = 100
+DEFAULT_MAX_GAMES = 2000
+DEFAULT_CONFIRM = 10000
+FINALISTS = 4  # candidates per target measured again before one is chosen
+ALPHA = 0.05
+
+# Values tried for each rule; the classic values are always among them
+SEARCH = {
+    "popularity_protection_threshold": (50, 60, 70),
+    "popularity_protection_bonus": (10, 15, 20),
+    "capture_risk_skip_reduction": (5, 10, 15),
+    "max_skips": (3, 5, 7),
+    "danger_capture_risk": (1, 2, 3),
+    "detective_capture_risk": (5, 10, 15),
+}
+
+
+def candidates(search=SEARCH):
+    """The Ruleset of every combination of the searched values"""
+    names = sorted(search)
+    return [CLASSIC._replace(**dict(zip(names, values)))
+            for values in itertools.product(*(search[n] for n in names))]
+
+
+def changes(candidate):
+    """How many rules a candidate moves away from the classic ones"""
+    return len(candidate.changes())
+
+
+def play(policy, seed, start, stop, rules=CLASSIC):
+    """Wins of games start..stop-1 under `rules`, each seeded by its number"""
+    wins = 0
+    step = engine.step
+    for game in range(start, stop):
+        rng = random.Random("judge-calibrate:%s:%d" % (seed, game))
+        state = engine.new_game(rng, rules=rules)
+        while not state.game_over:
+            state, _ = step(state, policy(state, rng), rng)
+        wins += state.won
+    return wins
+
+
+def evaluate(candidate, policy, seed, bands, look, max_games, z):
+    """(games, wins) of a candidate, stopping once it clears every band"""
+    policy = get_policy(policy)
+    games = wins = 0
+    while games < max_games:
+        stop = min(max_games, games + look)
+        wins += play(policy, seed, games, stop, candidate)
+        games = stop
+        low, high = wilson_interval(wins, games, z)
+        if all(high < band_low or low > band_high for band_low, band_high in bands):
+            break
+    return games, wins
+
+
+def _preference(rates, pool, target, tolerance):
+    """Sort key over candidate indexes: within half the tolerance the fewest
+    changes from the classic rules win, beyond it the closest rate"""
+    def key(i):
+        miss = abs(rates[i] - target)
+        close = miss <= tolerance / 2
+        return (not close, changes(pool[i]) if close else 0, miss)
+    return key
+
+
+def _evaluate(task):
+    return evaluate(*task)
+
+
+def _measure(task):
+    candidate, policy, seed, games = task
+    return play(get_policy(policy), seed, 0, games, candidate)
+
+
+def _map(function, tasks, workers):
+    if workers == 1:
+        return [function(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+
+
+def calibrate(targets=None, policy=DEFAULT_POLICY, seed=0, tolerance=DEFAULT_TOLERANCE,
+              look=DEFAULT_LOOK, max_games=DEFAULT_MAX_GAMES, confirm=DEFAULT_CONFIRM,
+              workers=None, search=SEARCH, log=None):
+    """({preset: (Ruleset, games, wins)}, games the search played)
+
+    A preset with no candidate inside its band gets the closest one anyway.
+    """
+    targets = targets or DEFAULT_TARGETS
+    bands = [(target - tolerance, target + tolerance) for target in targets.values()]
+    looks = math.ceil(max_games / look)
+    z = NormalDist().inv_cdf(1 - ALPHA / 2 / looks)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = candidates(search)
+    results = _map(_evaluate, [(c, policy, seed, bands, look, max_games, z) for c in pool], workers)
+    played = sum(games for games, _ in results)
+    if log:
+        log("%d candidates, %d games (%d without early stopping), %d ran to the end"
+            % (len(pool), played, len(pool) * max_games,
+               sum(games == max_games for games, _ in results)))
+    # Shortlist by the search's estimates, then decide on fresh games
+    shortlists = {name: sorted(range(len(pool)), key=_preference(
+        [wins / games for games, wins in results], pool, target, tolerance))[:FINALISTS]
+        for name, target in targets.items()}
+    finalists = sorted({i for shortlist in shortlists.values() for i in shortlist})
+    measured = dict(zip(finalists, _map(
+        _measure, [(pool[i], policy, "confirm:%s" % seed, confirm) for i in finalists], workers)))
+    chosen = {}
+    for name, target in targets.items():
+        rates = {i: measured[i] / confirm for i in shortlists[name]}
+        best = min(shortlists[name], key=_preference(rates, pool, target, tolerance))
+        chosen[name] = (pool[best], confirm, measured[best])
+    return chosen, played
+
+
+def _parse_targets(text):
+    targets = {}
+    for part in text.split(","):
+        name, _, value = part.partition("=")
+        rate = float(value)
+        if not name or not 0 < rate < 1:
+            raise ValueError("targets look like easy=0.9,normal=0.8")
+        targets[name.strip()] = rate
+    return targets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate THE JUDGE's difficulty presets")
+    parser.add_argument("--policy", default=DEFAULT_POLICY,
+                        help="reference policy (from %s)" % ", ".join(sorted(POLICIES)))
+    parser.add_argument("--targets", default=",".join("%s=%s" % t for t in DEFAULT_TARGETS.items()),
+                        help="preset=win rate, comma separated")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="how far from its target a preset's win rate may be")
+    parser.add_argument("--look", type=int, default=DEFAULT_LOOK, help="games between checks")
+    parser.add_argument("--max-games", type=int, default=DEFAULT_MAX_GAMES,
+                        help="games for a candidate that is never dropped")
+    parser.add_argument("--confirm", type=int, default=DEFAULT_CONFIRM,
+                        help="games to measure each chosen preset with")
+    parser.add_argument("--seed", default="0", help="seed for the run (any string)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--out", default=difficulty.PRESET_DIR, help="directory to write presets to")
+    args = parser.parse_args(argv)
+    try:
+        targets = _parse_targets(args.targets)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.policy not in POLICIES:
+        parser.error("unknown policy %r" % args.policy)
+    if args.look < 1 or args.max_games < args.look or args.confirm < 1:
+        parser.error("need 1 <= --look <= --max-games and --confirm >= 1")
+
+    start = time.perf_counter()
+    presets, _ = calibrate(targets, args.policy, args.seed, args.tolerance, args.look,
+                           args.max_games, args.confirm, args.workers, log=print)
+    os.makedirs(args.out, exist_ok=True)
+    for name, (ruleset, games, wins) in presets.items():
+        rate = wins / games
+        low, high = wilson_interval(wins, games)
+        path = os.path.join(args.out, name + ".json")
+        difficulty.write(path, name, ruleset, target_win_rate=targets[name], policy=args.policy,
+                         measured={"games": games, "win_rate": round(rate, 4),
+                                   "ci95": [round(low, 4), round(high, 4)]})
+        print("%-8s target %.0f%%  measured %.2f%% [%.2f, %.2f]  %s"
+              % (name, targets[name] * 100, rate * 100, low * 100, high * 100,
+                 ", ".join("%s=%d" % item for item in sorted(ruleset.changes().items()))
+                 or "classic rules"))
+    print("Presets written to %s in %.1fs" % (args.out, time.perf_counter() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
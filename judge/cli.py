@@ -0,0 +1,267 @@
+"""
+Command line of THE JUDGE (The-Judge.py).
+
+    The-Judge.py [play] [options]          play in the terminal (the default)
+    The-Judge.py play --skip-intro         straight to the first turn
+    The-Judge.py play --resume FILE        continue a saved game
+    The-Judge.py TOOL [options]            a headless tool, e.g. simulate, server
+    The-Judge.py tools                     list the tools
+
+Every subcommand imports only what it needs. Playing doesn't load NumPy,
+SQLite, the endless mode or the difficulty presets unless its options ask
+for them, and a tool is handed its arguments before anything of the game's
+terminal front end (judge.game, judge.render) is imported. A play command
+line of on/off flags alone (--skip-intro, --instant, ...) is read without
+argparse, which costs about 10 ms to import. The tools are the judge.*
+modules' own command lines, so `The-Judge.py simulate --games 1000` is
+`python -m judge.simulate --games 1000`. `python -m judge.startup` measures
+how long the game takes to reach its first prompt.
+"""
+
+import importlib
+import sys
+import types
+
+PROG = "The-Judge.py"
+
+# subcommand: (module whose main() it runs, what it does)
+TOOLS = {
+    "simulate": ("judge.simulate", "play many games with a policy and report balance statistics"),
+    "jobs": ("judge.jobs", "resumable sharded simulation jobs in a SQLite work queue"),
+    "batch": ("judge.batch", "NumPy batch simulator"),
+    "solve": ("judge.solve", "work out the best possible play exactly"),
+    "tournament": ("judge.tournament", "round-robin tournament between policies"),
+    "calibrate": ("judge.calibrate", "calibrate the difficulty presets"),
+    "replay": ("judge.replay", "replay and verify an action log"),
+    "telemetry": ("judge.telemetry", "summarise telemetry files"),
+    "leaderboard": ("judge.leaderboard", "list the best games of a leaderboard"),
+    "content": ("judge.content", "compile and inspect content packs"),
+    "server": ("judge.server", "host games for many players over telnet"),
+    "api": ("judge.api", "serve the stateless HTTP JSON API"),
+    "loadgen": ("judge.loadgen", "load test judge.server"),
+    "apiload": ("judge.apiload", "load test judge.api"),
+    "endless": ("judge.endless", "soak test endless mode"),
+    "advisor": ("judge.advisor", "time the hint advisor against its budget"),
+    "bench": ("judge.bench", "benchmark the hot paths against a baseline"),
+    "startup": ("judge.startup", "time startup and the first prompt"),
+    "screen": ("judge.screen", "compare the bytes per turn of the line and full-screen front ends"),
+    "broadcast": ("judge.broadcast", "watch a broadcast game or benchmark spectator fan-out"),
+}
+
+
+# play's options: (flag, argparse.add_argument keywords)
+PLAY_OPTIONS = (
+    ("--speed", dict(type=float, default=1.0, help="typewriter speed (2 = twice as fast)")),
+    ("--instant", dict(action="store_true", help="show all text at once")),
+    ("--screen", dict(action="store_true",
+                      help="full-screen front end with fixed panels, redrawn only where they change (curses)")),
+    ("--skip-intro", dict(action="store_true", help="start at the first turn")),
+    ("--transcript", dict(metavar="FILE", help="also record the game to FILE")),
+    ("--save", dict(metavar="FILE", help="save the game to FILE after every turn")),
+    ("--resume", dict(metavar="FILE", help="continue a game saved with --save")),
+    ("--record", dict(metavar="FILE", help="write an action log for judge.replay")),
+    ("--telemetry", dict(metavar="FILE", help="write every turn to FILE (see judge.telemetry)")),
+    ("--events", dict(metavar="FILE", help="random event table, or \"legacy\" for the original events")),
+    ("--hints", dict(metavar="MS", type=float, nargs="?", const=50.0,
+                     help="answer 'h' at a prompt with a hint, searching for MS milliseconds (default 50)")),
+    ("--difficulty", dict(metavar="PRESET", help="easy, normal, hard or a ruleset file (see judge.rules)")),
+    ("--endless", dict(metavar="TURNS", type=int, nargs="?", const=0,
+                       help="endless mode: recycled and generated targets, for TURNS turns (default: until caught)")),
+    ("--forecast", dict(action="store_true", help="show each move's exact odds of arrest and where your stats end up")),
+    ("--leaderboard", dict(metavar="FILE",
+                           help="record the finished game in a leaderboard database (see judge.leaderboard)")),
+    ("--player", dict(metavar="NAME", help="name to record the game under on the leaderboard")),
+    ("--broadcast", dict(metavar="[HOST:]PORT",
+                         help="let spectators watch the game live (python3 -m judge.broadcast watch PORT)")),
+    ("--profile", dict(metavar="SPEC",
+                       help="time the game's phases: summary, folded:FILE, cprofile:FILE (see judge.instrument)")),
+)
+
+
+def play_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=PROG + " play",
+                                     description="THE JUDGE - a Death Note inspired text-based game")
+    for flag, options in PLAY_OPTIONS:
+        parser.add_argument(flag, **options)
+    return parser
+
+
+def parse_flags(argv):
+    """play's options from a command line of on/off flags only, or None for anything else.
+
+    argparse and what it imports take about as long as everything else on
+    the way to the first prompt, so the usual command lines don't pay for it.
+    """
+    flags = {flag for flag, options in PLAY_OPTIONS if options.get("action") == "store_true"}
+    if not set(argv) <= flags:
+        return None
+    values = {}
+    for flag, options in PLAY_OPTIONS:
+        switch = options.get("action") == "store_true"
+        values[flag[2:].replace("-", "_")] = flag in argv if switch else options.get("default")
+    return types.SimpleNamespace(**values)
+
+
+def play(argv=None):
+    """The play subcommand"""
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_flags(argv) or play_parser().parse_args(argv)
+
+    def fail(message):
+        play_parser().error(message)
+
+    if args.speed <= 0:
+        fail("--speed must be positive")
+    if args.hints is not None and args.hints <= 0:
+        fail("--hints must be positive")
+    if args.endless is not None and (args.save or args.resume or args.record):
+        fail("endless games can't be saved or recorded (their targets aren't in the databases)")
+    if (args.difficulty or args.events) and args.resume:
+        fail("a resumed game keeps the rules and events it was saved with")
+    if args.screen and args.transcript:
+        fail("--transcript records the line-by-line game; it can't be combined with --screen")
+    if args.screen and not (sys.stdin.isatty() and sys.stdout.isatty()):
+        fail("--screen needs a terminal")
+
+    import random
+
+    from judge import instrument
+    from judge.game import Game
+    from judge.render import make_renderer
+    from judge.rules import CLASSIC
+
+    rules = CLASSIC
+    if args.difficulty:
+        from judge import difficulty
+
+        try:
+            rules = difficulty.load(args.difficulty)
+        except (OSError, ValueError) as error:
+            fail("can't load difficulty %s: %s" % (args.difficulty, error))
+        if rules.content is not None and (args.save or args.record):
+            fail("games with a content pack can't be saved or recorded")
+    if args.events:
+        import os
+
+        from judge import events
+        from judge.rules import intern
+
+        try:
+            events.load(args.events)
+        except (OSError, ValueError) as error:
+            fail("can't load events from %s: %s" % (args.events, error))
+        # In the rules, the table goes into saves and action logs with the rest of them
+        source = args.events if args.events == "legacy" else os.path.abspath(args.events)
+        rules = intern(rules._replace(events=source))
+    mode = None
+    if args.endless is not None:
+        from judge.endless import Endless
+
+        mode = Endless(max_turns=args.endless or None)
+    try:
+        instrument.configure(args.profile)
+    except ValueError as error:
+        fail(str(error))
+
+    if args.resume:
+        from judge import snapshot
+
+        try:
+            state, rng = snapshot.load(args.resume)
+        except (OSError, ValueError) as error:
+            fail("can't resume from %s: %s" % (args.resume, error))
+        game = Game(rng or random.Random(), state)
+    else:
+        game = Game(mode=mode, rules=rules)
+    game.save_path = args.save or args.resume
+    game.show_forecast = args.forecast
+    if args.hints:
+        from judge.advisor import Advisor
+
+        game.advisor = Advisor(args.hints / 1000, table=game.event_table, mode=mode)
+    if args.record:
+        from judge import snapshot
+
+        game.log = snapshot.ActionLog(args.record, game.state, game.rng)
+
+    if args.telemetry:
+        from judge.telemetry import TelemetryWriter
+
+        game.telemetry = TelemetryWriter(args.telemetry)
+    if args.leaderboard:
+        import sqlite3
+
+        from judge.leaderboard import LeaderboardWriter
+
+        try:
+            game.leaderboard = LeaderboardWriter(args.leaderboard)
+        except sqlite3.Error as error:
+            fail("can't open leaderboard %s: %s" % (args.leaderboard, error))
+        game.player = args.player
+    if args.broadcast:
+        from judge.broadcast import Broadcast, parse_address
+
+        try:
+            game.broadcast = Broadcast(*parse_address(args.broadcast), mode=mode)
+        except ValueError:
+            fail("--broadcast must be PORT or HOST:PORT")
+        except OSError as error:
+            fail("can't broadcast on %s: %s" % (args.broadcast, error))
+        game.broadcast.start(game.state)
+    if args.screen:
+        from judge.screen import ScreenRenderer
+
+        renderer = ScreenRenderer(game, args.speed, args.instant)
+    else:
+        renderer = make_renderer(args.speed, args.instant, args.transcript)
+    try:
+        game.play(renderer, intro=not (args.resume or args.skip_intro))
+    finally:
+        if game.telemetry is not None:
+            game.telemetry.close()
+        if game.leaderboard is not None:
+            game.leaderboard.close()
+        if game.broadcast is not None:
+            game.broadcast.close()
+    return 0
+
+
+def tools():
+    """The tools subcommand: list the tools"""
+    print("Tools (%s TOOL --help for their options):" % PROG)
+    for name, (module, summary) in TOOLS.items():
+        print("  %-12s %s" % (name, summary))
+    return 0
+
+
+def run_tool(name, argv):
+    """Run a tool's command line with `argv`"""
+    module = importlib.import_module(TOOLS[name][0])
+    sys.argv[0] = "%s %s" % (PROG, name)  # for the tool's usage messages
+    return module.main(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = argv[0] if argv else "play"
+    if command in ("-h", "--help"):
+        print("usage: %s [play] [options] | %s TOOL [options] | %s tools\n" % (PROG, PROG, PROG))
+        print("Play THE JUDGE in the terminal (%s play --help for the options),\n"
+              "or run one of its tools (%s tools to list them)." % (PROG, PROG))
+        return 0
+    if command == "tools":
+        return tools()
+    if command in TOOLS:
+        return run_tool(command, argv[1:])
+    if command == "play":
+        argv = argv[1:]
+    elif not command.startswith("-"):
+        print("%s: unknown command %r (try %s tools)" % (PROG, command, PROG), file=sys.stderr)
+        return 2
+    return play(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,616 @@
+"""
+Content packs for THE JUDGE: the criminals, detectives and headlines games
+draw from.
+
+The game's own content is built into judge.engine (CLASSIC_CONTENT there).
+A content pack replaces it for the games whose rules name it (the "content"
+field of a judge.rules.Ruleset). Packs are written as JSON, with CSV files
+for the long lists if you like, and compiled once into a binary file:
+
+    header         magic, version, checksum, section sizes
+    string table   (strings + 1) offsets into the UTF-8 blob at the end
+    criminals      fixed-width records: name, crime (string ids), danger, tiers
+    detectives     fixed-width records: name, title (string ids)
+    tier pools     criminal ids of each of the three difficulty tiers
+    name indexes   criminal ids, then detective ids, sorted by name
+    headlines      string ids of the four headline pools
+    blob           every distinct string once, UTF-8
+
+The game memory-maps the compiled file and reads it lazily: opening a pack
+reads the header and checks the checksum once per process (one pass over the
+mapped file), a target or headline is decoded from its record when it is
+drawn, and "is this name in the pack" is a binary search over a name index.
+Private memory stays the same however large the pack, and server processes
+using the same pack share its pages through the page cache. Compiled packs
+are little-endian.
+
+Pack source format (JSON):
+
+    {"name": "noir",
+     "criminals": [{"name": "Marcus Webb", "crime": "Petty theft and fraud", "danger": 1}, ...],
+     "detectives": [{"name": "Detective Sarah Chen", "title": "Detective"}, ...],
+     "headlines": {"low": ["..."], "medium": ["..."], "high": ["..."], "unstoppable": ["..."]}}
+
+Any list may instead be the name of a CSV file next to the JSON, with a
+header row: name,crime,danger for criminals, name,title for detectives and
+text for headlines. A detective's title is optional (it defaults to the rank
+the name starts with). The first criminal and the first detective are the
+tutorial target of turn 1. Criminal and detective names must all differ.
+
+Usage:
+    python -m judge.content export classic.json
+    python -m judge.content compile classic.json classic.jcp
+    python -m judge.content info classic.jcp
+    python -m judge.content bench --size 100000
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+
+MAGIC = b"JCP1"
+VERSION = 1
+HEADLINE_POOLS = ("low", "medium", "high", "unstoppable")
+# Danger levels (inclusive, None for no bound) of the early, mid and late game pools
+TIER_DANGER = ((None, 5), (2, 8), (3, None))
+# Ranks a detective's title defaults to, longest first
+RANKS = ("Chief Superintendent", "Chief Inspector", "Inspector General", "Special Agent",
+         "Detective", "Inspector", "Lieutenant", "Sergeant", "Commander", "Captain", "Agent", "Chief")
+
+# One database entry; immutable so the pools can share them
+CriminalRecord = namedtuple("CriminalRecord", ["name", "crime", "danger_level"])
+
+# magic, version, flags, checksum of everything after the header, strings,
+# criminals, detectives, the three tier sizes, the four headline pool sizes,
+# pack name (string id)
+_HEADER = struct.Struct("<4sHHI11I")
+_CRIMINAL = struct.Struct("<IIBB2x")  # name, crime, danger, tier bits
+_DETECTIVE = struct.Struct("<II")  # name, title
+_ID = 4  # bytes per id in the tier, index and headline sections
+
+
+class ContentError(ValueError):
+    """A content pack or its source is malformed"""
+
+
+def in_tier(danger, tier):
+    """Whether a criminal of this danger is in tier `tier`'s pool"""
+    low, high = TIER_DANGER[tier]
+    return (low is None or danger >= low) and (high is None or danger <= high)
+
+
+def title_of(name):
+    """The rank a detective's name starts with, or ''"""
+    for rank in RANKS:
+        if name.startswith(rank + " "):
+            return rank
+    return ""
+
+
+class Content:
+    """Content held in memory (the built-in content is one)
+
+    Every content, packed or not, has the same attributes: criminals
+    (CriminalRecords) and detectives (names) in database order, titles (of
+    the detectives), tiers (the three difficulty pools, in database order),
+    tier_positions, criminal_positions and detective_positions (name ->
+    position in that pool), headlines (the four pools of HEADLINE_POOLS) and
+    names (every criminal and detective name, for `in`).
+    """
+
+    def __init__(self, name, criminals, detectives, headlines, titles=None):
+        self.name = name
+        self.criminals = tuple(CriminalRecord(*entry) for entry in criminals)
+        self.detectives = tuple(detectives)
+        self.titles = tuple(titles) if titles is not None else tuple(map(title_of, self.detectives))
+        self.headlines = tuple(tuple(pool) for pool in headlines)
+        self.tiers = tuple(tuple(c for c in self.criminals if in_tier(c.danger_level, tier))
+                           for tier in range(len(TIER_DANGER)))
+        self.tier_positions = tuple({c.name: i for i, c in enumerate(pool)} for pool in self.tiers)
+        self.criminal_positions = {c.name: i for i, c in enumerate(self.criminals)}
+        self.detective_positions = {name: i for i, name in enumerate(self.detectives)}
+        self.names = frozenset(self.criminal_positions) | frozenset(self.detective_positions)
+
+    def __repr__(self):
+        return "Content(%r)" % self.name
+
+
+# -- reading packs ----------------------------------------------------------
+
+
+class _View(Sequence):
+    """Read-only sequence decoding item i on access"""
+
+    __slots__ = ("size",)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if index.__class__ is int and 0 <= index < self.size:
+            return self._get(index)
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("content index out of range")
+        return self._get(index)
+
+
+class _Strings(_View):
+    __slots__ = ("data", "offsets", "blob")
+
+    def __init__(self, data, offsets, blob):
+        self.data = data
+        self.offsets = offsets
+        self.blob = blob
+        self.size = len(offsets) - 1
+
+    def raw(self, index):
+        return self.data[self.blob + self.offsets[index]:self.blob + self.offsets[index + 1]]
+
+    def _get(self, index):
+        return self.raw(index).decode("utf-8")
+
+
+class _Criminals(_View):
+    __slots__ = ("data", "start", "strings")
+
+    def __init__(self, data, start, size, strings):
+        self.data = data
+        self.start = start
+        self.size = size
+        self.strings = strings
+
+    def name(self, index):
+        return self.strings.raw(_CRIMINAL.unpack_from(self.data, self.start + index * _CRIMINAL.size)[0])
+
+    def _get(self, index):
+        name, crime, danger, _ = _CRIMINAL.unpack_from(self.data, self.start + index * _CRIMINAL.size)
+        return CriminalRecord(self.strings[name], self.strings[crime], danger)
+
+
+class _Detectives(_View):
+    __slots__ = ("data", "start", "strings", "field")
+
+    def __init__(self, data, start, size, strings, field=0):
+        self.data = data
+        self.start = start
+        self.size = size
+        self.strings = strings
+        self.field = field  # 0 for names, 1 for titles
+
+    def name(self, index):
+        return self.strings.raw(_DETECTIVE.unpack_from(self.data, self.start + index * _DETECTIVE.size)[0])
+
+    def _get(self, index):
+        ids = _DETECTIVE.unpack_from(self.data, self.start + index * _DETECTIVE.size)
+        return self.strings[ids[self.field]]
+
+
+class _Subset(_View):
+    """The items of `base` at the ids of an id array, in its order"""
+
+    __slots__ = ("base", "ids")
+
+    def __init__(self, base, ids):
+        self.base = base
+        self.ids = ids
+        self.size = len(ids)
+
+    def _get(self, index):
+        return self.base[self.ids[index]]
+
+
+class _Positions(Mapping):
+    """name -> database position, by binary search of a name-sorted id array"""
+
+    def __init__(self, records, order):
+        self.records = records
+        self.order = order
+
+    def get(self, name, default=None):
+        key = name.encode("utf-8")
+        order, records = self.order, self.records
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if records.name(order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and records.name(order[low]) == key:
+            return order[low]
+        return default
+
+    def __getitem__(self, name):
+        position = self.get(name)
+        if position is None:
+            raise KeyError(name)
+        return position
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return (self.records.name(i).decode("utf-8") for i in self.order)
+
+
+class _TierPositions(Mapping):
+    """name -> position in a tier pool, whose ids are in database order"""
+
+    def __init__(self, positions, ids):
+        self.positions = positions
+        self.ids = ids
+
+    def get(self, name, default=None):
+        position = self.positions.get(name)
+        if position is None:
+            return default
+        low, high = 0, len(self.ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self.ids[middle] < position:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(self.ids) and self.ids[low] == position else default
+
+    def __getitem__(self, name):
+        position = self.get(name)
+        if position is None:
+            raise KeyError(name)
+        return position
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self.positions.records.name(i).decode("utf-8") for i in self.ids)
+
+
+class _Names:
+    """`in` for every criminal and detective name of a pack"""
+
+    def __init__(self, *positions):
+        self.positions = positions
+
+    def __contains__(self, name):
+        return any(name in positions for positions in self.positions)
+
+
+class Pack:
+    """A compiled content pack, memory-mapped and read lazily
+
+    Has the attributes of Content, backed by the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if sys.byteorder != "little":
+            raise ContentError("content packs can only be read on little-endian machines")
+        with open(path, "rb") as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as error:  # an empty file
+                raise ContentError("%s is not a content pack" % path) from error
+        try:
+            fields = _HEADER.unpack_from(self.data)
+        except struct.error as error:
+            raise ContentError("%s is not a content pack" % path) from error
+        magic, version, _, self.checksum = fields[:4]
+        strings, criminals, detectives = fields[4:7]
+        tiers, headlines, name = fields[7:10], fields[10:14], fields[14]
+        if magic != MAGIC or version != VERSION:
+            raise ContentError("%s is not a content pack (or from another version)" % path)
+
+        # Lay the sections out from their sizes, as compile_pack wrote them
+        blob = (_HEADER.size + (strings + 1 + sum(tiers) + criminals + detectives + sum(headlines)) * _ID
+                + criminals * _CRIMINAL.size + detectives * _DETECTIVE.size)
+        if len(self.data) < blob:
+            raise ContentError("%s is truncated" % path)
+        view = memoryview(self.data)
+        offset = _HEADER.size
+
+        def ids(count):
+            nonlocal offset
+            section = view[offset:offset + count * _ID].cast("I")
+            offset += count * _ID
+            return section
+
+        offsets = ids(strings + 1)
+        criminal_start = offset
+        offset += criminals * _CRIMINAL.size
+        detective_start = offset
+        offset += detectives * _DETECTIVE.size
+        tier_ids = [ids(count) for count in tiers]
+        criminal_order, detective_order = ids(criminals), ids(detectives)
+        headline_ids = [ids(count) for count in headlines]
+        if len(self.data) - blob != offsets[-1]:
+            raise ContentError("%s is truncated or corrupt" % path)
+
+        text = _Strings(self.data, offsets, blob)
+        self.name = text[name]
+        self.criminals = _Criminals(self.data, criminal_start, criminals, text)
+        self.detectives = _Detectives(self.data, detective_start, detectives, text)
+        self.titles = _Detectives(self.data, detective_start, detectives, text, field=1)
+        self.tiers = tuple(_Subset(self.criminals, pool) for pool in tier_ids)
+        self.criminal_positions = _Positions(self.criminals, criminal_order)
+        self.detective_positions = _Positions(self.detectives, detective_order)
+        self.tier_positions = tuple(_TierPositions(self.criminal_positions, pool) for pool in tier_ids)
+        self.headlines = tuple(_Subset(text, pool) for pool in headline_ids)
+        self.names = _Names(self.criminal_positions, self.detective_positions)
+
+    def __repr__(self):
+        return "Pack(%r)" % self.path
+
+    def verify(self):
+        """Check the checksum (reads the whole file)"""
+        with memoryview(self.data) as view:
+            checksum = zlib.crc32(view[_HEADER.size:])
+        if checksum != self.checksum:
+            raise ContentError("%s is corrupt: checksum doesn't match" % self.path)
+
+
+_PACKS = {}
+
+
+def load(path):
+    """The Pack of a compiled file, opened and verified once per process and shared"""
+    key = os.path.realpath(path)
+    pack = _PACKS.get(key)
+    if pack is None:
+        pack = Pack(path)
+        pack.verify()
+        pack = _PACKS.setdefault(key, pack)
+    return pack
+
+
+# -- compiling packs --------------------------------------------------------
+
+
+def _rows(value, base, columns, what):
+    """The rows of a source list, reading it from a CSV file if it names one"""
+    if isinstance(value, str):
+        import csv
+
+        try:
+            with open(os.path.join(base, value), newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        except (OSError, csv.Error) as error:
+            raise ContentError("can't read %s from %s: %s" % (what, value, error)) from error
+        value = [row if len(columns) > 1 else row.get(columns[0]) for row in rows]
+    if not isinstance(value, list) or not value:
+        raise ContentError("%s must be a non-empty list or a CSV file" % what)
+    return value
+
+
+def read_source(path):
+    """(name, criminals, detectives, titles, headlines) of a pack source file, checked"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError as error:
+        raise ContentError("%s is not valid JSON: %s" % (path, error)) from error
+    if not isinstance(data, dict):
+        raise ContentError("a content pack source must be a JSON object")
+    base = os.path.dirname(path)
+
+    criminals = []
+    for row in _rows(data.get("criminals"), base, ("name", "crime", "danger"), "criminals"):
+        if not isinstance(row, dict):
+            raise ContentError("criminals must be objects with name, crime and danger")
+        name, crime, danger = row.get("name"), row.get("crime"), row.get("danger")
+        try:
+            danger = int(danger)
+        except (TypeError, ValueError):
+            danger = -1
+        if not isinstance(name, str) or not name or not isinstance(crime, str) or not 0 <= danger <= 255:
+            raise ContentError("criminal %r needs a name, a crime and a danger from 0 to 255" % (name,))
+        criminals.append(CriminalRecord(name, crime, danger))
+
+    detectives, titles = [], []
+    for row in _rows(data.get("detectives"), base, ("name", "title"), "detectives"):
+        if isinstance(row, str):
+            row = {"name": row}
+        name = row.get("name") if isinstance(row, dict) else None
+        if not isinstance(name, str) or not name:
+            raise ContentError("detectives must be names or objects with a name")
+        title = row.get("title") or title_of(name)
+        if not isinstance(title, str):
+            raise ContentError("detective %r has a title that isn't text" % name)
+        detectives.append(name)
+        titles.append(title)
+
+    names = [c.name for c in criminals] + detectives
+    if len(set(names)) != len(names):
+        seen = set()
+        twice = next(n for n in names if n in seen or seen.add(n))
+        raise ContentError("%r appears more than once among the criminals and detectives" % twice)
+
+    sections = data.get("headlines")
+    if not isinstance(sections, dict):
+        raise ContentError("headlines must be an object with %s" % ", ".join(HEADLINE_POOLS))
+    headlines = []
+    for pool in HEADLINE_POOLS:
+        texts = _rows(sections.get(pool), base, ("text",), "%s headlines" % pool)
+        if not all(isinstance(text, str) and text for text in texts):
+            raise ContentError("%s headlines must be text" % pool)
+        headlines.append(texts)
+    name = data.get("name", os.path.splitext(os.path.basename(path))[0])
+    return str(name), criminals, detectives, titles, headlines
+
+
+def pack_bytes(name, criminals, detectives, titles, headlines):
+    """The compiled form of some content"""
+    strings = {}
+
+    def string_id(text):
+        return strings.setdefault(text, len(strings))
+
+    name_id = string_id(name)
+    criminal_records = bytearray()
+    for c in criminals:
+        tiers = sum(1 << tier for tier in range(len(TIER_DANGER)) if in_tier(c.danger_level, tier))
+        criminal_records += _CRIMINAL.pack(string_id(c.name), string_id(c.crime), c.danger_level, tiers)
+    detective_records = bytearray()
+    for detective, title in zip(detectives, titles):
+        detective_records += _DETECTIVE.pack(string_id(detective), string_id(title))
+    tiers = [array("I", [i for i, c in enumerate(criminals) if in_tier(c.danger_level, tier)])
+             for tier in range(len(TIER_DANGER))]
+    criminal_order = array("I", sorted(range(len(criminals)), key=lambda i: criminals[i].name.encode("utf-8")))
+    detective_order = array("I", sorted(range(len(detectives)), key=lambda i: detectives[i].encode("utf-8")))
+    headline_ids = [array("I", map(string_id, pool)) for pool in headlines]
+
+    blob = bytearray()
+    offsets = array("I", [0])
+    for text in strings:  # in id order
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+
+    body = b"".join([offsets.tobytes(), bytes(criminal_records), bytes(detective_records)]
+                    + [pool.tobytes() for pool in tiers]
+                    + [criminal_order.tobytes(), detective_order.tobytes()]
+                    + [pool.tobytes() for pool in headline_ids] + [bytes(blob)])
+    header = _HEADER.pack(MAGIC, VERSION, 0, zlib.crc32(body), len(strings), len(criminals), len(detectives),
+                          *([len(pool) for pool in tiers] + [len(pool) for pool in headlines] + [name_id]))
+    return header + body
+
+
+def compile_pack(source, path):
+    """Compile a pack source file; returns the compiled size in bytes"""
+    if sys.byteorder != "little":
+        raise ContentError("content packs can only be compiled on little-endian machines")
+    data = pack_bytes(*read_source(source))
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+    return len(data)
+
+
+def export(content, path):
+    """Write some content as a pack source file, to start a pack from"""
+    data = {
+        "name": content.name,
+        "criminals": [{"name": c.name, "crime": c.crime, "danger": c.danger_level} for c in content.criminals],
+        "detectives": [{"name": name, "title": title} for name, title in zip(content.detectives, content.titles)],
+        "headlines": {pool: list(texts) for pool, texts in zip(HEADLINE_POOLS, content.headlines)},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def private_kb():
+    """This process's resident private (anonymous) memory in kilobytes, or None without /proc
+
+    Pages of a memory-mapped pack are file pages, shared with every process
+    mapping it and dropped under memory pressure, so they don't count.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def bench(size, path, turns=20000):
+    """Compile a generated pack of `size` criminals and time opening it and drawing from it"""
+    import random
+    import time
+
+    from judge import engine, rules
+    from judge.endless import _CRIMINAL_NAMES, _DETECTIVE_NAMES, CRIMES, criminal_name, detective_name
+
+    rng = random.Random(0)
+    criminals = [CriminalRecord("%s #%d" % (criminal_name(i % _CRIMINAL_NAMES), i), *rng.choice(CRIMES)) for i in range(size)]
+    detectives = ["%s #%d" % (detective_name(i % _DETECTIVE_NAMES), i) for i in range(max(15, size // 10))]
+    headlines = [["%s headline %d" % (pool, i) for i in range(max(8, size // 100))] for pool in HEADLINE_POOLS]
+    start = time.perf_counter()
+    data = pack_bytes("bench", criminals, detectives, list(map(title_of, detectives)), headlines)
+    with open(path, "wb") as f:
+        f.write(data)
+    compiled = time.perf_counter() - start
+    del criminals, detectives, headlines, data
+
+    before = private_kb()
+    start = time.perf_counter()
+    ruleset = rules.Ruleset(content=path)
+    pack = rules.derived(ruleset).content
+    opened = time.perf_counter() - start
+    state = engine.new_game(rng, rules=ruleset)
+    start = time.perf_counter()
+    for turn in range(turns):
+        engine.generate_criminals(2 + turn % 19, state.executed_names, rng, ruleset)
+        engine.generate_news_headline(turn % 100, 20, turn % 10, rng, pack.headlines)
+    drawn = time.perf_counter() - start
+    after = private_kb()
+    return {"bytes": os.path.getsize(path), "compile_s": compiled, "open_ms": opened * 1000,
+            "turn_us": drawn / turns * 1e6, "private_kb": None if before is None else after - before}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile and inspect THE JUDGE's content packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("compile", help="compile a pack source (JSON) into a pack")
+    command.add_argument("source")
+    command.add_argument("pack")
+    command = commands.add_parser("export", help="write the built-in content as a pack source")
+    command.add_argument("source")
+    command = commands.add_parser("info", help="describe a compiled pack and check its checksum")
+    command.add_argument("pack")
+    command = commands.add_parser("bench", help="time a generated pack of --size criminals")
+    command.add_argument("--size", type=int, default=100000, help="criminals in the generated pack")
+    command.add_argument("--pack", default="bench.jcp", help="file to compile it to")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "compile":
+            size = compile_pack(args.source, args.pack)
+            print("Compiled %s into %s (%d bytes)" % (args.source, args.pack, size))
+        elif args.command == "export":
+            from judge.engine import CLASSIC_CONTENT
+
+            export(CLASSIC_CONTENT, args.source)
+            print("Wrote the built-in content to %s" % args.source)
+        elif args.command == "info":
+            pack = Pack(args.pack)
+            pack.verify()
+            print("%s: %r, %d criminals (tiers %s), %d detectives, headlines %s, %d bytes"
+                  % (args.pack, pack.name, len(pack.criminals), "/".join(str(len(t)) for t in pack.tiers),
+                     len(pack.detectives), "/".join(str(len(h)) for h in pack.headlines), len(pack.data)))
+        else:
+            if args.size < 1:
+                parser.error("--size must be at least 1")
+            result = bench(args.size, args.pack)
+            print("%d criminals: %d bytes compiled in %.2fs; opened in %.3fms; "
+                  "a turn's targets and headline drawn in %.1fus; private memory %s"
+                  % (args.size, result["bytes"], result["compile_s"], result["open_ms"], result["turn_us"],
+                     "n/a" if result["private_kb"] is None else "%+d kB" % result["private_kb"]))
+    except (OSError, ContentError) as error:
+        print("error: %s" % error, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Difficulty presets for THE JUDGE.
+
+A preset is a judge.rules.Ruleset that moves some of the rules that shape
+how hard the game is away from their classic values:
+
+    popularity_protection_threshold  popularity at which the police go easy
+    popularity_protection_bonus      capture risk they take off each execution
+    capture_risk_skip_reduction      capture risk laying low takes off
+    max_skips                        times you may lay low
+    danger_capture_risk              capture risk per danger level of a target
+    detective_capture_risk           extra capture risk when a detective is on the case
+
+The shipped presets (judge/data/presets/easy.json, normal.json and
+hard.json) are written by `python -m judge.calibrate`, which searches these
+rules for the win rate each preset aims at. load() returns a preset's
+Ruleset; games started with it play by it and nothing else changes, so
+games on different presets can run in the same process.
+
+Preset file format (JSON) - a ruleset file with some notes next to it:
+
+    {"name": "easy", "target_win_rate": 0.9, "policy": "cautious",
+     "rules": {"max_skips": 7, ...}, "measured": {...}}
+
+Only "rules" is needed; rules it leaves out keep their classic values.
+"""
+
+import json
+import os
+
+from judge import rules
+
+PRESET_DIR = os.path.join(os.path.dirname(__file__), "data", "presets")
+PRESETS = ("easy", "normal", "hard")
+TUNABLE = (
+    "popularity_protection_threshold",
+    "popularity_protection_bonus",
+    "capture_risk_skip_reduction",
+    "max_skips",
+    "danger_capture_risk",
+    "detective_capture_risk",
+)
+
+
+def path_of(source):
+    """The file of a preset name, or `source` itself if it is a path"""
+    if source in PRESETS:
+        return os.path.join(PRESET_DIR, source + ".json")
+    return source
+
+
+def load(source):
+    """The Ruleset of a preset name or file (any ruleset file will do)"""
+    return rules.load(path_of(source))
+
+
+def write(path, name, ruleset, **details):
+    """Write a preset file atomically"""
+    data = dict({"name": name, "rules": dict(sorted(ruleset.to_dict().items()))}, **details)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(temporary, path)
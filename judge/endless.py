@@ -0,0 +1,259 @@
+"""
+Endless mode for THE JUDGE: marathon games with flat memory.
+
+The classic game runs out of content: after twenty-odd executions the tier
+pools are empty and generate_criminals falls back to the same three
+database entries, the detective pool is reset wholesale, and
+executed_names keeps every name ever written. Endless mode plays by the
+same rules with a different supply of targets:
+
+  * Recycling. A name written in the notebook goes on cooldown - it stays in
+    executed_names, and so off the target list, until COOLDOWN more names
+    have been written after it. GameState.cooldown holds the queue, oldest
+    first, and executed_names is exactly the names in it, so neither grows
+    past COOLDOWN however long the game runs.
+  * Procedural content. When a tier's hand-written criminals (or the
+    detectives) are all on cooldown, the turn is filled with generated ones:
+    a name made of first name, nickname and surname fragments and a crime
+    from the tier's danger range. Each is one random index into a space of
+    tens of thousands, redrawn on the rare hit on a name on cooldown, so a
+    draw costs O(1) however many turns came before.
+  * Waves. Difficulty follows the classic campaign's curve and starts over
+    every WAVE turns, so a marathon has a rhythm instead of a wall.
+
+Endless games can have a turn limit (a marathon) or none (play until the
+police win). Generated names are not in the content databases, so endless
+games can't be saved as snapshots or action logs.
+
+`python -m judge.endless --turns 100000` is the soak test: it plays one
+game for that many turns and checks that memory stays flat.
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from judge import engine
+from judge.rules import CLASSIC
+from judge.engine import (
+    CRIMINAL_TIERS,
+    MAX_TURNS,
+    Available,
+    Criminal,
+    content_of,
+    pool_tier,
+)
+
+COOLDOWN = 40  # names written before a name can come back
+WAVE = MAX_TURNS  # turns before the difficulty curve starts over
+PARDON_RISK = 0  # capture risk the soak test restarts from after an arrest
+
+FIRST_NAMES = (
+    "Abel", "Bruno", "Carla", "Dante", "Edith", "Felix", "Gloria", "Hank", "Ivy", "Jonah",
+    "Karl", "Lena", "Milo", "Nadia", "Oscar", "Paula", "Quentin", "Rosa", "Sergei", "Tess",
+    "Ulric", "Vera", "Wade", "Xenia", "Yusuf", "Zelda", "Arturo", "Bianca", "Cyrus", "Dolores",
+)
+NICKNAMES = (
+    "Ace", "Blackjack", "Butcher", "Cobra", "Crow", "Doc", "Duchess", "Ghost", "Hatchet",
+    "Jackal", "Knuckles", "Lucky", "Mongoose", "Needles", "Preacher", "Razor", "Saint",
+    "Scalpel", "Silk", "Smiley", "Tailor", "Torch", "Viper", "Whisper",
+)
+SURNAMES = (
+    "Abernathy", "Barlow", "Castellano", "Drummond", "Esposito", "Falk", "Grimaldi", "Hale",
+    "Ivanov", "Jankowski", "Kessler", "Lindqvist", "Moreau", "Novak", "Okafor", "Petrakis",
+    "Quill", "Romano", "Szabo", "Thorne", "Underwood", "Valdez", "Whitlock", "Yamada", "Zamora",
+)
+# (crime, danger level)
+CRIMES = (
+    ("Shoplifting spree", 1), ("Insurance fraud", 1), ("Counterfeit concert tickets", 1),
+    ("Car theft ring", 2), ("Running a chop shop", 2), ("Witness intimidation", 2),
+    ("Arson for hire", 3), ("Armed robbery", 3), ("Extortion of small businesses", 3),
+    ("Gun running", 4), ("Contract killings", 4), ("Money laundering for a cartel", 4),
+    ("Kidnapping for ransom", 5), ("Poisoning the water supply", 5), ("Human smuggling", 5),
+    ("Massacre of a rival family", 6), ("Bombing a courthouse", 6), ("Selling weapons to warlords", 7),
+    ("Running a private army", 7), ("Engineering a famine", 8), ("Stealing a warhead", 9),
+    ("Holding a city hostage", 10),
+)
+DETECTIVE_RANKS = ("Detective", "Inspector", "Sergeant", "Agent", "Lieutenant")
+
+# Danger range of each classic tier (see engine.CRIMINAL_TIERS)
+_TIER_CRIMES = tuple(
+    tuple(crime for crime in CRIMES if min(c.danger_level for c in pool) <= crime[1]
+          <= max(c.danger_level for c in pool))
+    for pool in CRIMINAL_TIERS
+)
+_CRIMINAL_NAMES = len(FIRST_NAMES) * len(NICKNAMES) * len(SURNAMES)
+_DETECTIVE_NAMES = len(DETECTIVE_RANKS) * len(FIRST_NAMES) * len(SURNAMES)
+
+
+def criminal_name(index):
+    """The index-th generated criminal name"""
+    index, first = divmod(index, len(FIRST_NAMES))
+    surname, nickname = divmod(index, len(NICKNAMES))
+    return "%s '%s' %s" % (FIRST_NAMES[first], NICKNAMES[nickname], SURNAMES[surname])
+
+
+def detective_name(index):
+    """The index-th generated detective name"""
+    index, rank = divmod(index, len(DETECTIVE_RANKS))
+    surname, first = divmod(index, len(FIRST_NAMES))
+    return "%s %s %s" % (DETECTIVE_RANKS[rank], FIRST_NAMES[first], SURNAMES[surname])
+
+
+def _fresh(generate, size, taken, content, rng):
+    """A generated name not in `taken` nor in the content"""
+    while True:
+        name = generate(rng.randrange(size))
+        if name not in taken and name not in content.names:
+            return name
+
+
+def wave_turn(turn):
+    """The classic turn whose difficulty endless turn `turn` has"""
+    return (turn - 1) % WAVE + 1
+
+
+class Endless:
+    """Endless (or marathon) mode, for engine.step(..., mode=...)"""
+
+    def __init__(self, max_turns=None, cooldown=COOLDOWN):
+        if cooldown < 1:
+            raise ValueError("cooldown must be at least 1")
+        self.max_turns = max_turns  # None to play until arrested
+        self.cooldown = cooldown
+
+    def __repr__(self):
+        return "Endless(max_turns=%r, cooldown=%d)" % (self.max_turns, self.cooldown)
+
+    def new_game(self, rng=random, rules=CLASSIC):
+        return engine.new_game(rng, self, rules)
+
+    def step(self, state, action, rng=random, table=None, draw_rng=None):
+        return engine.step(state, action, rng, table, draw_rng, self)
+
+    def compact(self, state):
+        """Queue the names written last turn and release the ones whose cooldown is over"""
+        written = state.executed_names.difference(state.cooldown)
+        if not written:
+            return state
+        # Sorted, so the queue doesn't depend on set order (string hashing is salted)
+        queue = state.cooldown + tuple(sorted(written))
+        if len(queue) <= self.cooldown:
+            return state._replace(cooldown=queue)
+        queue = queue[len(queue) - self.cooldown:]
+        return state._replace(cooldown=queue, executed_names=frozenset(queue))
+
+    def begin_turn(self, state, rng=random):
+        """Draw the current turn's targets and headline"""
+        state = self.compact(state)
+        criminals = self.generate_criminals(state.turn, state.executed_names, rng, state.rules)
+        headline, streak = engine.generate_news_headline(
+            state.popularity, state.capture_risk, state.turns_with_high_popularity, rng,
+            content_of(state.rules).headlines)
+        return state._replace(current_criminals=criminals, headline=headline,
+                              turns_with_high_popularity=streak)
+
+    def generate_criminals(self, turn, executed_names, rng=random, rules=CLASSIC):
+        """Targets for an endless turn: the classic draw, topped up with generated ones"""
+        if turn == 1:
+            return engine.generate_criminals(1, executed_names, rng, rules)
+        turn = wave_turn(turn)
+        num_criminals = min(3, 2 + (turn // 5))
+        tier = pool_tier(turn)
+        content = content_of(rules)
+        available = Available(content.tiers[tier], content.tier_positions[tier], executed_names)
+        selected = [(c.name, c.crime, c.danger_level)
+                    for c in rng.sample(available, min(num_criminals, len(available)))]
+        taken = set(executed_names)
+        while len(selected) < num_criminals:
+            name = _fresh(criminal_name, _CRIMINAL_NAMES, taken, content, rng)
+            taken.add(name)
+            selected.append((name,) + rng.choice(_TIER_CRIMES[tier]))
+
+        detectives = Available(content.detectives, content.detective_positions, executed_names).head(5)
+        while len(detectives) < 5:
+            name = _fresh(detective_name, _DETECTIVE_NAMES, taken, content, rng)
+            taken.add(name)
+            detectives.append(name)
+
+        criminals = []
+        for name, crime, danger in selected:
+            # Same odds as the classic draw; detectives are never reused in a turn
+            if danger >= rules.no_detective_danger and rng.random() < rules.no_detective_chance:
+                detective = None
+            else:
+                detective = rng.choice(detectives)
+                detectives.remove(detective)
+            criminals.append(Criminal(name, crime, danger, detective))
+        rng.shuffle(criminals)
+        return tuple(criminals)
+
+
+def soak(turns, policy, seed=0, sample_every=1000, cooldown=COOLDOWN):
+    """Play one endless game for `turns` turns, pardoning every arrest
+
+    Returns [(turn, traced bytes)] sampled every `sample_every` turns, plus
+    the number of pardons. An arrest restarts the game's stats from the
+    moment before it with capture risk PARDON_RISK, so the content pool and
+    the cooldown queue keep running for the whole soak.
+    """
+    from judge.policies import get_policy
+
+    policy = get_policy(policy)
+    mode = Endless(cooldown=cooldown)
+    rng = random.Random(seed)
+    state = mode.new_game(rng)
+    samples, pardons = [], 0
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for played in range(1, turns + 1):
+            before = state
+            state, _ = mode.step(state, policy(state, rng), rng)
+            if state.game_over:
+                pardons += 1
+                state = mode.begin_turn(state._replace(
+                    turn=before.turn + 1, capture_risk=PARDON_RISK, game_over=False), rng)
+            if played % sample_every == 0:
+                samples.append((played, tracemalloc.get_traced_memory()[0]))
+    finally:
+        tracemalloc.stop()
+    return samples, pardons, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test THE JUDGE's endless mode")
+    parser.add_argument("--turns", type=int, default=100000, help="turns to play")
+    parser.add_argument("--policy", default="protection_chaser", help="policy making the decisions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cooldown", type=int, default=COOLDOWN, help="names written before one returns")
+    parser.add_argument("--tolerance", type=int, default=64 * 1024,
+                        help="bytes the traced memory may grow between the first and last tenth")
+    args = parser.parse_args(argv)
+    if args.turns < 10:
+        parser.error("--turns must be at least 10")
+
+    start = time.perf_counter()
+    samples, pardons, state = soak(args.turns, args.policy, args.seed,
+                                   max(1, args.turns // 100), args.cooldown)
+    elapsed = time.perf_counter() - start
+    tenth = max(1, len(samples) // 10)
+    early = max(size for _, size in samples[:tenth])
+    late = max(size for _, size in samples[-tenth:])
+    print("%d turns in %.1fs (%.0f turns/s, traced), %d arrests pardoned"
+          % (args.turns, elapsed, args.turns / elapsed, pardons))
+    print("names on cooldown %d, executed_names %d" % (len(state.cooldown), len(state.executed_names)))
+    print("traced memory: first tenth peak %d B, last tenth peak %d B, growth %+d B"
+          % (early, late, late - early))
+    if late - early > args.tolerance:
+        print("FAIL: memory grew by more than %d B" % args.tolerance)
+        return 1
+    print("ok: memory is flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
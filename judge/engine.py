@@ -0,0 +1,638 @@
+"""
+Headless rules engine for THE JUDGE.
+
+Everything here is free of printing, prompting and sleeping. A game is an
+immutable GameState; `step(state, action, rng)` returns the next state plus a
+list of Events describing what happened, which a front end can render however
+it likes. All randomness is drawn from the `rng` argument (the `random` module
+by default, or any `random.Random` instance), in the same order the original
+interactive game drew it, so a seeded run is reproducible.
+
+The rules a game plays by are its state's `rules`, a judge.rules.Ruleset
+(CLASSIC unless new_game is given another), so games with different rules
+can be stepped side by side.
+
+A process steps about 3,000 games (35,000 turns) a second with the "first"
+policy. Most of a turn is the `random` calls the original game made, in its
+order, so plain Python can't go much faster without changing seeded
+games; judge.batch plays whole populations of games with NumPy instead.
+
+Event kinds and their payloads:
+    EXECUTE           Criminal whose name was written
+    CRIMINAL_KILLED   Criminal who died without their detective
+    DETECTIVE_KILLED  (detective name, net capture risk change)
+    PROTECTION        capture risk reduction from popularity
+    STATS             (criminal, capture risk increase or None)
+    BREAKING_NEWS     headline text of the random event
+    SKIP              skips remaining after laying low
+    SKIP_NEWS         headline text shown while laying low
+    ARRESTED          None
+    WON               None
+"""
+
+import random
+from collections import namedtuple
+from collections.abc import Sequence
+
+from judge import events as event_tables
+from judge.content import Content
+from judge.rules import CLASSIC, derived
+
+# The classic game's configuration (see judge.rules for what each means);
+# games read their own state.rules, these are for the models of the classic
+# game in judge.solve and judge.batch
+MAX_TURNS = CLASSIC.max_turns
+MAX_SKIPS = CLASSIC.max_skips
+POPULARITY_PROTECTION_THRESHOLD = CLASSIC.popularity_protection_threshold
+POPULARITY_PROTECTION_BONUS = CLASSIC.popularity_protection_bonus
+CAPTURE_RISK_SKIP_THRESHOLD = CLASSIC.capture_risk_skip_threshold
+CAPTURE_RISK_SKIP_REDUCTION = CLASSIC.capture_risk_skip_reduction
+POPULARITY_SKIP_PENALTY = CLASSIC.popularity_skip_penalty
+DETECTIVE_NAMES_HIDDEN_THRESHOLD = CLASSIC.detective_names_hidden_threshold
+DANGER_CAPTURE_RISK = CLASSIC.danger_capture_risk
+DETECTIVE_CAPTURE_RISK = CLASSIC.detective_capture_risk
+
+
+class Criminal:
+    def __init__(self, name, crime, danger_level, detective_in_charge=None):
+        self.name = name
+        self.crime = crime
+        self.danger_level = danger_level  # 1-10 scale
+        self.detective_in_charge = detective_in_charge
+
+
+# Criminal database - higher danger = more risk but more reward
+CRIMINAL_DATABASE = [
+    # Low danger (1-3) - Tutorial and early turns
+    ("Marcus Webb", "Petty theft and fraud", 1),
+    ("Danny 'Snake' Morrison", "Drug dealing", 2),
+    ("Victor Crane", "Assault and robbery", 2),
+    ("Jimmy 'The Rat' Franklin", "Informant for gang", 2),
+    ("Tina Brooks", "Embezzlement", 1),
+    ("Billy Bob Henderson", "DUI and hit-and-run", 1),
+    ("Chuck 'The Sneak' Miller", "Burglary ring operator", 2),
+    ("Petey 'Two-Times' O'Neil", "Identity theft", 1),
+    ("Gambling Jim Malone", "Illegal gambling operation", 2),
+    ("Ruth 'The Mom' Henderson", "Child neglect and abuse", 3),
+
+    # Medium danger (4-6) - Mid game
+    ("Rico 'The Hammer' Santana", "Organized crime - several murders", 4),
+    ("Dr. Harold Blackwood", "Illegal human experimentation", 5),
+    ("Commander Zara Khan", "Military coup attempt, treason", 6),
+    ("Silas 'Deadshot' Nash", "Serial killer - 12 victims", 5),
+    ("The Crimson Queen", "International drug cartel leader", 6),
+    ("Vinnie 'The Beast' Caruso", "Loan shark, extortionist", 4),
+    ("Dr. Patricia Crane", "Black market organ trafficking", 5),
+    ("Frankie 'Fingers' Delano", "Master pickpocket, crime boss", 4),
+    ("Mayor 'Greedy' John Sullivan", "Corruption, bribery, kickbacks", 5),
+    ("Dr. Irving Moss", "Deadly vaccine trials on homeless", 6),
+
+    # High danger (7-8) - Late game
+    ("General Marcus 'Iron' Sterling", "Military dictator, mass atrocities", 8),
+    ("Viktor Volkov", "Terrorist mastermind, nuclear threats", 8),
+    ("Elena 'The Spider' Vasquez", "Global human trafficking network", 7),
+    ("Dr. Noah Crain", "Bio-weapon developer, mass murder", 7),
+    ("Admiral Hector Stone", "Navy officer selling state secrets", 7),
+    ("The Syndicate Leader 'Mr. White'", "Global crime syndicate", 8),
+    ("Professor Death", "Creating deadly plagues for ransom", 8),
+
+    # Extreme danger (9-10) - Final turns
+    ("President Richard 'The Puppet' Masters", "Global oligarch controlling governments", 10),
+    ("The Architect", "AI terrorist threatening world security", 9),
+    ("Kingpin Zero", "Shadow ruler of global crime, unreachable", 10),
+]
+
+# Detective database - to ensure no repeats
+DETECTIVE_DATABASE = [
+    "Detective Sarah Chen", "Detective James Rodriguez", "Detective Michael Torres",
+    "Captain Lisa Nakamura", "Detective David Kim", "Inspector General Maria Santos",
+    "Chief Superintendent Arthur Black", "Detective Emma Watson",
+    "Agent Frank Morrison", "Commander Helen Price", "Detective Robert 'Bob' Williams",
+    "Special Agent Catherine 'Cat' Grant", "Detective Luis Fernandez",
+    "Chief Inspector Yuki Tanaka", "Detective Anna Kowalski"
+]
+
+
+def pool_tier(turn):
+    """Which of CRIMINAL_TIERS generate_criminals draws from on this turn"""
+    if turn <= 5:
+        return 0
+    elif turn <= 12:
+        return 1
+    return 2
+
+
+class Available(Sequence):
+    """Read-only view of a pool minus the names already used, in pool order.
+
+    Only the positions of the excluded entries are stored, so building the
+    view and indexing it cost O(excluded) however large the pool is. That is
+    what lets generate_criminals pick its k targets in O(k) time while
+    rng.sample and rng.choice see exactly the list the old filtering built.
+    """
+
+    __slots__ = ("pool", "excluded", "size")
+
+    def __init__(self, pool, positions, names):
+        self.pool = pool
+        self.excluded = sorted([positions[name] for name in names if name in positions])
+        self.size = len(pool) - len(self.excluded)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("pool index out of range")
+        for position in self.excluded:
+            if position > index:
+                break
+            index += 1
+        return self.pool[index]
+
+    def __iter__(self):
+        return iter(self.head(self.size))
+
+    def head(self, count):
+        """The first `count` entries, walking only as far as needed"""
+        pool = self.pool
+        out = []
+        start = 0
+        for position in self.excluded:
+            if len(out) + position - start >= count:
+                break
+            out += pool[start:position]
+            start = position + 1
+        out += pool[start:start + count - len(out)]
+        return out
+
+
+# Base headlines for low popularity
+LOW_POP_HEADLINES = [
+    "MYSTERIOUS DEATHS CONTINUE - Police baffled by 'natural causes'",
+    "'THE JUDGE' - Internet sleuths debate vigilante identity",
+    "Another 'impossible' death rocks the criminal underworld",
+    "Conspiracy theories swirl as deaths defy explanation",
+    "Police admit they're 'completely stumped' by the deaths",
+    "Is this the work of a serial killer? Experts debate",
+    "Deaths linked to 'A Silent Judge' in online conspiracy circles",
+    "Skeptics claim murders are just coincidental heart attacks",
+]
+
+# Medium popularity headlines
+MEDIUM_POP_HEADLINES = [
+    "Online community forms cult around 'The Judge' figure",
+    "'THE JUDGE' - Public divided on vigilante justice",
+    "More victims fall to 'impossible' deaths",
+    "Support groups form both for and against The Judge",
+    "Criminal underworld trembles at The Judge's power",
+    "Is The Judge a hero? Online poll shows 50/50 split",
+    "Police struggle to find leads in 'Judge' case",
+    "Former criminals praise The Judge's work",
+]
+
+# High popularity headlines
+HIGH_POP_HEADLINES = [
+    "People worship 'The Judge' as a god!",
+    "'THE JUDGE' - Is this the end of crime as we know it?",
+    "The Judge is untouchable - internet declares victory",
+    "Entire criminal organizations surrender to authorities out of fear",
+    "World leaders discuss The Judge's 'clean-up' of society",
+    "The Judge has become an international phenomenon",
+    "Could The Judge really be unstoppable? World wonders",
+    "Police beginning to admit defeat - The Judge is winning",
+]
+
+# Special headlines for long-term high popularity AND low capture risk
+UNSTOPPABLE_HEADLINES = [
+    "ANALYSIS: Is The Judge UNSTOPPABLE? Experts say yes",
+    "The Judge has operated for so long, experts wonder if they'll EVER be caught",
+    "Has The Judge transcended mortal law? Philosophers weigh in",
+    "Police resources drained - The Judge continues unchecked",
+    "The world considers the idea of The Judge as a permanent fixture",
+    "Forget Sherlock Holmes - The Judge is the perfect criminal",
+    "Is The Judge a ghost? No body, no evidence, no arrests",
+    "The Judge's reign appears ETERNAL - officials begin to give up hope",
+]
+
+# The built-in content, which games play unless their rules name a content
+# pack (see judge.content). Target pools by difficulty are built once: early
+# (danger 1-5), mid (2-8) and late game (3+), each in database order.
+CLASSIC_CONTENT = Content("classic", CRIMINAL_DATABASE, DETECTIVE_DATABASE,
+                          (LOW_POP_HEADLINES, MEDIUM_POP_HEADLINES, HIGH_POP_HEADLINES,
+                           UNSTOPPABLE_HEADLINES))
+CRIMINAL_DATABASE = CLASSIC_CONTENT.criminals
+DETECTIVE_DATABASE = CLASSIC_CONTENT.detectives
+CRIMINAL_TIERS = CLASSIC_CONTENT.tiers
+
+# Name -> position lookups for the pools above
+_TIER_POSITIONS = CLASSIC_CONTENT.tier_positions
+_CRIMINAL_POSITIONS = CLASSIC_CONTENT.criminal_positions
+_DETECTIVE_POSITIONS = CLASSIC_CONTENT.detective_positions
+
+
+def content_of(rules):
+    """The content games under `rules` draw their targets and headlines from"""
+    return derived(rules).content or CLASSIC_CONTENT
+
+# Random events after executions and skips (see judge.events); step() uses
+# this table unless it is given another or the game's rules name their own
+EVENTS = event_tables.load()
+
+
+def events_for(rules):
+    """The event table games under `rules` draw from"""
+    return derived(rules).events or EVENTS
+
+# Event kinds
+EXECUTE = "execute"
+CRIMINAL_KILLED = "criminal_killed"
+DETECTIVE_KILLED = "detective_killed"
+PROTECTION = "protection"
+STATS = "stats"
+BREAKING_NEWS = "breaking_news"
+SKIP = "skip"
+SKIP_NEWS = "skip_news"
+ARRESTED = "arrested"
+WON = "won"
+
+Event = namedtuple("Event", ["kind", "payload"])
+
+# A decision for the current turn: the 0-based index of the criminal to
+# execute and whether to write their detective's name too. SKIP_TURN lays low.
+Action = namedtuple("Action", ["index", "kill_detective"])
+SKIP_INDEX = -1
+SKIP_TURN = Action(SKIP_INDEX, False)
+
+GameState = namedtuple("GameState", [
+    "turn",
+    "effectiveness",  # How successful your kills are
+    "popularity",  # Online popularity (0-100)
+    "capture_risk",  # Police likelihood to catch you (0-100)
+    "killed_detectives",
+    "skips_remaining",  # Number of skips left
+    "turns_with_high_popularity",  # Track how long player has had high popularity
+    "executed_names",  # frozenset of all executed names (criminals + detectives)
+    "current_criminals",  # tuple of Criminal offered this turn
+    "headline",  # News headline shown this turn
+    "game_over",
+    "won",
+    "cooldown",  # tuple of names on cooldown, oldest first (endless mode only)
+    "rules",  # judge.rules.Ruleset the game plays by
+], defaults=((), CLASSIC))
+
+
+def initial_state(rules=CLASSIC):
+    """Fresh game state before the first turn's targets are drawn"""
+    return GameState(
+        turn=1,
+        effectiveness=0,
+        popularity=0,
+        capture_risk=0,
+        killed_detectives=0,
+        skips_remaining=rules.max_skips,
+        turns_with_high_popularity=0,
+        executed_names=frozenset(),
+        current_criminals=(),
+        headline=None,
+        game_over=False,
+        won=False,
+        rules=rules,
+    )
+
+
+def new_game(rng=random, mode=None, rules=CLASSIC):
+    """Start a game: the initial state with turn 1's targets and headline drawn"""
+    if mode is not None:
+        return mode.begin_turn(initial_state(rules), rng)
+    return begin_turn(initial_state(rules), rng)
+
+
+def generate_criminals(turn, executed_names, rng=random, rules=CLASSIC):
+    """Generate criminals for the given turn"""
+    content = content_of(rules)
+    if turn == 1:
+        # Tutorial - just one easy target, Marcus Webb in the built-in content
+        # (don't add detective to executed yet)
+        return (Criminal(*content.criminals[0], content.detectives[0]),)
+
+    num_criminals = min(3, 2 + (turn // 5))  # 2-3 criminals per turn
+    # Content held in memory is a few dozen entries, which a list
+    # comprehension filters faster than Available views can be built and
+    # walked; a pack may hold millions, so it gets the views
+    in_memory = isinstance(content, Content)
+
+    # Select criminals appropriate for turn difficulty, excluding already executed ones
+    tier = pool_tier(turn)
+    if in_memory:
+        available_criminals = [c for c in content.tiers[tier] if c[0] not in executed_names]
+    else:
+        available_criminals = Available(content.tiers[tier], content.tier_positions[tier], executed_names)
+
+    if len(available_criminals) < num_criminals:
+        # Add more criminals if we don't have enough
+        if in_memory:
+            available_criminals = [c for c in content.criminals if c[0] not in executed_names]
+        else:
+            available_criminals = Available(content.criminals, content.criminal_positions, executed_names)
+
+    if not available_criminals:
+        # Game is out of criminals - generate random ones
+        available_criminals = content.criminals[:3]
+
+    selected = rng.sample(available_criminals, min(num_criminals, len(available_criminals)))
+
+    # Get available detectives (not in executed names)
+    if in_memory:
+        available_detectives = [d for d in content.detectives if d not in executed_names]
+    else:
+        available_detectives = Available(content.detectives, content.detective_positions, executed_names)
+
+    # If running low on detectives, reset the pool (they can be reassigned)
+    if len(available_detectives) < num_criminals:
+        available_detectives = list(content.detectives) if in_memory else Available(
+            content.detectives, content.detective_positions, ())
+
+    # Detectives are only ever picked from the first five still free, so the
+    # first 5 + k are all this turn can touch
+    if in_memory:
+        available_detectives = available_detectives[:5 + num_criminals]
+    else:
+        available_detectives = available_detectives.head(5 + num_criminals)
+
+    criminals = []
+    for name, crime, danger in selected:
+        # Sometimes no detective assigned (for higher profile cases)
+        if danger >= rules.no_detective_danger and rng.random() < rules.no_detective_chance:
+            detective = None
+        elif available_detectives:
+            detective = rng.choice(available_detectives[:5])
+            available_detectives.remove(detective)
+        else:
+            detective = None
+        criminals.append(Criminal(name, crime, danger, detective))
+
+    rng.shuffle(criminals)
+    return tuple(criminals)
+
+
+def generate_news_headline(popularity, capture_risk, turns_with_high_popularity, rng=random,
+                           headlines=None):
+    """Pick this turn's headline.
+
+    Returns (headline, turns_with_high_popularity) with the high popularity
+    streak already counted for this turn. `headlines` are the low, medium,
+    high popularity and unstoppable pools (the built-in ones by default).
+    """
+    low, medium, high, unstoppable = headlines or CLASSIC_CONTENT.headlines
+    # Track turns with high popularity
+    if popularity >= 50:
+        turns_with_high_popularity += 1
+
+    # Determine which headline pool to use
+    high_pop_and_low_risk = (popularity >= 60 and capture_risk <= 30)
+    has_been_popular = turns_with_high_popularity >= 5
+
+    if high_pop_and_low_risk and has_been_popular and rng.random() < 0.4:
+        headline = rng.choice(unstoppable)
+    elif popularity >= 60:
+        headline = rng.choice(high)
+    elif popularity >= 30:
+        headline = rng.choice(medium)
+    else:
+        headline = rng.choice(low)
+    return headline, turns_with_high_popularity
+
+
+def calculate_detective_kill_risk(killed_detectives, rng=random, rules=CLASSIC):
+    """Calculate capture risk change when killing a detective
+    - First detective kill (killed_detectives == 0): always decreases capture risk (freebie)
+    - Second+ kills: random chance to increase or decrease
+    """
+    if killed_detectives == 0:
+        # First detective kill - always decreases capture risk (freebie!)
+        return -rng.randint(*rules.first_detective_kill_roll)
+    else:
+        # Subsequent kills - random chance
+        roll = rng.random()
+        if roll < rules.detective_kill_decrease_chance:
+            # Decrease (a 50% chance in the classic rules)
+            return -rng.randint(*rules.detective_kill_decrease_roll)
+        else:
+            # Increase otherwise
+            return rng.randint(*rules.detective_kill_increase_roll)
+
+
+def calculate_capture_risk(criminal, rng=random, rules=CLASSIC):
+    """Calculate capture risk for executing a criminal"""
+    base_risk = criminal.danger_level * rules.danger_capture_risk
+    detective_bonus = rules.detective_capture_risk if criminal.detective_in_charge else 0
+    random_factor = rng.randint(*rules.capture_roll)
+    return base_risk + detective_bonus + random_factor
+
+
+def can_skip(state):
+    """Whether laying low is allowed this turn"""
+    return state.capture_risk >= state.rules.capture_risk_skip_threshold and state.skips_remaining > 0
+
+
+def can_kill_detective(state, criminal_index):
+    """Whether executing this criminal offers the chance to kill their detective"""
+    detective = state.current_criminals[criminal_index].detective_in_charge
+    return (detective is not None
+            and detective not in state.executed_names
+            and state.killed_detectives < state.rules.detective_names_hidden_threshold)
+
+
+def legal_actions(state):
+    """Every action the player may take in this state"""
+    actions = []
+    for i in range(len(state.current_criminals)):
+        actions.append(Action(i, False))
+        if can_kill_detective(state, i):
+            actions.append(Action(i, True))
+    if can_skip(state):
+        actions.append(SKIP_TURN)
+    return actions
+
+
+def begin_turn(state, rng=random):
+    """Draw the current turn's targets and headline"""
+    criminals = generate_criminals(state.turn, state.executed_names, rng, state.rules)
+    headline, streak = generate_news_headline(
+        state.popularity, state.capture_risk, state.turns_with_high_popularity, rng,
+        content_of(state.rules).headlines)
+    return state._replace(current_criminals=criminals, headline=headline,
+                          turns_with_high_popularity=streak)
+
+
+def step(state, action, rng=random, table=None, draw_rng=None, mode=None):
+    """Apply one decision and advance the game.
+
+    Returns (new_state, events). If the game goes on, the new state already
+    holds the next turn's targets and headline. The input state is never
+    modified; the only side effect is consuming numbers from `rng`. `table`
+    is the judge.events.EventTable to draw random events from (the table of
+    the game's rules by default). The next turn's targets and headline come from `draw_rng` if
+    given, so they can be drawn independently of how this turn played out.
+    `mode` replaces the turn limit and how turns are drawn (see
+    judge.endless); None plays the turns the rules allow.
+    """
+    table = table or derived(state.rules).events or EVENTS
+    if state.game_over:
+        raise ValueError("the game is already over")
+    events = []
+    if action.index == SKIP_INDEX:
+        if not can_skip(state):
+            raise ValueError("cannot skip this turn")
+        state = _skip_turn(state, rng, events, table)
+    else:
+        if not 0 <= action.index < len(state.current_criminals):
+            raise ValueError("no criminal at index %d" % action.index)
+        if action.kill_detective and not can_kill_detective(state, action.index):
+            raise ValueError("no detective to kill for criminal %d" % action.index)
+        state = _execute(state, action, rng, events, table)
+
+    if state.game_over:
+        return state, events
+    max_turns = state.rules.max_turns if mode is None else mode.max_turns
+    if max_turns is not None and state.turn > max_turns:
+        events.append(Event(WON, None))
+        return state._replace(won=True, game_over=True), events
+    draw_rng = rng if draw_rng is None else draw_rng
+    if mode is not None:
+        return mode.begin_turn(state, draw_rng), events
+    return begin_turn(state, draw_rng), events
+
+
+def _skip_turn(state, rng, events, table):
+    """Skip the current turn to reduce capture risk"""
+    rules = state.rules
+    skips_remaining = state.skips_remaining - 1
+    events.append(Event(SKIP, skips_remaining))
+    capture_risk = max(0, state.capture_risk - rules.capture_risk_skip_reduction)
+    popularity = max(0, state.popularity - rules.popularity_skip_penalty)
+
+    # Random event chance
+    event = table.skip_news.pick(rng, state.turn, popularity, capture_risk)
+    if event is not None:
+        events.append(Event(SKIP_NEWS, event.text))
+        popularity, capture_risk = _apply_event(event, popularity, capture_risk)
+
+    return state._replace(
+        turn=state.turn + 1,
+        capture_risk=capture_risk,
+        popularity=popularity,
+        skips_remaining=skips_remaining,
+    )
+
+
+def _execute(state, action, rng, events, table):
+    """Execute the chosen criminal"""
+    rules = state.rules
+    criminal = state.current_criminals[action.index]
+    executed_names = state.executed_names | {criminal.name}
+    killed_detectives = state.killed_detectives
+    capture_risk = state.capture_risk
+    popularity = state.popularity
+    events.append(Event(EXECUTE, criminal))
+
+    if action.kill_detective:
+        detective = criminal.detective_in_charge
+        executed_names = executed_names | {detective}
+        killed_detectives += 1
+        # The count is bumped before the roll, as it always has been, so the
+        # "first kill" freebie branch of calculate_detective_kill_risk never fires.
+        detective_risk_change = calculate_detective_kill_risk(killed_detectives, rng, rules)
+        # Calculate criminal's capture risk increase BEFORE applying it
+        criminal_capture_increase = calculate_capture_risk(criminal, rng, rules)
+        net_risk_change = detective_risk_change + criminal_capture_increase
+        capture_risk += net_risk_change
+        events.append(Event(DETECTIVE_KILLED, (detective, net_risk_change)))
+        popularity += criminal.danger_level * rules.danger_popularity + rng.randint(*rules.popularity_roll)
+        capture_increase = None
+    else:
+        events.append(Event(CRIMINAL_KILLED, criminal))
+        popularity += criminal.danger_level * rules.danger_popularity + rng.randint(*rules.popularity_roll)
+        capture_increase = calculate_capture_risk(criminal, rng, rules)
+        capture_risk += capture_increase
+    effectiveness = state.effectiveness + criminal.danger_level * rules.danger_effectiveness
+
+    # Popularity protection
+    if popularity >= rules.popularity_protection_threshold:
+        capture_risk = max(0, capture_risk - rules.popularity_protection_bonus)
+        events.append(Event(PROTECTION, rules.popularity_protection_bonus))
+
+    # Cap stats
+    popularity = min(100, popularity)
+    capture_risk = max(0, min(100, capture_risk))
+    events.append(Event(STATS, (criminal, capture_increase)))
+
+    turn = state.turn
+    if capture_risk >= 100:
+        events.append(Event(ARRESTED, None))
+        game_over = True
+    else:
+        popularity, capture_risk = random_event(popularity, capture_risk, rng, events, table, turn)
+        turn += 1
+        game_over = False
+
+    return state._replace(
+        turn=turn,
+        effectiveness=effectiveness,
+        popularity=popularity,
+        capture_risk=capture_risk,
+        killed_detectives=killed_detectives,
+        executed_names=executed_names,
+        game_over=game_over,
+    )
+
+
+def random_event(popularity, capture_risk, rng=random, events=None, table=None, turn=0):
+    """Random events that can happen; returns the new (popularity, capture_risk)"""
+    event = (table or EVENTS).breaking_news.pick(rng, turn, popularity, capture_risk)
+    if event is None:
+        return popularity, capture_risk
+    if events is not None:
+        events.append(Event(BREAKING_NEWS, event.text))
+    return _apply_event(event, popularity, capture_risk)
+
+
+def _apply_event(event, popularity, capture_risk):
+    popularity = max(0, min(100, popularity + event.popularity))
+    capture_risk = max(0, min(100, capture_risk + event.capture_risk))
+    return popularity, capture_risk
+
+
+ENDINGS = ("WORST", "BAD", "GOOD", "BEST")
+
+
+def ending(state):
+    """Name of the ending display_game_over shows for a finished game"""
+    if state.won:
+        return "BEST"
+    if state.popularity < 30:
+        return "WORST"
+    if state.popularity < 70:
+        return "BAD"
+    return "GOOD"
+
+
+def turns_survived(state):
+    """Turns completed before the game ended"""
+    return state.turn - 1
+
+
+def skips_used(state):
+    """Turns the player laid low"""
+    return state.rules.max_skips - state.skips_remaining
+
+
+def criminals_executed(state):
+    """Criminals whose names were written (every turn not laid low executes one)"""
+    arrested = state.game_over and not state.won  # on the turn of an execution, not counted as survived
+    return turns_survived(state) - skips_used(state) + arrested
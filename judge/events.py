@@ -0,0 +1,240 @@
+"""
+Random event tables for THE JUDGE.
+
+Events used to be a list of headlines whose effects were worked out by
+searching the text ("Popularity" in event, ...). They are now data: each
+EventSpec has a headline, a weight, the popularity and capture risk it adds,
+and optional bounds on the turn, popularity and capture risk it can happen
+at. A table has two sections with their own trigger chance:
+
+    breaking_news   may follow an execution the player survives
+    skip_news       may follow a skipped turn
+
+Each section is compiled once into alias-method samplers, so drawing an event
+costs O(1) however many events there are. Events with conditions are
+filtered per draw and the sampler for each set of eligible events is built
+on first use and kept. When every eligible event has the same weight the
+draw is rng.choice() over them, which makes the random stream identical to
+the original game's.
+
+The shipped table is judge/data/events.json, with the effects its headlines
+state. LEGACY reproduces the original game exactly, including its quirks: the
+popularity headlines also take 13 off capture risk, and the capture risk
+headlines change nothing because the text checks never matched them.
+
+Data file format (JSON):
+
+    {"breaking_news": {"chance": 0.2, "events": [
+        {"text": "...", "weight": 1, "popularity": 20, "capture_risk": 0,
+         "min_turn": 5, "max_capture_risk": 80}, ...]},
+     "skip_news": {...}}
+
+Everything but "text" is optional; the bounds are min_/max_ turn, popularity
+and capture_risk, all inclusive.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "events.json")
+SECTIONS = ("breaking_news", "skip_news")
+BOUNDS = ("min_turn", "max_turn", "min_popularity", "max_popularity",
+          "min_capture_risk", "max_capture_risk")
+
+EventSpec = namedtuple("EventSpec", ("text", "weight", "popularity", "capture_risk") + BOUNDS,
+                       defaults=(1, 0, 0) + (None,) * len(BOUNDS))
+
+
+class EventTableError(ValueError):
+    """An event table file is malformed"""
+
+
+def _eligible(spec, turn, popularity, capture_risk):
+    for value, low, high in ((turn, spec.min_turn, spec.max_turn),
+                             (popularity, spec.min_popularity, spec.max_popularity),
+                             (capture_risk, spec.min_capture_risk, spec.max_capture_risk)):
+        if low is not None and value < low:
+            return False
+        if high is not None and value > high:
+            return False
+    return True
+
+
+def _conditional(spec):
+    return any(getattr(spec, bound) is not None for bound in BOUNDS)
+
+
+class AliasSampler:
+    """Draws one of `items` with probability proportional to `weights` in O(1).
+
+    Vose's alias method: column i is kept with probability prob[i] and
+    otherwise replaced by alias[i], so a draw is one uniform number. Equal
+    weights skip the tables and use rng.choice().
+    """
+
+    __slots__ = ("items", "prob", "alias", "uniform")
+
+    def __init__(self, items, weights):
+        self.items = tuple(items)
+        n = len(self.items)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("an event sampler needs at least one positive weight")
+        self.uniform = len(set(weights)) == 1
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        if self.uniform:
+            return
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1 up to rounding
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        if self.uniform:
+            return rng.choice(self.items)
+        u = rng.random() * len(self.items)
+        column = int(u)
+        if u - column < self.prob[column]:
+            return self.items[column]
+        return self.items[self.alias[column]]
+
+
+class EventSection:
+    """One section of a table: a trigger chance and the events it picks from"""
+
+    def __init__(self, chance, specs):
+        if not 0.0 <= chance <= 1.0:
+            raise EventTableError("event chance must be between 0 and 1, not %r" % chance)
+        self.chance = chance
+        self.specs = tuple(spec for spec in specs if spec.weight > 0)
+        self.conditional = any(_conditional(spec) for spec in self.specs)
+        self._samplers = {}
+        if self.specs and not self.conditional:
+            self._samplers[None] = AliasSampler(self.specs, [s.weight for s in self.specs])
+
+    def pick(self, rng, turn, popularity, capture_risk):
+        """The EventSpec that happens at this turn and these stats, or None"""
+        if not self.specs or not rng.random() < self.chance:
+            return None
+        if not self.conditional:
+            return self._samplers[None].draw(rng)
+        key = 0
+        for i, spec in enumerate(self.specs):
+            if _eligible(spec, turn, popularity, capture_risk):
+                key |= 1 << i
+        if not key:
+            return None
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            eligible = [spec for i, spec in enumerate(self.specs) if key >> i & 1]
+            sampler = self._samplers[key] = AliasSampler(eligible, [s.weight for s in eligible])
+        return sampler.draw(rng)
+
+    def outcomes(self):
+        """[(probability, popularity change, capture risk change)] of one trigger
+
+        Only defined for sections without conditions; the models in
+        judge.batch and judge.solve use it.
+        """
+        if self.conditional:
+            raise ValueError("outcomes() needs a table without event conditions")
+        total = float(sum(spec.weight for spec in self.specs))
+        merged = {}
+        for spec in self.specs:
+            key = (spec.popularity, spec.capture_risk)
+            merged[key] = merged.get(key, 0.0) + self.chance * spec.weight / total
+        return [(p, popularity, risk) for (popularity, risk), p in sorted(merged.items())]
+
+    def outcomes_at(self, turn, popularity, capture_risk):
+        """Like outcomes(), for the events eligible at this turn and these stats"""
+        eligible = [spec for spec in self.specs if _eligible(spec, turn, popularity, capture_risk)]
+        total = float(sum(spec.weight for spec in eligible))
+        merged = {}
+        for spec in eligible:
+            key = (spec.popularity, spec.capture_risk)
+            merged[key] = merged.get(key, 0.0) + self.chance * spec.weight / total
+        return [(p, popularity, risk) for (popularity, risk), p in sorted(merged.items())]
+
+
+class EventTable:
+    """The breaking_news and skip_news sections of an event table"""
+
+    def __init__(self, breaking_news, skip_news, name="custom"):
+        self.breaking_news = breaking_news
+        self.skip_news = skip_news
+        self.name = name
+
+    def __repr__(self):
+        return "EventTable(%r)" % self.name
+
+
+def _spec(entry):
+    if not isinstance(entry, dict) or not isinstance(entry.get("text"), str):
+        raise EventTableError("every event needs a \"text\" string: %r" % (entry,))
+    unknown = set(entry) - set(EventSpec._fields)
+    if unknown:
+        raise EventTableError("unknown event field(s) %s" % ", ".join(sorted(unknown)))
+    weight = entry.get("weight", 1)
+    if not isinstance(weight, (int, float)) or isinstance(weight, bool):
+        raise EventTableError("event weight must be a number")
+    for field in EventSpec._fields[2:]:
+        value = entry.get(field)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise EventTableError("event field %r must be a whole number" % field)
+    if weight < 0:
+        raise EventTableError("event weights can't be negative")
+    return EventSpec(**entry)
+
+
+def from_dict(data, name="custom"):
+    """Build an EventTable from the parsed JSON form"""
+    sections = []
+    for section in SECTIONS:
+        body = data.get(section, {})
+        chance = body.get("chance", 0.0)
+        if not isinstance(chance, (int, float)):
+            raise EventTableError("%s chance must be a number" % section)
+        sections.append(EventSection(float(chance), [_spec(e) for e in body.get("events", [])]))
+    return EventTable(*sections, name=name)
+
+
+# The original game's events and effects, quirks included
+LEGACY = EventTable(
+    EventSection(0.2, [
+        EventSpec("Your online following has grown significantly! (+20 Popularity)", 1, 20, -13),
+        EventSpec("Police almost caught a lead! (-10 Capture Risk)"),
+        EventSpec("A famous celebrity praised your actions! (+20 Popularity)", 1, 20, -13),
+        EventSpec("A rival detective agency takes over the case! (+15 Capture Risk)"),
+    ]),
+    EventSection(0.15, [
+        EventSpec("The Judge seems to have gone quiet..."),
+        EventSpec("Is The Judge done? Internet debates intensify."),
+        EventSpec("Police celebrate what they think is a victory."),
+    ]),
+    name="legacy",
+)
+
+
+def load(source=None):
+    """An EventTable from a JSON file, "legacy" for LEGACY, or the shipped table"""
+    if source == "legacy":
+        return LEGACY
+    path = source or DATA_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError as error:
+        raise EventTableError("%s is not valid JSON: %s" % (path, error)) from error
+    if not isinstance(data, dict):
+        raise EventTableError("%s must hold a JSON object" % path)
+    return from_dict(data, name="default" if source is None else path)
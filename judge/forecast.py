@@ -0,0 +1,155 @@
+"""
+Exact outcome forecasts for THE JUDGE's moves.
+
+forecast(state, action) works out, without sampling, what one move does to
+the stats: the probability of being arrested on the spot, and the joint
+distribution of capture risk and popularity the next turn starts with. It
+enumerates every roll the game's rules make - calculate_capture_risk's
+capture roll plus the danger and detective bonus, the popularity roll,
+calculate_detective_kill_risk when the detective dies too, popularity
+protection, the 0/100 clamping and the random event table - in the order
+engine.step applies them.
+
+A move's forecast depends only on (danger, has detective, kill the detective,
+capture risk, popularity, detectives killed), plus the turn for event tables
+with conditions and the Ruleset, so results are memoized on exactly that:
+after warm-up the forecast panel of a turn screen is a handful of dictionary
+lookups, shared by every game playing the same rules.
+
+The distributions of the individual rolls are shared with judge.solve.
+"""
+
+import functools
+from collections import namedtuple
+
+from judge import engine
+from judge.engine import SKIP_INDEX
+from judge.rules import CLASSIC, derived
+
+CACHE_SIZE = 1 << 16  # memoized forecasts per kind of move
+
+
+def convolve(a, b):
+    """Distribution of the sum of two independent {value: probability} rolls"""
+    out = {}
+    for x, p in a.items():
+        for y, q in b.items():
+            out[x + y] = out.get(x + y, 0.0) + p * q
+    return out
+
+
+def detective_kill_distribution(killed_after, rules=CLASSIC):
+    """{change: probability} of calculate_detective_kill_risk(killed_after)"""
+    first, later = derived(rules).detective_kill
+    return first if killed_after == 0 else later
+
+
+CAPTURE_RANDOM = derived(CLASSIC).capture_roll
+POPULARITY_RANDOM = derived(CLASSIC).popularity_roll
+
+# arrest: probability of being arrested by the move
+# outcomes: ((capture risk, popularity), probability) of the next turn's stats
+# capture_risk, popularity: (value, probability) marginals of outcomes
+# Outcome probabilities add up to 1 - arrest.
+Forecast = namedtuple("Forecast", ["arrest", "outcomes", "capture_risk", "popularity"])
+
+
+def _news(section, turn, after, landed):
+    """Fold a section's random events into {(risk, popularity): p}"""
+    for (risk, popularity), p in landed.items():
+        if section.conditional:
+            outcomes = section.outcomes_at(turn, popularity, risk)
+        else:
+            outcomes = section.outcomes()
+        quiet = 1.0
+        for q, d_popularity, d_risk in outcomes:
+            quiet -= q
+            key = (max(0, min(100, risk + d_risk)), max(0, min(100, popularity + d_popularity)))
+            after[key] = after.get(key, 0.0) + p * q
+        if quiet > 0.0:
+            after[(risk, popularity)] = after.get((risk, popularity), 0.0) + p * quiet
+    return after
+
+
+def _forecast(arrest, after):
+    risk, popularity = {}, {}
+    for (r, pop), p in after.items():
+        risk[r] = risk.get(r, 0.0) + p
+        popularity[pop] = popularity.get(pop, 0.0) + p
+    return Forecast(arrest, tuple(sorted(after.items())), tuple(sorted(risk.items())),
+                    tuple(sorted(popularity.items())))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _execute(danger, has_detective, kill, capture_risk, popularity, killed_detectives, table, turn,
+             rolls):
+    rules = rolls.rules
+    base = danger * rules.danger_capture_risk + (rules.detective_capture_risk if has_detective else 0)
+    risk_change = {base + change: p for change, p in rolls.capture_roll.items()}
+    if kill:
+        risk_change = convolve(detective_kill_distribution(killed_detectives + 1, rules), risk_change)
+    threshold, bonus = rules.popularity_protection_threshold, rules.popularity_protection_bonus
+    arrest = 0.0
+    landed = {}
+    for d_risk, p in risk_change.items():
+        for d_popularity, q in rolls.popularity_roll.items():
+            pop = popularity + danger * rules.danger_popularity + d_popularity
+            risk = capture_risk + d_risk
+            if pop >= threshold:
+                risk = max(0, risk - bonus)
+            pop = min(100, pop)
+            risk = max(0, min(100, risk))
+            if risk >= 100:
+                arrest += p * q
+            else:
+                landed[(risk, pop)] = landed.get((risk, pop), 0.0) + p * q
+    return _forecast(arrest, _news(table.breaking_news, turn, {}, landed))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _skip(capture_risk, popularity, table, turn, rolls):
+    rules = rolls.rules
+    landed = {(max(0, capture_risk - rules.capture_risk_skip_reduction),
+               max(0, popularity - rules.popularity_skip_penalty)): 1.0}
+    return _forecast(0.0, _news(table.skip_news, turn, {}, landed))
+
+
+def forecast(state, action, table=None):
+    """The Forecast of taking `action` in `state` (under `table`, the rules' table by default)"""
+    rolls = derived(state.rules)  # one per ruleset, so a cheap key for it
+    table = table or rolls.events or engine.EVENTS
+    if action.index == SKIP_INDEX:
+        turn = state.turn if table.skip_news.conditional else None
+        return _skip(state.capture_risk, state.popularity, table, turn, rolls)
+    criminal = state.current_criminals[action.index]
+    turn = state.turn if table.breaking_news.conditional else None
+    return _execute(criminal.danger_level, criminal.detective_in_charge is not None,
+                    bool(action.kill_detective), state.capture_risk, state.popularity,
+                    state.killed_detectives, table, turn, rolls)
+
+
+def forecasts(state, table=None):
+    """[(action, Forecast)] for every legal action in `state`"""
+    return [(action, forecast(state, action, table)) for action in engine.legal_actions(state)]
+
+
+def mean(distribution):
+    """Mean of a (value, probability) marginal, given the move was survived"""
+    total = sum(p for _, p in distribution)
+    return sum(value * p for value, p in distribution) / total if total else 0.0
+
+
+def quantile(distribution, fraction):
+    """Smallest value with at least `fraction` of the (survived) probability at or below it"""
+    total = sum(p for _, p in distribution)
+    seen = 0.0
+    for value, p in distribution:
+        seen += p
+        if seen >= fraction * total - 1e-12:
+            return value
+    return distribution[-1][0] if distribution else 0
+
+
+def clear_cache():
+    _execute.cache_clear()
+    _skip.cache_clear()
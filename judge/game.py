@@ -0,0 +1,454 @@
+"""
+Story and prompts of THE JUDGE, independent of how they reach the player.
+
+Game narrates a session over the rules in judge.engine. Its display methods
+are generators: instead of printing, sleeping and calling input() they yield
+Write, Pause and Prompt operations (see judge.render) and receive the
+player's replies, and a driver decides what to do with them. `Game.play()`
+shows a session with one of the judge.render backends; judge.server drives
+the same session over a network connection without blocking.
+
+The forecast panel, hints and save files are imported the first time a
+game uses them, so starting a game that doesn't pays nothing for them.
+"""
+
+import random
+
+from judge import engine
+from judge.engine import Action, SKIP_TURN
+from judge.rules import CLASSIC
+from judge.render import Write, Pause, Prompt, line, AnimatedRenderer
+
+
+def forecast_text(outcome):
+    """One line of the forecast panel: arrest odds, then risk and popularity if you get away"""
+    from judge.forecast import mean, quantile
+
+    parts = []
+    if outcome.arrest:
+        parts.append("<1% arrest" if outcome.arrest < 0.005 else f"{outcome.arrest:.0%} arrest")
+    for name, distribution in (("risk", outcome.capture_risk), ("popularity", outcome.popularity)):
+        if distribution:
+            parts.append(f"{name} {mean(distribution):.0f}% "
+                         f"({quantile(distribution, 0.05)}-{quantile(distribution, 0.95)})")
+    return " · ".join(parts)
+
+
+def _state_field(name):
+    """Read-only view of one field of the game's engine state"""
+    return property(lambda self: getattr(self.state, name))
+
+
+class Game:
+    """One player's session over the headless rules in judge.engine"""
+
+    turn = _state_field("turn")
+    effectiveness = _state_field("effectiveness")  # How successful your kills are
+    popularity = _state_field("popularity")    # Online popularity (0-100)
+    capture_risk = _state_field("capture_risk")  # Police likelihood to catch you (0-100)
+    killed_detectives = _state_field("killed_detectives")
+    current_criminals = _state_field("current_criminals")
+    game_over = _state_field("game_over")
+    won = _state_field("won")
+    executed_names = _state_field("executed_names")  # All executed names (criminals + detectives)
+    turns_with_high_popularity = _state_field("turns_with_high_popularity")
+    skips_remaining = _state_field("skips_remaining")  # Number of skips left
+    headline = _state_field("headline")  # News headline shown this turn
+    rules = _state_field("rules")  # judge.rules.Ruleset the game plays by
+
+    def __init__(self, rng=random, state=None, mode=None, rules=CLASSIC):
+        self.rng = rng
+        self.mode = mode  # judge.endless.Endless for endless games; None for the rules' turns
+        # A restored state brings its own rules
+        self.state = engine.new_game(rng, mode, rules) if state is None else state
+        self.quiet = False  # only ask, don't narrate (for renderers that show nothing)
+        self.panels = False  # leave the turn screen to the renderer (see judge.screen)
+        self.log = None  # judge.snapshot.ActionLog recording every decision
+        self.save_path = None  # snapshot file rewritten after every decision
+        self.telemetry = None  # judge.telemetry.TelemetryWriter for per-turn rows
+        self.leaderboard = None  # judge.leaderboard.LeaderboardWriter the finished game goes to
+        self.player = None  # name the game is recorded under on the leaderboard
+        self.broadcast = None  # judge.broadcast.Broadcast the game's turns are published to
+        self.event_table = None  # judge.events.EventTable; None for the rules' table
+        self.advisor = None  # judge.advisor.Advisor; answers 'h' at the prompts when set
+        self.show_forecast = False  # list each move's exact outcome odds under its target
+
+    def type_text(self, text, delay=0.02):
+        """Typewriter effect for dramatic text"""
+        yield Write(text, delay)
+        yield line()
+
+    def slow_print(self, text, delay=0.03):
+        """Slower typewriter for important messages"""
+        yield Write(text, delay)
+        yield line()
+
+    def display_intro(self):
+        """Display game introduction"""
+        yield line("\n" + "="*60)
+        yield line("                    THE JUDGE")
+        yield line("="*60)
+        yield line()
+        yield from self.type_text("You are The Judge.")
+        yield Pause(0.5)
+        yield from self.type_text("An ordinary person who stumbled upon something extraordinary...")
+        yield Pause(0.5)
+        yield from self.type_text("A notebook that kills.")
+        yield Pause(0.5)
+        yield from self.slow_print("\nThe NOTEBOOK OF DEATH.")
+        yield Pause(0.5)
+        yield from self.type_text("\nAnyone whose name is written in this notebook dies of a heart attack.")
+        yield from self.type_text("You are the judge, jury, and executioner.")
+        yield from self.type_text("Only YOU can decide who deserves to die.")
+        yield line()
+        yield line("-" * 60)
+        yield from self.slow_print("RULES:")
+        yield from self.type_text("• Write a criminal's name to execute them")
+        yield from self.type_text("• Each turn, choose who to judge (or skip)")
+        yield from self.type_text("• Higher profile criminals = more risk, more reward")
+        yield from self.type_text("• Killing detectives has varying consequences")
+        yield from self.type_text("• If capture risk reaches 100%, you're caught")
+        yield from self.type_text(f"• You can skip up to {self.rules.max_skips} turns to reduce capture risk")
+        yield from self.type_text(f"• Survive {self.rules.max_turns} turns to win")
+        yield line("-" * 60)
+        yield line()
+        yield Prompt("Press Enter to begin your reign of justice...")
+        yield line()
+
+    def turn_title(self):
+        """TURN 3 OF 20, or just TURN 3 in a game without a last turn"""
+        max_turns = self.rules.max_turns if self.mode is None else self.mode.max_turns
+        if max_turns is None:
+            return f"TURN {self.turn}"
+        return f"TURN {self.turn} OF {max_turns}"
+
+    def opinion_bar(self):
+        """The public opinion bar - 4 levels now"""
+        if self.popularity < 30:
+            return "[██░░░░░░░░░░░░░░░░░░░░░] People debate your existence"
+        elif self.popularity < 50:
+            return "[██████████░░░░░░░░░░░░░░] Some see you as a necessary evil"
+        elif self.popularity < 70:
+            return "[██████████████░░░░░░░░░░] People debate if you're hero or villain"
+        elif self.popularity < 90:
+            return "[████████████████████░░░░] People describe you as an invisible hero"
+        else:
+            return "[████████████████████] People worship you as a god!"
+
+    def risk_warning(self):
+        """The capture risk warning and skip info, () while the risk stays hidden"""
+        if engine.can_skip(self.state):
+            return (f"⚠️  HIGH CAPTURE RISK: {self.capture_risk}%!",
+                    f"You can skip this turn ({self.skips_remaining} skips remaining)")
+        elif self.skips_remaining == 0:
+            return (f"⚠️  CAPTURE RISK: {self.capture_risk}%",
+                    "Your ego won't let you skip anymore...")
+        return ()
+
+    def detective_text(self, criminal):
+        """What a target card says about the detective on the case"""
+        if self.killed_detectives >= self.rules.detective_names_hidden_threshold:
+            return "Detective: [REDACTED - Investigation sealed]"
+        elif criminal.detective_in_charge and criminal.detective_in_charge not in self.executed_names:
+            return f"Detective: {criminal.detective_in_charge}"
+        elif criminal.detective_in_charge and criminal.detective_in_charge in self.executed_names:
+            return "Detective: [ELIMINATED]"
+        else:
+            return "Detective: No official assignment"
+
+    def display_turn(self):
+        """Display current turn information"""
+        yield line("\n" + "="*60)
+        yield line(f"                    {self.turn_title()}")
+        yield line("="*60)
+
+        # Show world status
+        yield line(f"\n🌐 ONLINE PUBLIC OPINION:")
+        yield line(f"   {self.opinion_bar()}")
+
+        # Show capture risk and skip info
+        warning = self.risk_warning()
+        if warning:
+            yield line(f"\n{warning[0]}")
+            yield line(f"   {warning[1]}")
+
+        yield line(f"\n📺 NEWS HEADLINE:")
+        yield line(f"   \"{self.headline}\"")
+
+        yield line("\n" + "-"*60)
+        yield from self.slow_print("TODAY'S TARGETS:")
+        yield line("-"*60)
+
+        for i, criminal in enumerate(self.current_criminals, 1):
+            yield line(f"\n  [{i}] {criminal.name}")
+            yield line(f"      Crime: {criminal.crime}")
+            yield line(f"      Danger Level: {'★' * criminal.danger_level}{'☆' * (10 - criminal.danger_level)}")
+            yield line(f"      {self.detective_text(criminal)}")
+            if self.show_forecast:
+                yield from self.display_forecast(i - 1)
+
+        if self.show_forecast and engine.can_skip(self.state):
+            yield from self.display_skip_forecast()
+
+    def display_skip_forecast(self):
+        """The forecast panel of laying low"""
+        from judge.forecast import forecast
+
+        yield line("\n  [s] Lay low")
+        yield line(f"      {forecast_text(forecast(self.state, SKIP_TURN, self.event_table))}")
+
+    def display_forecast(self, criminal_index):
+        """The forecast panel of one target"""
+        from judge.forecast import forecast
+
+        spare = forecast(self.state, Action(criminal_index, False), self.event_table)
+        yield line(f"      Forecast: {forecast_text(spare)}")
+        if engine.can_kill_detective(self.state, criminal_index):
+            kill = forecast(self.state, Action(criminal_index, True), self.event_table)
+            yield line(f"      With the detective: {forecast_text(kill)}")
+
+    def apply(self, action):
+        """Advance the engine by one decision and show what happened"""
+        before = self.state
+        self.state, events = engine.step(before, action, self.rng, self.event_table, mode=self.mode)
+        self.record(before, action, events)
+        if self.quiet:
+            return
+        for event in events:
+            yield from self.render_event(event)
+
+    def record(self, before, action, events):
+        """Log the decision, checkpoint the save file, emit telemetry, broadcast it and post the score, if asked to"""
+        if self.telemetry is not None:
+            self.telemetry.record(0, before, action, self.state, events)
+        if self.broadcast is not None:
+            self.broadcast.step(before, action, events, self.state)
+        if self.leaderboard is not None and self.game_over:
+            self.leaderboard.record_state(self.state, self.player)
+        if self.log is not None:
+            self.log.append(action)
+            if self.game_over:
+                self.log.finish(self.state, self.rng)
+                self.log = None
+        if self.save_path:
+            from judge import snapshot
+
+            snapshot.save(self.save_path, self.state, self.rng)
+
+    def render_event(self, event):
+        """Narrate one engine event the way the game always has"""
+        kind, payload = event
+        if kind == engine.CRIMINAL_KILLED:
+            yield from self.slow_print(f"\n{payload.name} clutches their chest...")
+            yield from self.slow_print(f"Collapses...")
+            yield from self.slow_print("Heart attack. Dead.")
+        elif kind == engine.DETECTIVE_KILLED:
+            detective, net_risk_change = payload
+            yield line()
+            yield from self.slow_print(f"You write {detective}'s name in the notebook...")
+            yield Pause(1)
+            yield from self.slow_print("...")
+            yield Pause(1)
+            yield from self.slow_print(f"{detective} clutches their chest and collapses!")
+            # Show the NET capture risk change (detective + criminal combined)
+            if net_risk_change < 0:
+                yield line(f"\n✅  The police haven't made the connection yet!")
+                yield line(f"   Net capture risk changed by {net_risk_change}%")
+            else:
+                yield line(f"\n⚠️  WARNING! The investigation is getting closer!")
+                yield line(f"   Net capture risk increased by {net_risk_change}%!")
+        elif kind == engine.PROTECTION:
+            yield line(f"\n🛡️  PUBLIC SUPPORT IS PROTECTING YOU!")
+            yield line(f"   Police sympathy lowers capture risk by {payload}%")
+        elif kind == engine.STATS:
+            criminal, capture_increase = payload
+            rules = self.rules
+            yield line(f"\n✓ Effectiveness +{criminal.danger_level * rules.danger_effectiveness}")
+            yield line(f"✓ Popularity +{criminal.danger_level * rules.danger_popularity + sum(rules.popularity_roll) // 2}")
+            if capture_increase is not None:
+                yield line(f"⚠ Capture Risk +{capture_increase}%")
+        elif kind == engine.BREAKING_NEWS:
+            yield line("\n📺 BREAKING NEWS:")
+            yield from self.type_text(f"  {payload}")
+        elif kind == engine.SKIP:
+            yield line(f"\n✓ You laid low - Capture Risk -{self.rules.capture_risk_skip_reduction}%")
+            yield line(f"✓ Public interest wanes - Popularity -{self.rules.popularity_skip_penalty}%")
+            yield line(f"   ({payload} skips remaining)")
+        elif kind == engine.SKIP_NEWS:
+            yield line("\n📺 NEWS:")
+            yield from self.type_text(f"  {payload}")
+
+    def hint(self, criminal_index=None):
+        """Show the advisor's ranking of the moves open right now"""
+        from judge.advisor import describe
+
+        advice = self.advisor.advise(self.state, criminal_index)
+        yield line(f"\n🔮 The notebook weighs {self.advisor.iterations} futures...")
+        for rank, (action, win_probability, _) in enumerate(advice[:4], 1):
+            yield line(f"   {rank}. {describe(action):<36} {win_probability:.0%} survive")
+
+    def skip_turn(self):
+        """Skip the current turn to reduce capture risk"""
+        if not self.quiet:
+            yield line()
+            yield from self.slow_print("You choose to lay low this turn...")
+            yield Pause(0.5)
+            yield from self.slow_print("The notebook remains in your pocket.")
+        yield from self.apply(SKIP_TURN)
+
+    def execute(self, criminal_index):
+        """Execute the chosen criminal"""
+        criminal = self.current_criminals[criminal_index]
+
+        if not self.quiet:
+            yield line()
+            yield from self.slow_print(f"You write {criminal.name}'s name in the notebook...")
+            yield Pause(1)
+            yield from self.slow_print("...")
+            yield Pause(1)
+
+        # Check if detective will be targeted (only if not already hidden)
+        kill_detective = False
+        if engine.can_kill_detective(self.state, criminal_index):
+            if not self.quiet:
+                yield line()
+                yield from self.type_text(f"The detective assigned to {criminal.name}'s case is:")
+                yield line(f"  → {criminal.detective_in_charge}")
+            answer = yield Prompt("\nKill the detective too? (y/n): ")
+            while self.advisor is not None and answer.strip().lower() == 'h':
+                yield from self.hint(criminal_index)
+                answer = yield Prompt("\nKill the detective too? (y/n): ")
+            kill_detective = answer.strip().lower() == 'y'
+
+        yield from self.apply(Action(criminal_index, kill_detective))
+
+    def display_game_over(self):
+        """Display game over screen"""
+        yield line("\n" + "="*60)
+        if self.won:
+            yield line("                    VICTORY!")
+            yield line("="*60)
+            yield from self.slow_print("\nThe world has fallen silent.")
+            yield Pause(1)
+            yield from self.slow_print("No more mysterious deaths...")
+            yield Pause(1)
+            yield from self.slow_print("No more criminals dying of 'heart attacks'...")
+            yield Pause(1)
+            yield line()
+            yield from self.slow_print("The police have given up.")
+            yield from self.slow_print("The investigations have been closed.")
+            yield from self.slow_print("The world moves on, never knowing the truth...")
+            yield line()
+            yield from self.slow_print("But The Judge is still out there.")
+            yield from self.slow_print("Watching.")
+            yield from self.slow_print("Waiting.")
+            yield line()
+            yield line("="*60)
+            yield from self.slow_print(f"YOU SURVIVED {self.turn - 1} TURNS!")
+            yield line("The police could NOT stop The Judge.")
+            yield line("  [BEST ENDING]")
+            yield line("="*60)
+        else:
+            yield line("                    GAME OVER")
+            yield line("="*60)
+            yield from self.slow_print("\n🚨 POLICE HAVE ARRESTED YOU! 🚨")
+            yield line()
+            yield from self.type_text("They found the notebook.")
+            yield from self.type_text("They found your notes.")
+            yield from self.type_text("It's over.")
+            yield line()
+            yield line("-"*60)
+            yield from self.slow_print("FINAL STATS:")
+            yield line("-"*60)
+            yield line(f"  Turns Survived: {self.turn - 1}")
+            yield line(f"  Effectiveness Score: {self.effectiveness}")
+            yield line(f"  Final Popularity: {self.popularity}%")
+            yield line(f"  Criminals Executed: {engine.criminals_executed(self.state)}")
+            yield line(f"  Detectives Eliminated: {self.killed_detectives}")
+            yield line(f"  Skips Used: {engine.skips_used(self.state)}")
+            yield line("-"*60)
+
+            yield line("\n" + "="*60)
+            if self.popularity < 30:
+                yield from self.slow_print("\nTHE WORLD'S FINAL VERDICT:")
+                yield line("\" The monster is finally caught!")
+                yield line("  The 'Judge' was just another madman.")
+                yield line("  Justice has been served by the real courts.\"")
+                yield line()
+                yield line("  [WORST ENDING]")
+            elif self.popularity < 70:
+                yield from self.slow_print("\nTHE WORLD'S FINAL VERDICT:")
+                yield line("\" The Judge is gone, but the debate continues.")
+                yield line("  Was he a hero or a villain?")
+                yield line("  Perhaps we'll never know...\"")
+                yield line()
+                yield line("  [BAD ENDING]")
+            else:
+                yield from self.slow_print("\nTHE WORLD'S FINAL VERDICT:")
+                yield line("\" The Judge has vanished!")
+                yield line("  Is he dead? In hiding? A god ascended to heaven?")
+                yield line("  The world mourns their guardian angel.\"")
+                yield line("  Flowers and candles appear at monuments worldwide.")
+                yield line()
+                yield line("  [GOOD ENDING]")
+            yield line("="*60)
+
+    def session(self, intro=True):
+        """The whole game: intro, turns until it ends, then the game over screen"""
+        if intro and not self.quiet:
+            yield from self.display_intro()
+
+        while not self.game_over:
+            if not self.quiet:
+                if not self.panels:
+                    yield from self.display_turn()
+                if self.advisor is not None:
+                    yield line("   (Type 'h' for a hint from the notebook.)")
+
+            valid_choice = False
+            while not valid_choice:
+                try:
+                    # Show skip option if capture risk is high and skips remain
+                    if engine.can_skip(self.state):
+                        choice = (yield Prompt(f"\nWho will you judge? (Enter number, 's' to skip [{self.skips_remaining} left], or 'q' to quit): ")).strip().lower()
+                    else:
+                        choice = (yield Prompt("\nWho will you judge? (Enter number or 'q' to quit): ")).strip()
+
+                    if choice.lower() == 'q':
+                        yield line("\nYou put away the notebook... for now.")
+                        return
+
+                    if choice.lower() == 'h' and self.advisor is not None:
+                        yield from self.hint()
+                        continue
+
+                    # Handle skip turn
+                    if choice.lower() == 's' and engine.can_skip(self.state):
+                        valid_choice = True
+                        yield from self.skip_turn()
+                        continue
+                    elif choice.lower() == 's' and self.skips_remaining == 0:
+                        yield line(f"Your ego won't let you skip anymore! You've used all {self.rules.max_skips} skips.")
+                        continue
+                    elif choice.lower() == 's' and self.capture_risk < self.rules.capture_risk_skip_threshold:
+                        yield line(f"You can't skip yet. Capture risk is below {self.rules.capture_risk_skip_threshold}%.")
+                        continue
+
+                    choice_num = int(choice) - 1
+                    if 0 <= choice_num < len(self.current_criminals):
+                        valid_choice = True
+                        yield from self.execute(choice_num)
+                    else:
+                        yield line("Invalid choice. Please enter a valid number.")
+                except ValueError:
+                    yield line("Please enter a number.")
+
+        if not self.quiet:
+            yield from self.display_game_over()
+
+    def play(self, renderer=None, intro=True):
+        """Main game loop, shown with `renderer` (the terminal typewriter by default)"""
+        renderer = renderer or AnimatedRenderer()
+        self.quiet = renderer.quiet
+        self.panels = renderer.panels
+        renderer.run(self.session(intro))
@@ -0,0 +1,262 @@
+"""
+Opt-in phase timing and profiling for THE JUDGE.
+
+Nothing here runs unless it is switched on, with a command line flag
+(--profile SPEC on The-Judge.py, judge.simulate and judge.server) or the
+JUDGE_PROFILE environment variable. Switching it on wraps the game's phases
+in place:
+
+    game.play                 Game.play, the whole session
+    game.display_turn         drawing the turn screen
+    game.execute              an execution, from the prompt to the rules
+    game.skip_turn            laying low
+    engine.step               rule evaluation of one decision
+    engine.generate_criminals drawing a turn's targets
+    engine.generate_news_headline
+    render.write / render.type_text / render.pause / render.ask
+                              the renderer showing text, pausing and waiting
+                              for the player
+
+Switched off, no wrapper exists, so the game runs exactly the code it runs
+without this module. Switched on, each phase costs two perf_counter_ns()
+calls and a few list operations.
+
+Game phases are generators; only the time spent inside them counts (not
+the time the renderer or the player takes in between). Phases nest, so each
+has an inclusive time (in the summary) and a self time (in folded stacks).
+
+SPEC is a comma separated list of outputs, written when the process exits:
+
+    summary          a table of counts, totals and a latency histogram on stderr
+                     ("1" or "on" mean the same)
+    folded:FILE      phase stacks with their self time in microseconds, one
+                     "a;b;c 1234" line per stack (flamegraph.pl, speedscope)
+    cprofile:FILE    a cProfile of the whole run (pstats, snakeviz)
+
+Usage:
+    JUDGE_PROFILE=summary python The-Judge.py --instant
+    python -m judge.simulate --games 20000 --profile summary,folded:judge.folded
+"""
+
+import atexit
+import functools
+import os
+import sys
+import time
+
+ENV_VAR = "JUDGE_PROFILE"
+BUCKETS = 40  # log2 nanosecond buckets: the last one holds ~9 minutes and up
+
+_clock = time.perf_counter_ns
+_enabled = False
+_stats = {}  # phase -> PhaseStats
+_stack = []  # [phase, start, time in child phases]
+_folded = {}  # "a;b;c" -> self nanoseconds
+_profiler = None
+
+
+class PhaseStats:
+    """Count, total, extremes and a log2 histogram of one phase's durations"""
+
+    __slots__ = ("count", "total", "low", "high", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.low = None
+        self.high = 0
+        self.histogram = [0] * BUCKETS
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if self.low is None or elapsed < self.low:
+            self.low = elapsed
+        if elapsed > self.high:
+            self.high = elapsed
+        self.histogram[min(elapsed.bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of durations, in ns"""
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= wanted:
+                return min(1 << bucket, self.high)
+        return self.high
+
+
+def _enter(phase):
+    _stack.append([phase, _clock(), 0])
+
+
+def _record(phase, elapsed):
+    stats = _stats.get(phase)
+    if stats is None:
+        stats = _stats[phase] = PhaseStats()
+    stats.add(elapsed)
+
+
+def _leave(record=True):
+    """Close the innermost phase; returns its duration"""
+    phase, start, children = _stack.pop()
+    elapsed = _clock() - start
+    if record:
+        _record(phase, elapsed)
+    path = ";".join([frame[0] for frame in _stack] + [phase])
+    _folded[path] = _folded.get(path, 0) + elapsed - children
+    if _stack:
+        _stack[-1][2] += elapsed
+    return elapsed
+
+
+def timed(phase, function):
+    """Wrap a plain function so every call is counted as `phase`"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        _enter(phase)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _leave()
+    wrapper.__wrapped_phase__ = function
+    return wrapper
+
+
+def timed_generator(phase, function):
+    """Wrap a generator function; only time spent inside it counts as `phase`
+
+    Each run of the generator is one call, however many times it yields.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        inner = function(*args, **kwargs)
+        send = inner.send
+        reply = None
+        total = 0
+        while True:
+            _enter(phase)
+            try:
+                op = send(reply)
+            except StopIteration as stop:
+                total += _leave(False)
+                _record(phase, total)
+                return stop.value
+            except BaseException:
+                _leave()
+                raise
+            total += _leave(False)
+            try:
+                reply = yield op
+            except GeneratorExit:
+                inner.close()
+                raise
+    wrapper.__wrapped_phase__ = function
+    return wrapper
+
+
+def _wrap(owner, name, phase, wrapper=timed):
+    function = owner.__dict__.get(name) if isinstance(owner, type) else getattr(owner, name)
+    if function is None or hasattr(function, "__wrapped_phase__"):
+        return
+    setattr(owner, name, wrapper(phase, function))
+
+
+def _instrument():
+    from judge import engine, render
+    from judge.game import Game
+
+    _wrap(engine, "step", "engine.step")
+    _wrap(engine, "generate_criminals", "engine.generate_criminals")
+    _wrap(engine, "generate_news_headline", "engine.generate_news_headline")
+    _wrap(Game, "play", "game.play")
+    for name in ("display_turn", "execute", "skip_turn"):
+        _wrap(Game, name, "game." + name, timed_generator)
+    for cls in (render.Renderer, render.InstantRenderer, render.AnimatedRenderer,
+                render.TranscriptRenderer):
+        for name in ("write", "type_text", "pause", "ask"):
+            _wrap(cls, name, "render." + name)
+
+
+def enabled():
+    return _enabled
+
+
+def configure(spec=None):
+    """Switch instrumentation on for `spec` (or $JUDGE_PROFILE); returns whether it is on.
+
+    Raises ValueError for an output it doesn't know.
+    """
+    global _enabled, _profiler
+    spec = spec if spec is not None else os.environ.get(ENV_VAR, "")
+    outputs = [part.strip() for part in spec.split(",") if part.strip()]
+    if not outputs or outputs == ["0"] or outputs == ["off"]:
+        return _enabled
+    summary, folded, cprofile = False, None, None
+    for output in outputs:
+        kind, _, path = output.partition(":")
+        if kind in ("summary", "1", "on") and not path:
+            summary = True
+        elif kind == "folded" and path:
+            folded = path
+        elif kind == "cprofile" and path:
+            cprofile = path
+        else:
+            raise ValueError("unknown profile output %r (use summary, folded:FILE or cprofile:FILE)"
+                             % output)
+    if _enabled:
+        return True
+    _enabled = True
+    _instrument()
+    if cprofile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(_finish, summary, folded, cprofile)
+    return True
+
+
+def reset():
+    """Forget everything counted so far"""
+    _stats.clear()
+    _folded.clear()
+
+
+def _format_ns(ns):
+    for unit, size in (("s", 10 ** 9), ("ms", 10 ** 6), ("us", 10 ** 3)):
+        if ns >= size:
+            return "%.1f%s" % (ns / size, unit)
+    return "%dns" % ns
+
+
+def summary():
+    """The phase table as text"""
+    lines = ["%-30s %9s %10s %9s %9s %9s %9s" % ("phase", "calls", "total", "mean", "p50", "p99", "max")]
+    for phase, stats in sorted(_stats.items(), key=lambda item: -item[1].total):
+        lines.append("%-30s %9d %10s %9s %9s %9s %9s" % (
+            phase, stats.count, _format_ns(stats.total), _format_ns(stats.total // stats.count),
+            _format_ns(stats.percentile(0.5)), _format_ns(stats.percentile(0.99)),
+            _format_ns(stats.high)))
+    return "\n".join(lines)
+
+
+def write_folded(path):
+    """Write phase stacks in the collapsed format flame graph tools read"""
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, ns in sorted(_folded.items()):
+            micros = ns // 1000
+            if micros:
+                f.write("%s %d\n" % (stack, micros))
+
+
+def _finish(show_summary, folded, cprofile):
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(cprofile)
+        sys.stderr.write("cProfile written to %s\n" % cprofile)
+    if folded:
+        write_folded(folded)
+        sys.stderr.write("Folded phase stacks written to %s\n" % folded)
+    if show_summary and _stats:
+        sys.stderr.write("\n" + summary() + "\n")
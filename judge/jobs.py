@@ -0,0 +1,413 @@
+"""
+Resumable simulation jobs for THE JUDGE, queued in a SQLite file.
+
+A job is a judge.simulate run over one or more rulesets ("variants"): the
+same policy, seed and game count for each, split into the same shards
+simulate would play. `create` writes every (variant, shard) into the job
+file; `work` starts worker processes that claim shards one at a time, play
+them and write their results back. Any number of workers may work on a job
+at once - several `work` commands on one machine, or on several machines
+sharing the file - and all they share is that file.
+
+A worker claims a shard with a single UPDATE, which also gives it a lease
+of LEASE_SECONDS. Every CHECKPOINT_SECONDS it checkpoints in one
+transaction: the shard's games played and random state, a renewed lease,
+and the games since the last checkpoint added to its variant's running
+totals (games, wins, endings, turns survived and detectives killed, with
+their squares). The totals are therefore always exactly the checkpointed
+games, and `status` can report them while the job runs. A worker stopped
+with Ctrl-C checkpoints and gives its shard back; one that is killed loses
+at most a checkpoint's worth of games, and its shard is picked up where the
+checkpoint left it once the lease runs out. A worker whose lease was taken
+over finds out at its next checkpoint and drops what it played since.
+
+Shards draw from judge.simulate's streams and resumed shards carry on from
+their saved random state, so a job's results depend only on its seed, game
+count and shard size - not on the workers, nor on how often it was
+interrupted - and match `judge.simulate` for each ruleset. Every variant
+plays the same streams.
+
+Workers touch the file once per claim and checkpoint, a few times a minute
+each, so they hardly ever wait on each other and adding workers adds games
+per second; `work` reports the share of its time spent on the queue. The
+file uses SQLite's rollback journal rather than WAL, which needs shared
+memory and so only works on one machine. Workers on several machines need a
+filesystem with working locks and clocks that roughly agree (leases are
+wall-clock times).
+
+Usage:
+    python -m judge.jobs create sweep.db --games 10000000 --policy cautious --rules easy --rules hard
+    python -m judge.jobs work sweep.db --workers 8
+    python -m judge.jobs status sweep.db
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from judge import engine
+from judge import events as event_tables
+from judge import rules as rulesets
+from judge.policies import POLICIES, get_policy
+from judge.simulate import DEFAULT_SHARD_SIZE, SimulationStats, play_game, shard_plan, shard_rng
+
+LEASE_SECONDS = 60.0  # a claimed shard goes back to the queue this long after its last checkpoint
+CHECKPOINT_SECONDS = 5.0  # how often workers write their progress
+CHECK_EVERY = 64  # games between looks at the clock
+BUSY_TIMEOUT = 30.0  # seconds to wait for another worker's write lock
+
+# What a job plays; `events` is an event table file, "legacy" or None
+Job = namedtuple("Job", ["policy", "seed", "events", "shard_size", "games"])
+
+# A claimed shard; `rng` is the random state it was checkpointed with (JSON), or None
+Claim = namedtuple("Claim", ["id", "variant", "shard", "games", "played", "rng"])
+
+_TOTALS = ("games", "wins", "turns", "turns_sq", "detectives", "detectives_sq")
+_ENDING_COLUMNS = tuple("ending_" + name.lower() for name in engine.ENDINGS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    created_at REAL NOT NULL,
+    policy TEXT NOT NULL,
+    seed TEXT NOT NULL,
+    events TEXT,
+    shard_size INTEGER NOT NULL,
+    games INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    rules TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    variant INTEGER NOT NULL REFERENCES variants (id),
+    shard INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    played INTEGER NOT NULL DEFAULT 0,
+    rng TEXT,
+    worker TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    UNIQUE (variant, shard)
+);
+CREATE INDEX IF NOT EXISTS shards_open ON shards (shard, variant) WHERE played < games;
+CREATE TABLE IF NOT EXISTS totals (
+    variant INTEGER PRIMARY KEY REFERENCES variants (id),
+%s
+);
+""" % ",\n".join("    %s INTEGER NOT NULL DEFAULT 0" % column for column in _TOTALS + _ENDING_COLUMNS)
+
+# Shards go in order of number, so every variant's totals fill in together
+_CLAIM = """
+UPDATE shards SET worker = :worker, lease_until = :lease_until
+WHERE id = (SELECT id FROM shards WHERE played < games AND lease_until < :now ORDER BY shard, variant LIMIT 1)
+"""
+_CLAIMED = """
+SELECT id, variant, shard, games, played, rng FROM shards
+WHERE worker = :worker AND lease_until = :lease_until AND played < games
+"""
+_CHECKPOINT = """
+UPDATE shards SET played = ?, rng = ?, lease_until = ? WHERE id = ? AND worker = ? AND played = ?
+"""
+_ADD = "UPDATE totals SET %s WHERE variant = ?" % ", ".join(
+    "%s = %s + ?" % (column, column) for column in _TOTALS + _ENDING_COLUMNS)
+
+
+def connect(path):
+    """A connection to a job file, created if need be"""
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def worker_name():
+    """Who holds a claim: host and process"""
+    return "%s:%d" % (socket.gethostname(), os.getpid())
+
+
+def load_variant(source):
+    """(name, Ruleset) of "classic", a difficulty preset or a ruleset file"""
+    from judge import difficulty
+
+    if source == "classic":
+        return source, rulesets.CLASSIC
+    name = source if source in difficulty.PRESETS else os.path.splitext(os.path.basename(source))[0]
+    return name, difficulty.load(source)
+
+
+def create(path, games, variants, policy="first", seed="0", events=None, shard_size=DEFAULT_SHARD_SIZE):
+    """Write a job to play `games` games of each of `variants` ({name: Ruleset}) to a new job file.
+
+    Raises ValueError if the file already holds a job.
+    """
+    get_policy(policy)  # fail fast on a bad name
+    if events:
+        event_tables.load(events)  # and on a bad event table
+    connection = connect(path)
+    try:
+        with connection:
+            if connection.execute("SELECT COUNT(*) FROM job").fetchone()[0]:
+                raise ValueError("%s already holds a job" % path)
+            connection.execute("INSERT INTO job VALUES (1, ?, ?, ?, ?, ?, ?)",
+                               (time.time(), policy, str(seed), events, shard_size, games))
+            for name, ruleset in variants.items():
+                variant = connection.execute("INSERT INTO variants (name, rules) VALUES (?, ?)",
+                                             (name, rulesets.dumps(ruleset))).lastrowid
+                connection.execute("INSERT INTO totals (variant) VALUES (?)", (variant,))
+                connection.executemany("INSERT INTO shards (variant, shard, games) VALUES (?, ?, ?)",
+                                       [(variant, shard, count) for shard, count in shard_plan(games, shard_size)])
+    finally:
+        connection.close()
+
+
+def load_job(connection):
+    """The Job in a job file; ValueError if there is none"""
+    row = connection.execute("SELECT policy, seed, events, shard_size, games FROM job").fetchone()
+    if row is None:
+        raise ValueError("no job in this file")
+    return Job(*row)
+
+
+def claim(connection, worker, lease=LEASE_SECONDS):
+    """Claim the next shard nobody holds a lease on; None once there are none"""
+    now = time.time()
+    values = {"worker": worker, "lease_until": now + lease, "now": now}
+    with connection:
+        if connection.execute(_CLAIM, values).rowcount == 0:
+            return None
+        return Claim(*connection.execute(_CLAIMED, values).fetchone())
+
+
+def checkpoint(connection, claimed, worker, played, stats, rng, lease=LEASE_SECONDS):
+    """Record `stats`, the games after the `played` already recorded, and renew the lease.
+
+    Gives the shard back if `lease` is 0. Returns False, recording nothing,
+    if the shard is no longer this worker's.
+    """
+    done = played + stats.games
+    state = None if done == claimed.games else json.dumps(rng.getstate())
+    lease_until = time.time() + lease if lease else 0
+    with connection:
+        if connection.execute(_CHECKPOINT, (done, state, lease_until, claimed.id, worker, played)).rowcount == 0:
+            return False
+        connection.execute(_ADD, [getattr(stats, name) for name in _TOTALS]
+                           + [stats.endings[name] for name in engine.ENDINGS] + [claimed.variant])
+    return True
+
+
+def restore(claimed, seed):
+    """The random stream of a claimed shard, where its last checkpoint left it"""
+    rng = shard_rng(seed, claimed.shard)
+    if claimed.rng is not None:
+        version, internal, gauss = json.loads(claimed.rng)
+        rng.setstate((version, tuple(internal), gauss))
+    return rng
+
+
+def reopens(connection):
+    """Seconds until the next lease on an unfinished shard runs out (0 if one is free); None once all are done"""
+    until = connection.execute("SELECT MIN(lease_until) FROM shards WHERE played < games").fetchone()[0]
+    return None if until is None else max(0.0, until - time.time())
+
+
+def work(path, worker=None, lease=LEASE_SECONDS, every=CHECKPOINT_SECONDS):
+    """Claim and play shards of the job in `path` until every shard is done.
+
+    Shards other workers hold are waited for, in case their workers died.
+    Ctrl-C (SIGINT, in the main thread) finishes the game being played,
+    gives the shard back and raises KeyboardInterrupt. Returns {"games",
+    "shards", "seconds", "queue_seconds"}: what this worker played and how
+    long it spent claiming and checkpointing.
+    """
+    worker = worker or worker_name()
+    connection = connect(path)
+    job = load_job(connection)
+    policy = get_policy(job.policy)
+    table = event_tables.load(job.events) if job.events else None
+    variants = {variant: rulesets.from_dict(json.loads(text))
+                for variant, text in connection.execute("SELECT id, rules FROM variants")}
+    summary = {"games": 0, "shards": 0, "seconds": 0.0, "queue_seconds": 0.0}
+    start = time.perf_counter()
+
+    # A game cut short would leave the random stream where no checkpoint can resume it
+    stopping = []
+    interrupt = None
+    if threading.current_thread() is threading.main_thread():
+        interrupt = signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+    def save(claimed, played, stats, rng, lease):
+        started = time.perf_counter()
+        ours = checkpoint(connection, claimed, worker, played, stats, rng, lease)
+        summary["queue_seconds"] += time.perf_counter() - started
+        if ours:
+            summary["games"] += stats.games
+        return ours
+
+    try:
+        while not stopping:
+            started = time.perf_counter()
+            claimed = claim(connection, worker, lease)
+            wait = None if claimed is not None else reopens(connection)
+            summary["queue_seconds"] += time.perf_counter() - started
+            if claimed is None:
+                if wait is None:
+                    break
+                time.sleep(min(max(wait, 0.1), 1.0))
+                continue
+            rules = variants[claimed.variant]
+            rng = restore(claimed, job.seed)
+            played, stats = claimed.played, SimulationStats()
+            due = time.monotonic() + every
+            while played + stats.games < claimed.games:
+                stats.add(play_game(policy, rng, table=table, rules=rules))
+                if stats.games % CHECK_EVERY or not (stopping or time.monotonic() >= due):
+                    continue
+                if stopping:
+                    save(claimed, played, stats, rng, 0)
+                    break
+                if not save(claimed, played, stats, rng, lease):
+                    break  # the lease ran out and another worker took the shard
+                played, stats = played + stats.games, SimulationStats()
+                due = time.monotonic() + every
+            else:
+                if save(claimed, played, stats, rng, lease):
+                    summary["shards"] += 1
+    finally:
+        if interrupt is not None:
+            signal.signal(signal.SIGINT, interrupt)
+        connection.close()
+        summary["seconds"] = time.perf_counter() - start
+    if stopping:
+        raise KeyboardInterrupt
+    return summary
+
+
+def run_workers(path, workers):
+    """Run `workers` worker processes on a job until it is done; returns their summaries"""
+    if workers == 1:
+        return [work(path)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(work, [path] * workers))
+
+
+def progress(connection):
+    """{variant name: (shards done, shards, games played, games, workers holding a lease)}"""
+    rows = connection.execute("""
+        SELECT name, SUM(played = shards.games), COUNT(*), SUM(played), SUM(shards.games),
+               SUM(played < shards.games AND lease_until >= ?)
+        FROM shards JOIN variants ON variants.id = variant GROUP BY variant ORDER BY variant""", (time.time(),))
+    return {row[0]: row[1:] for row in rows}
+
+
+def totals(connection):
+    """{variant name: SimulationStats} of every game checkpointed so far"""
+    out = {}
+    rows = connection.execute("SELECT name, %s FROM totals JOIN variants ON variants.id = variant ORDER BY variant"
+                              % ", ".join(_TOTALS + _ENDING_COLUMNS))
+    for row in rows:
+        stats = SimulationStats()
+        for name, value in zip(_TOTALS, row[1:]):
+            setattr(stats, name, value)
+        stats.endings = dict(zip(engine.ENDINGS, row[1 + len(_TOTALS):]))
+        out[row[0]] = stats
+    return out
+
+
+def status(path):
+    """The progress and results so far of the job in `path`, as text"""
+    connection = connect(path)
+    try:
+        job = load_job(connection)
+        lines = ["Policy %s, seed %s, %d games per variant in shards of %d%s" % (
+            job.policy, job.seed, job.games, job.shard_size, ", events %s" % job.events if job.events else "")]
+        lines.append("%-16s %13s %23s %8s" % ("variant", "shards done", "games played", "workers"))
+        for name, (done, shards, played, games, working) in progress(connection).items():
+            lines.append("%-16s %13s %23s %8d" % (name[:16], "%d/%d" % (done, shards), "%d/%d" % (played, games),
+                                                  working))
+        for name, stats in totals(connection).items():
+            lines.append("\n[%s]" % name)
+            lines.append(stats.report())
+        return "\n".join(lines)
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable sharded simulation jobs for THE JUDGE")
+    commands = parser.add_subparsers(dest="command", required=True)
+    creating = commands.add_parser("create", help="write a new job to a job file")
+    creating.add_argument("path", help="job file (SQLite)")
+    creating.add_argument("--games", type=int, default=100000, help="games to play of each variant")
+    creating.add_argument("--policy", default="first", choices=sorted(POLICIES), help="decision policy")
+    creating.add_argument("--seed", default="0", help="seed for the run (any string)")
+    creating.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="games per shard")
+    creating.add_argument("--events", metavar="FILE", help="event table file, or \"legacy\" for the original events")
+    creating.add_argument("--rules", metavar="RULES", action="append",
+                          help="a variant: classic, easy, normal, hard or a ruleset file (repeat for more; "
+                               "default classic)")
+    working = commands.add_parser("work", help="play the job's shards until none are left")
+    working.add_argument("path", help="job file (SQLite)")
+    working.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    showing = commands.add_parser("status", help="show a job's progress and results so far")
+    showing.add_argument("path", help="job file (SQLite)")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        if args.games < 1 or args.shard_size < 1:
+            parser.error("--games and --shard-size must be positive")
+        variants = {}
+        for source in args.rules or ["classic"]:
+            try:
+                name, ruleset = load_variant(source)
+            except (OSError, ValueError) as error:
+                parser.error("can't load rules from %s: %s" % (source, error))
+            if name in variants:
+                parser.error("two variants are called %s" % name)
+            variants[name] = ruleset
+        try:
+            create(args.path, args.games, variants, args.policy, args.seed, args.events, args.shard_size)
+        except (OSError, ValueError, sqlite3.Error) as error:
+            parser.error("can't create the job: %s" % error)
+        print("%s: %d shards of up to %d games for each of %s" % (
+            args.path, len(shard_plan(args.games, args.shard_size)), args.shard_size, ", ".join(variants)))
+        return 0
+
+    if not os.path.exists(args.path):
+        parser.error("no job file at %s" % args.path)
+    if args.command == "status":
+        try:
+            print(status(args.path))
+        except (ValueError, sqlite3.Error) as error:
+            parser.error("can't read %s: %s" % (args.path, error))
+        return 0
+
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        summaries = run_workers(args.path, workers)
+    except KeyboardInterrupt:
+        print("\nInterrupted; the played games are saved. Run work again to carry on.", file=sys.stderr)
+        return 130
+    except (ValueError, sqlite3.Error) as error:
+        parser.error("can't work on %s: %s" % (args.path, error))
+    games = sum(summary["games"] for summary in summaries)
+    seconds = max(summary["seconds"] for summary in summaries)
+    busy = sum(summary["seconds"] for summary in summaries)
+    queued = sum(summary["queue_seconds"] for summary in summaries)
+    print("%d workers played %d games in %d shards: %.2fs (%.0f games/s), %.2f%% of the time on the queue" % (
+        workers, games, sum(summary["shards"] for summary in summaries), seconds,
+        games / seconds if seconds else 0, 100 * queued / busy if busy else 0))
+    print(status(args.path))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Leaderboard and run history for THE JUDGE, in a local SQLite database.
+
+Every finished game becomes one row of the `games` table: when it ended,
+the player (if known), turns survived, effectiveness, final popularity,
+criminals executed, detectives killed, skips used, the ending, whether it
+was won, and the rules it was played by (judge.rules file form, "{}" for the
+classic game).
+
+LeaderboardWriter never makes the game wait on the disk. record() only puts
+the row on a queue; a background thread takes everything queued (up to
+BATCH_ROWS rows) and inserts it in one transaction, so a server finishing
+thousands of games a minute costs a commit per batch, not per game. The
+queue is bounded: if the disk can't keep up, rows beyond MAX_PENDING are
+dropped and counted rather than held up or piling up in memory. If a write
+fails (say another process held the lock for longer than BUSY_TIMEOUT), the
+writer reports it on stderr, keeps it in `error` and stops: later rows are
+dropped and counted too. The database is in WAL mode, so readers don't
+block the writer.
+
+Top-k queries - by effectiveness, overall or for one ending - and the
+recent history are answered from indexes, reading only the k rows they
+return.
+
+Usage:
+    python The-Judge.py --leaderboard scores.db
+    python -m judge.server --leaderboard scores.db
+    python -m judge.leaderboard scores.db --top 10 --ending BEST
+    python -m judge.leaderboard /tmp/bench.db --bench 100000
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from judge import engine, rules as rulesets
+
+BATCH_ROWS = 1000  # rows inserted per transaction at most
+MAX_PENDING = 100000  # rows queued for the writer thread before record() drops them
+BUSY_TIMEOUT = 5.0  # seconds to wait for another process's write lock
+
+# One finished game; `finished_at` is a Unix time
+Result = namedtuple("Result", [
+    "finished_at", "player", "turns_survived", "effectiveness", "popularity",
+    "criminals_executed", "detectives_killed", "skips_used", "ending", "won", "rules",
+])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    player TEXT,
+    turns_survived INTEGER NOT NULL,
+    effectiveness INTEGER NOT NULL,
+    popularity INTEGER NOT NULL,
+    criminals_executed INTEGER NOT NULL,
+    detectives_killed INTEGER NOT NULL,
+    skips_used INTEGER NOT NULL,
+    ending TEXT NOT NULL,
+    won INTEGER NOT NULL,
+    rules TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_effectiveness ON games (effectiveness DESC, id);
+CREATE INDEX IF NOT EXISTS games_by_ending ON games (ending, effectiveness DESC, id);
+"""
+_INSERT = "INSERT INTO games (%s) VALUES (%s)" % (", ".join(Result._fields),
+                                                  ", ".join("?" * len(Result._fields)))
+_COLUMNS = ", ".join(Result._fields)
+
+
+def result(state, player=None, finished_at=None):
+    """The Result of a finished game's final state"""
+    return Result(
+        time.time() if finished_at is None else finished_at,
+        player,
+        engine.turns_survived(state),
+        state.effectiveness,
+        state.popularity,
+        engine.criminals_executed(state),
+        state.killed_detectives,
+        engine.skips_used(state),
+        engine.ending(state),
+        bool(state.won),
+        rulesets.dumps(state.rules),
+    )
+
+
+def connect(path):
+    """A connection to a leaderboard database, created if need be"""
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a crash may lose the last batch
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class LeaderboardWriter:
+    """Queues finished games and inserts them in batches from a background thread"""
+
+    def __init__(self, path, batch_rows=BATCH_ROWS, max_pending=MAX_PENDING):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()  # record() runs on any thread, _drain on its own
+        self.error = None  # the sqlite3.Error that stopped the writer thread, if one did
+        connect(path).close()  # create the schema now, so errors show up here
+        self.queue = queue.Queue(max_pending)
+        self.thread = threading.Thread(target=self._drain, name="leaderboard-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, game_result):
+        """Queue one Result; never waits"""
+        if self.error is not None:
+            self._drop(1)
+            return
+        try:
+            self.queue.put_nowait(game_result)
+        except queue.Full:
+            self._drop(1)
+
+    def _drop(self, rows):
+        with self._dropped_lock:
+            self.dropped += rows
+
+    def record_state(self, state, player=None):
+        """Queue the Result of a finished game's final state"""
+        self.record(result(state, player))
+
+    def _drain(self):
+        try:
+            connection = connect(self.path)
+        except sqlite3.Error as error:
+            self._failed(error)
+            return
+        try:
+            done = False
+            while not done:
+                batch = [self.queue.get()]
+                while len(batch) < self.batch_rows:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if batch:
+                    try:
+                        with connection:
+                            connection.executemany(_INSERT, batch)
+                    except sqlite3.Error as error:
+                        self._drop(len(batch))
+                        self._failed(error)
+                        return
+                    self.written += len(batch)
+                    self.batches += 1
+        finally:
+            connection.close()
+
+    def _failed(self, error):
+        self.error = error
+        print("leaderboard: can't write to %s (%s); no more games will be recorded" % (self.path, error),
+              file=sys.stderr)
+
+    def close(self):
+        """Write everything queued and stop the writer thread"""
+        while self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue  # the writer is busy, or has just failed
+        self.thread.join()
+        # Whatever a failed writer left in the queue never made it to the disk
+        while True:
+            try:
+                row = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self._drop(row is not None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Leaderboard:
+    """Read side of a leaderboard database"""
+
+    def __init__(self, path):
+        self.connection = connect(path)
+
+    def top(self, k=10, ending=None):
+        """The k most effective games, overall or with one ending, as Results"""
+        if ending is None:
+            rows = self.connection.execute(
+                "SELECT %s FROM games ORDER BY effectiveness DESC, id LIMIT ?" % _COLUMNS, (k,))
+        else:
+            rows = self.connection.execute(
+                "SELECT %s FROM games WHERE ending = ? ORDER BY effectiveness DESC, id LIMIT ?"
+                % _COLUMNS, (ending, k))
+        return [Result(*row) for row in rows]
+
+    def recent(self, k=10):
+        """The k games that finished last, newest first"""
+        rows = self.connection.execute("SELECT %s FROM games ORDER BY id DESC LIMIT ?" % _COLUMNS, (k,))
+        return [Result(*row) for row in rows]
+
+    def endings(self):
+        """{ending: games} over the whole history"""
+        counts = dict(self.connection.execute("SELECT ending, COUNT(*) FROM games GROUP BY ending"))
+        return {name: counts.get(name, 0) for name in engine.ENDINGS}
+
+    def close(self):
+        self.connection.close()
+
+
+def table(results):
+    """The leaderboard lines of some Results"""
+    lines = ["%-4s %-16s %6s %5s %5s %6s %5s  %s"
+             % ("rank", "player", "score", "turns", "pop", "execs", "dets", "ending")]
+    for rank, r in enumerate(results, 1):
+        lines.append("%-4d %-16s %6d %5d %4d%% %6d %5d  %s"
+                     % (rank, (r.player or "-")[:16], r.effectiveness, r.turns_survived, r.popularity,
+                        r.criminals_executed, r.detectives_killed, r.ending))
+    return "\n".join(lines)
+
+
+def bench(path, games, seed=0):
+    """Record `games` simulated results; returns (seconds in record(), seconds until written, writer)"""
+    import random
+    from judge.policies import get_policy
+    from judge.simulate import play_game
+
+    policy = get_policy("cautious")
+    rng = random.Random(seed)
+    states = [play_game(policy, rng) for _ in range(min(games, 1000))]
+    results = [result(states[i % len(states)], "bot-%d" % (i % 97)) for i in range(games)]
+    writer = LeaderboardWriter(path)
+    start = time.perf_counter()
+    for game_result in results:
+        writer.record(game_result)
+    queued = time.perf_counter() - start
+    writer.close()
+    return queued, time.perf_counter() - start, writer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="THE JUDGE's leaderboard")
+    parser.add_argument("database", help="leaderboard database file")
+    parser.add_argument("--top", type=int, default=10, help="games to list")
+    parser.add_argument("--ending", choices=engine.ENDINGS, help="only games with this ending")
+    parser.add_argument("--recent", action="store_true", help="list the latest games instead")
+    parser.add_argument("--bench", type=int, metavar="GAMES",
+                        help="time recording GAMES results into the database (adds them to it)")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        queued, total, writer = bench(args.database, args.bench)
+        print("%d results: record() %.2fus each, all written in %.2fs (%.0f rows/s) in %d batches, %d dropped"
+              % (args.bench, queued / args.bench * 1e6, total, writer.written / total, writer.batches,
+                 writer.dropped))
+    if not os.path.exists(args.database):
+        parser.error("no leaderboard at %s" % args.database)
+    board = Leaderboard(args.database)
+    try:
+        results = board.recent(args.top) if args.recent else board.top(args.top, args.ending)
+        print(table(results))
+        print("  ".join("%s %d" % item for item in board.endings().items()))
+    finally:
+        board.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Load generator for judge.server.
+
+Opens many scripted sessions at once, plays every one of them to the end
+(random targets, the odd skip and detective kill) and reports latency
+percentiles:
+
+    response  reply sent -> first byte of the server's answer
+    turn      choice of target sent -> next "Who will you judge?" prompt
+
+Turn latency includes the typewriter effect unless the server runs with
+--instant. `--local` starts an instant server inside the load generator, so
+nothing else needs to be running.
+
+Usage:
+    python -m judge.server --instant &
+    python -m judge.loadgen --sessions 1000
+    python -m judge.loadgen --local --sessions 2000
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+
+from judge.server import DEFAULT_PORT, GO_AHEAD, GameServer
+
+_TARGET = re.compile(r"^\s+\[(\d+)\] ", re.MULTILINE)
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class LoadStats:
+    def __init__(self):
+        self.response = []
+        self.turn = []
+        self.completed = 0
+        self.failed = 0
+
+    def report(self, elapsed):
+        lines = ["Sessions: %d completed, %d failed in %.2fs"
+                 % (self.completed, self.failed, elapsed)]
+        lines.append("Turns: %d (%.0f turns/s)" % (len(self.turn), len(self.turn) / elapsed if elapsed else 0))
+        lines.append("%-10s %9s %9s %9s %9s" % ("latency", "p50", "p90", "p99", "max"))
+        for name, values in (("response", self.response), ("turn", self.turn)):
+            ordered = sorted(values)
+            lines.append("%-10s %7.2fms %7.2fms %7.2fms %7.2fms" % (
+                (name,) + tuple(1000 * percentile(ordered, q) for q in (50, 90, 99, 100))))
+        return "\n".join(lines)
+
+
+def choose(text, rng):
+    """Scripted player: the reply to the prompt at the end of `text`"""
+    if "Press Enter" in text:
+        return ""
+    if "Kill the detective" in text:
+        return rng.choice("yn")
+    if "'s' to skip" in text and rng.random() < 0.3:
+        return "s"
+    targets = [int(number) for number in _TARGET.findall(text)]
+    return str(rng.randint(1, max(targets))) if targets else "1"
+
+
+async def read_prompt(reader):
+    """Read up to the next Go Ahead; (text, time of first byte), text None at EOF"""
+    buffer = bytearray()
+    first = None
+    while GO_AHEAD not in buffer:
+        data = await reader.read(65536)
+        if not data:
+            return None, first
+        if first is None:
+            first = time.perf_counter()
+        buffer += data
+    return buffer.decode("utf-8", errors="replace"), first
+
+
+async def play_session(host, port, rng, stats, think=0.0):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        text, _ = await read_prompt(reader)
+        choice_sent = None
+        while text is not None:
+            if "Who will you judge?" in text and choice_sent is not None:
+                stats.turn.append(time.perf_counter() - choice_sent)
+                choice_sent = None
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+            reply = choose(text, rng)
+            sent = time.perf_counter()
+            if "Who will you judge?" in text:
+                choice_sent = sent
+            writer.write((reply + "\r\n").encode("utf-8"))
+            await writer.drain()
+            text, first = await read_prompt(reader)
+            if first is not None:
+                stats.response.append(first - sent)
+        stats.completed += 1
+    finally:
+        writer.close()
+
+
+async def run_load(sessions, host, port, seed=0, think=0.0, ramp=0.0):
+    """Play `sessions` sessions concurrently and return their LoadStats"""
+    stats = LoadStats()
+
+    async def one(number):
+        if ramp:
+            await asyncio.sleep(ramp * number / sessions)
+        try:
+            await play_session(host, port, random.Random("judge-loadgen:%s:%d" % (seed, number)),
+                               stats, think)
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            stats.failed += 1
+
+    await asyncio.gather(*(one(number) for number in range(sessions)))
+    return stats
+
+
+async def _main(args):
+    server = None
+    host, port = args.host, args.port
+    if args.local:
+        server = await GameServer(seed=args.seed, instant=True).start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        start = time.perf_counter()
+        stats = await run_load(args.sessions, host, port, args.seed, args.think, args.ramp)
+        print(stats.report(time.perf_counter() - start))
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    return 0 if stats.failed == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for judge.server")
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent scripted players")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--local", action="store_true", help="start an instant server in-process")
+    parser.add_argument("--seed", default="0", help="seed for the scripted players")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time per prompt, seconds")
+    parser.add_argument("--ramp", type=float, default=0.0, help="spread session starts over this many seconds")
+    args = parser.parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
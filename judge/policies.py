@@ -0,0 +1,179 @@
+"""
+Decision policies for playing THE JUDGE headlessly.
+
+A policy is any callable taking (state, rng) and returning an engine.Action
+that is legal in that state. Policies that are sent to worker processes must be
+picklable (module-level functions or Bot instances); the simulators also
+accept the names registered in POLICIES.
+
+The bots decide from what the turn screen shows a player (see TurnView):
+the targets' danger and detective lines, the popularity bar, and the capture
+risk and skips only once laying low is on offer. Each is built from three
+choices - which target, when to lay low, whether to kill the detective:
+
+    greedy             most dangerous target (biggest popularity gain)
+    min_risk           lowest expected capture risk
+    skip_at_threshold  lowest expected risk; lays low whenever it may
+                       (capture risk at CAPTURE_RISK_SKIP_THRESHOLD or more)
+    always_kill        most dangerous target, kills every detective it can,
+                       lays low whenever it may
+    never_kill         the same, but spares every detective
+    protection_chaser  most dangerous target until the popularity bar shows
+                       70%+ (police sympathy starts at 60%), then lowest
+                       expected risk; lays low whenever it may
+
+The bots' estimates (expected_risk, the protection band) are tuned to the
+classic rules; what they see and may do follows each game's own rules.
+"""
+
+from collections import namedtuple
+
+from judge import engine
+from judge.engine import (
+    CAPTURE_RISK_SKIP_THRESHOLD,
+    POPULARITY_PROTECTION_THRESHOLD,
+    Action,
+    SKIP_TURN,
+)
+
+# Lower edges of the bands the popularity bar shows
+POPULARITY_BANDS = (0, 30, 50, 70, 90)
+# The first band the bar shows that is surely above the protection threshold
+PROTECTED_BAND = min(edge for edge in POPULARITY_BANDS if edge >= POPULARITY_PROTECTION_THRESHOLD)
+# Mean of calculate_capture_risk's randint(-5, 10)
+MEAN_RISK_ROLL = 2.5
+# Detective lines the turn screen shows
+NAMED, ELIMINATED, REDACTED = "named", "eliminated", "redacted"
+
+TargetView = namedtuple("TargetView", ["danger", "detective", "can_kill"])
+TurnView = namedtuple("TurnView", ["turn", "popularity_band", "capture_risk", "skips_remaining",
+                                   "can_skip", "targets"])
+
+
+def first_target(state, rng):
+    """Always execute the first target listed and spare the detective"""
+    return Action(0, False)
+
+
+def random_action(state, rng):
+    """Pick uniformly among every legal action"""
+    return rng.choice(engine.legal_actions(state))
+
+
+def cautious(state, rng):
+    """Lay low whenever allowed, otherwise execute the least dangerous target"""
+    if engine.can_skip(state):
+        return SKIP_TURN
+    criminals = state.current_criminals
+    index = min(range(len(criminals)), key=lambda i: criminals[i].danger_level)
+    return Action(index, False)
+
+
+def turn_view(state):
+    """What the turn screen shows about a state"""
+    band = max(edge for edge in POPULARITY_BANDS if state.popularity >= edge)
+    offered = engine.can_skip(state)
+    targets = []
+    for i, criminal in enumerate(state.current_criminals):
+        if state.killed_detectives >= state.rules.detective_names_hidden_threshold:
+            detective = REDACTED
+        elif criminal.detective_in_charge is None:
+            detective = None
+        elif criminal.detective_in_charge in state.executed_names:
+            detective = ELIMINATED
+        else:
+            detective = NAMED
+        targets.append(TargetView(criminal.danger_level, detective, engine.can_kill_detective(state, i)))
+    # The capture risk is on screen when laying low is offered or skips are gone
+    shown = offered or state.skips_remaining == 0
+    return TurnView(state.turn, band, state.capture_risk if shown else None,
+                    state.skips_remaining if offered else None, offered, tuple(targets))
+
+
+def expected_risk(target):
+    """Expected capture risk increase of executing a target, from what is shown"""
+    if target.detective == REDACTED:
+        # Dangerous targets go without a detective half the time
+        bonus = 5.0 if target.danger >= 7 else 10.0
+    else:
+        bonus = 0.0 if target.detective is None else 10.0
+    return 2 * target.danger + bonus + MEAN_RISK_ROLL
+
+
+def most_dangerous(view):
+    return max(range(len(view.targets)), key=lambda i: view.targets[i].danger)
+
+
+def safest(view):
+    return min(range(len(view.targets)), key=lambda i: expected_risk(view.targets[i]))
+
+
+def protection(view):
+    """Chase the popularity that makes the police sympathetic, then play safe"""
+    if view.popularity_band < PROTECTED_BAND:
+        return most_dangerous(view)
+    return safest(view)
+
+
+TARGET_RULES = {"greedy": most_dangerous, "safest": safest, "protection": protection}
+
+
+class Bot:
+    """A policy made of a target rule, a skip rule and a detective rule.
+
+    `target` names a TARGET_RULES entry. With a `skip` threshold the bot lays
+    low whenever it may and the capture risk is at least that high (laying
+    low is only offered from CAPTURE_RISK_SKIP_THRESHOLD up); it kills the
+    detective whenever it can if `kill` is true. Instances pickle, so they
+    can go to worker processes.
+    """
+
+    def __init__(self, target, skip=None, kill=False):
+        if target not in TARGET_RULES:
+            raise ValueError("unknown target rule %r" % target)
+        self.target = target
+        self.skip = skip
+        self.kill = kill
+
+    def __call__(self, state, rng):
+        view = turn_view(state)
+        if self.skip is not None and view.can_skip and view.capture_risk >= self.skip:
+            return SKIP_TURN
+        rule = TARGET_RULES[self.target]
+        if self.kill:
+            killable = [i for i, t in enumerate(view.targets) if t.can_kill]
+            if killable:
+                narrowed = view._replace(targets=tuple(view.targets[i] for i in killable))
+                return Action(killable[rule(narrowed)], True)
+        return Action(rule(view), False)
+
+    def __repr__(self):
+        return "Bot(%r, skip=%r, kill=%r)" % (self.target, self.skip, self.kill)
+
+
+BOTS = {
+    "greedy": Bot("greedy"),
+    "min_risk": Bot("safest"),
+    "skip_at_threshold": Bot("safest", skip=CAPTURE_RISK_SKIP_THRESHOLD),
+    "always_kill": Bot("greedy", skip=CAPTURE_RISK_SKIP_THRESHOLD, kill=True),
+    "never_kill": Bot("greedy", skip=CAPTURE_RISK_SKIP_THRESHOLD),
+    "protection_chaser": Bot("protection", skip=CAPTURE_RISK_SKIP_THRESHOLD),
+}
+
+POLICIES = {
+    "first": first_target,
+    "random": random_action,
+    "cautious": cautious,
+}
+POLICIES.update(BOTS)
+
+
+def get_policy(policy):
+    """Resolve a policy name from POLICIES, or pass a callable through"""
+    if callable(policy):
+        return policy
+    try:
+        return POLICIES[policy]
+    except KeyError:
+        raise ValueError("unknown policy %r (choose from %s)"
+                         % (policy, ", ".join(sorted(POLICIES))))
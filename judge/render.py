@@ -0,0 +1,200 @@
+"""
+Output backends for THE JUDGE.
+
+A Game session (see judge.game) yields output operations instead of doing
+any I/O itself:
+
+    Write(text, delay)   show text, typing it one character per `delay` seconds
+    Pause(seconds)       dramatic pause
+    Prompt(text)         ask the player; the reply is sent back into the session
+
+A renderer drives a session: it shows the Writes and Pauses and answers the
+Prompts. Backends:
+
+    AnimatedRenderer    the typewriter effect, drawn in frames at a fixed tick
+                        (one write and flush per frame instead of per char)
+    InstantRenderer     everything at once, no pauses
+    NullRenderer        shows nothing; for benchmarks and bots
+    TranscriptRenderer  records the session, prompts and replies to a file,
+                        optionally while showing it with another renderer
+
+judge.screen has a full-screen curses renderer that shows the turn screen in
+fixed panels itself (its `panels` is true, so the game only narrates).
+
+Prompts are answered by `answer(prompt)`, which defaults to input().
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+FRAME_RATE = 30  # typewriter frames per second
+
+Write = namedtuple("Write", ["text", "delay"])
+Pause = namedtuple("Pause", ["seconds"])
+Prompt = namedtuple("Prompt", ["text"])
+
+
+def line(text=""):
+    """Write one line at once, like print()"""
+    return Write(text + "\n", 0)
+
+
+class Renderer:
+    """Base class: shows nothing, asks with input()"""
+
+    quiet = False  # True if nothing is shown, so the game can skip narrating
+    panels = False  # True if it shows the turn screen itself, so the game only narrates
+
+    def __init__(self, answer=None):
+        self.answer = answer or input
+
+    def run(self, script):
+        """Drive a session generator to the end"""
+        write, type_text, pause, ask = self.write, self.type_text, self.pause, self.ask
+        reply = None
+        send = script.send
+        try:
+            while True:
+                op = send(reply)
+                reply = None
+                if type(op) is Prompt:
+                    reply = ask(op.text)
+                elif type(op) is Pause:
+                    pause(op.seconds)
+                elif op.delay:
+                    type_text(op.text, op.delay)
+                else:
+                    write(op.text)
+        except StopIteration:
+            pass
+        finally:
+            self.close()
+
+    def write(self, text):
+        """Show text at once"""
+
+    def type_text(self, text, delay):
+        """Show text typed one character per `delay` seconds"""
+        self.write(text)
+
+    def pause(self, seconds):
+        """Dramatic pause"""
+
+    def ask(self, prompt):
+        return self.answer(prompt)
+
+    def close(self):
+        """Called once the session is over"""
+
+
+class NullRenderer(Renderer):
+    """Discards all output; prompts still go to `answer`.
+
+    Games played with it skip their narration entirely, so a turn costs
+    little more than the rules themselves.
+    """
+
+    quiet = True
+
+
+class InstantRenderer(Renderer):
+    """Everything at once, flushed only when the player is asked something"""
+
+    def __init__(self, stream=None, answer=None):
+        super().__init__(answer)
+        self.stream = stream
+
+    @property
+    def out(self):
+        # Looked up on use so redirect_stdout keeps working
+        return self.stream or sys.stdout
+
+    def write(self, text):
+        self.out.write(text)
+
+    def ask(self, prompt):
+        self.out.flush()
+        return self.answer(prompt)
+
+    def close(self):
+        self.out.flush()
+
+
+class AnimatedRenderer(InstantRenderer):
+    """Typewriter effect drawn in frames.
+
+    Each frame writes every character that is due and flushes once, then
+    sleeps until the next frame; `speed` scales every delay and pause
+    (2 is twice as fast).
+    """
+
+    def __init__(self, stream=None, speed=1.0, frame_rate=FRAME_RATE, answer=None):
+        super().__init__(stream, answer)
+        self.speed = speed
+        self.tick = 1.0 / frame_rate
+
+    def type_text(self, text, delay):
+        stream = self.out
+        per_frame = self.tick * self.speed / delay  # characters per frame
+        start = time.perf_counter()
+        written = 0
+        frame = 0
+        while written < len(text):
+            frame += 1
+            due = min(len(text), max(written + 1, int(frame * per_frame)))
+            stream.write(text[written:due])
+            stream.flush()
+            # Sleep for the characters just drawn, measured from the start so
+            # slow writes don't stretch the animation
+            time.sleep(max(0.0, start + due * delay / self.speed - time.perf_counter()))
+            written = due
+
+    def pause(self, seconds):
+        self.out.flush()
+        time.sleep(seconds / self.speed)
+
+
+class TranscriptRenderer(Renderer):
+    """Records the whole session, including the player's replies, to a file.
+
+    `inner` is another renderer to show the session with at the same time
+    (prompts are then answered by it); without one nothing is shown.
+    """
+
+    def __init__(self, path, inner=None, answer=None):
+        super().__init__(answer)
+        self.file = open(path, "w", encoding="utf-8")
+        self.inner = inner
+
+    def write(self, text):
+        self.file.write(text)
+        if self.inner is not None:
+            self.inner.write(text)
+
+    def type_text(self, text, delay):
+        self.file.write(text)
+        if self.inner is not None:
+            self.inner.type_text(text, delay)
+
+    def pause(self, seconds):
+        if self.inner is not None:
+            self.inner.pause(seconds)
+
+    def ask(self, prompt):
+        reply = self.inner.ask(prompt) if self.inner is not None else self.answer(prompt)
+        self.file.write(prompt + reply + "\n")
+        return reply
+
+    def close(self):
+        self.file.close()
+        if self.inner is not None:
+            self.inner.close()
+
+
+def make_renderer(speed=1.0, instant=False, transcript=None):
+    """The renderer for the --speed, --instant and --transcript options"""
+    renderer = InstantRenderer() if instant else AnimatedRenderer(speed=speed)
+    if transcript:
+        renderer = TranscriptRenderer(transcript, renderer)
+    return renderer
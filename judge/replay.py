@@ -0,0 +1,80 @@
+"""
+Replay an action log headlessly and check it reproduces the recorded game.
+
+Starts from the log's opening snapshot (state and random generator), feeds
+every recorded decision to the engine at full speed, and compares the state
+it lands on with the final snapshot the log recorded - byte for byte, RNG
+state included. Useful for reproducing a reported bug exactly, and for
+checking that a rules change did not alter how existing games play out.
+
+Usage:
+    python The-Judge.py --record game.log
+    python -m judge.replay game.log
+"""
+
+import argparse
+import sys
+import time
+
+from judge import engine, snapshot
+from judge import events as event_tables
+
+
+def replay(path, table=None):
+    """Replay a log; returns (final state, rng, recorded end snapshot or None, decisions left over).
+
+    The game plays by the rules (and so the event table) it recorded;
+    `table` is a judge.events.EventTable to play with instead. If the
+    replayed game ends before the log does, the decisions it didn't get to
+    are left over.
+    """
+    start, actions, end = snapshot.read_log(path)
+    state, rng = snapshot.loads(start)
+    if rng is None:
+        raise snapshot.SnapshotError("the starting snapshot has no random generator state")
+    for played, action in enumerate(actions):
+        if state.game_over:
+            return state, rng, end, len(actions) - played
+        state, _ = engine.step(state, action, rng, table)
+    return state, rng, end, 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and verify a THE JUDGE action log")
+    parser.add_argument("log", help="action log written with --record")
+    parser.add_argument("--events", metavar="FILE",
+                        help="play with this event table instead of the one the game recorded")
+    args = parser.parse_args(argv)
+
+    begin = time.perf_counter()
+    try:
+        table = event_tables.load(args.events) if args.events else None
+        state, rng, end, left_over = replay(args.log, table)
+    except (OSError, ValueError) as error:
+        print("Could not replay %s: %s" % (args.log, error))
+        return 2
+    elapsed = time.perf_counter() - begin
+
+    print("Replayed to turn %d in %.2fms: popularity %d%%, capture risk %d%%, %s"
+          % (state.turn, elapsed * 1000, state.popularity, state.capture_risk,
+             "won" if state.won else "arrested" if state.game_over else "still playing"))
+    if left_over:
+        print("MISMATCH: the replayed game ended with %d recorded decisions still to play." % left_over)
+        return 1
+    if end is None:
+        print("The log has no final state (the game was not finished); nothing to verify.")
+        return 0
+    if snapshot.dumps(state, rng) == end:
+        print("OK: the replay matches the recorded final state.")
+        return 0
+    recorded, _ = snapshot.loads(end)
+    print("MISMATCH: the replay does not land on the recorded final state.")
+    for field in ("turn", "effectiveness", "popularity", "capture_risk", "killed_detectives",
+                  "skips_remaining", "turns_with_high_popularity", "game_over", "won"):
+        if getattr(state, field) != getattr(recorded, field):
+            print("  %s: replayed %r, recorded %r" % (field, getattr(state, field), getattr(recorded, field)))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Rulesets for THE JUDGE.
+
+Every number the rules use - the turn limit, skips, capture risk and
+popularity rolls, detective odds, popularity protection - is a field of an
+immutable Ruleset. A game's state carries its Ruleset (GameState.rules), so
+any number of rule variants can be played side by side in one process: an
+A/B server, a parameter sweep or the calibration search just start games
+with different Rulesets. CLASSIC is the original game's rules.
+
+Rulesets are immutable, hashable and compare by value, and the ones read
+from files are interned: every session that loads the same rules gets the
+same Ruleset object. Tables derived from a ruleset (its event table, its
+content pack, the roll distributions the forecasts use) are built once per
+distinct ruleset by derived(), kept on the ruleset and shared by every game
+that plays it.
+
+Ruleset file format (JSON): any subset of the fields, the rest keep their
+classic values. Ranges are [low, high] pairs, inclusive like randint:
+
+    {"max_turns": 30, "max_skips": 3, "capture_roll": [-5, 15],
+     "events": "legacy", "breaking_news_chance": 0.3, "content": "noir.jcp"}
+
+A file may also hold them under "rules", next to other keys (the
+difficulty presets in judge/data/presets/ do). Relative "events" and
+"content" files are relative to the ruleset file's directory; load() stores
+their absolute paths, so the rules play the same from any working directory.
+"""
+
+import json
+import os
+
+from judge import content as content_packs, events as event_tables
+
+RANGES = ("capture_roll", "popularity_roll", "first_detective_kill_roll",
+          "detective_kill_decrease_roll", "detective_kill_increase_roll")
+CHANCES = ("no_detective_chance", "detective_kill_decrease_chance",
+           "breaking_news_chance", "skip_news_chance")
+
+_FIELDS = (
+    # (field, classic value, meaning)
+    ("max_turns", 20, "turns to survive"),
+    ("max_skips", 5, "times the player may lay low"),
+    ("detective_names_hidden_threshold", 4, "detective kills after which detectives are hidden"),
+    ("popularity_protection_threshold", 60, "popularity at which the police go easy"),
+    ("popularity_protection_bonus", 15, "capture risk they take off each execution"),
+    ("capture_risk_skip_threshold", 50, "capture risk from which laying low is allowed"),
+    ("capture_risk_skip_reduction", 10, "capture risk laying low takes off"),
+    ("popularity_skip_penalty", 5, "popularity laying low costs"),
+    ("danger_capture_risk", 2, "capture risk per danger level of an execution"),
+    ("detective_capture_risk", 10, "extra capture risk when a detective is on the case"),
+    ("capture_roll", (-5, 10), "random part of an execution's capture risk"),
+    ("danger_popularity", 3, "popularity per danger level of an execution"),
+    ("popularity_roll", (5, 15), "random part of an execution's popularity"),
+    ("danger_effectiveness", 2, "effectiveness per danger level of an execution"),
+    ("no_detective_danger", 7, "danger from which a target may have no detective"),
+    ("no_detective_chance", 0.5, "chance such a target has none"),
+    ("first_detective_kill_roll", (20, 40), "capture risk the first detective kill takes off"),
+    ("detective_kill_decrease_chance", 0.5, "chance a later detective kill lowers capture risk"),
+    ("detective_kill_decrease_roll", (15, 30), "how much it lowers it"),
+    ("detective_kill_increase_roll", (10, 30), "how much it raises it otherwise"),
+    ("events", None, "event table: a file, \"legacy\", or null for the game's default"),
+    ("breaking_news_chance", None, "chance of news after an execution; null for the table's"),
+    ("skip_news_chance", None, "chance of news after laying low; null for the table's"),
+    ("content", None, "compiled content pack (see judge.content), or null for the built-in content"),
+)
+
+
+class RulesetError(ValueError):
+    """A ruleset is malformed"""
+
+
+class Ruleset:
+    """One set of rules; immutable and hashable. Ruleset() is the classic game.
+
+    Fields are passed by keyword; the ones left out keep their classic
+    values. The hash is worked out once, so rulesets are cheap memo keys.
+    """
+
+    _fields = tuple(name for name, _, _ in _FIELDS)
+    __slots__ = _fields + ("_values", "_hash", "_derived")
+
+    def __init__(self, **values):
+        unknown = set(values) - set(self._fields)
+        if unknown:
+            raise TypeError("unknown rule(s) %s" % ", ".join(sorted(unknown)))
+        for name, default, _ in _FIELDS:
+            object.__setattr__(self, name, values.get(name, default))
+        object.__setattr__(self, "_values", tuple(getattr(self, name) for name in self._fields))
+        object.__setattr__(self, "_hash", hash(self._values))
+        object.__setattr__(self, "_derived", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("rulesets can't be changed; use _replace()")
+
+    __delattr__ = __setattr__
+
+    def __eq__(self, other):
+        if not isinstance(other, Ruleset):
+            return NotImplemented
+        return self is other or self._values == other._values
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return "Ruleset(%s)" % ", ".join("%s=%r" % item for item in self.changes().items())
+
+    def __reduce__(self):
+        return (_rebuild, (self._asdict(),))
+
+    def _asdict(self):
+        return dict(zip(self._fields, self._values))
+
+    def _replace(self, **changes):
+        """A copy with some fields changed"""
+        return Ruleset(**dict(self._asdict(), **changes))
+
+    def changes(self):
+        """{field: value} where this ruleset differs from CLASSIC"""
+        return {name: value for name, value in self._asdict().items()
+                if value != getattr(CLASSIC, name)}
+
+    def to_dict(self):
+        """The file form of the fields that differ from CLASSIC"""
+        return {name: list(value) if isinstance(value, tuple) else value
+                for name, value in self.changes().items()}
+
+
+def _rebuild(values):
+    return Ruleset(**values)
+
+
+CLASSIC = Ruleset()
+DESCRIPTIONS = {name: meaning for name, _, meaning in _FIELDS}
+
+
+def _check(name, value):
+    if name in RANGES:
+        if (not isinstance(value, (list, tuple)) or len(value) != 2
+                or not all(isinstance(v, int) and not isinstance(v, bool) for v in value)
+                or value[0] > value[1]):
+            raise RulesetError("%s must be a [low, high] pair of whole numbers" % name)
+        return tuple(value)
+    if name in CHANCES:
+        if value is None and name.endswith("news_chance"):
+            return None
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 1:
+            raise RulesetError("%s must be a probability between 0 and 1" % name)
+        return float(value)
+    if name == "events":
+        if value is not None and not isinstance(value, str):
+            raise RulesetError("events must be a file name, \"legacy\" or null")
+        return value
+    if name == "content":
+        if value is not None and not isinstance(value, str):
+            raise RulesetError("content must be a file name or null")
+        return value
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise RulesetError("%s must be a whole number of at least 0" % name)
+    if name == "max_turns" and value < 1:
+        raise RulesetError("max_turns must be at least 1")
+    return value
+
+
+def from_dict(data):
+    """A Ruleset from the file form (fields left out keep their classic values)"""
+    if not isinstance(data, dict):
+        raise RulesetError("a ruleset must be a JSON object")
+    if isinstance(data.get("rules"), dict):
+        data = data["rules"]
+    unknown = set(data) - set(Ruleset._fields)
+    if unknown:
+        raise RulesetError("unknown rule(s) %s" % ", ".join(sorted(unknown)))
+    return intern(Ruleset(**{name: _check(name, value) for name, value in data.items()}))
+
+
+_INTERNED = {}
+
+
+def intern(ruleset):
+    """The one shared instance of rulesets equal to `ruleset`"""
+    return _INTERNED.setdefault(ruleset, ruleset)
+
+
+def load(path):
+    """A Ruleset from a JSON file"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError as error:
+        raise RulesetError("%s is not valid JSON: %s" % (path, error)) from error
+    return from_dict(_with_absolute_files(data, os.path.dirname(os.path.abspath(path))))
+
+
+def _with_absolute_files(data, directory):
+    """`data` with the files its rules name made absolute, relative ones taken from `directory`"""
+    if not isinstance(data, dict):
+        return data
+    if isinstance(data.get("rules"), dict):
+        return dict(data, rules=_with_absolute_files(data["rules"], directory))
+    events = data.get("events")
+    if isinstance(events, str) and events != "legacy":
+        data = dict(data, events=os.path.abspath(os.path.join(directory, events)))
+    content = data.get("content")
+    if isinstance(content, str):
+        data = dict(data, content=os.path.abspath(os.path.join(directory, content)))
+    return data
+
+
+def dumps(ruleset):
+    """The file form of a ruleset, as compact JSON"""
+    return json.dumps(ruleset.to_dict(), sort_keys=True, separators=(",", ":"))
+
+
+class Derived:
+    """Tables built from a ruleset: its event table, content pack and the distributions of its rolls.
+
+    There is one per distinct ruleset, so it hashes and compares by identity:
+    a cheap memo key standing for its rules.
+    """
+
+    __slots__ = ("rules", "events", "content", "capture_roll", "popularity_roll", "detective_kill")
+
+    def __init__(self, rules, events, content, capture_roll, popularity_roll, detective_kill):
+        self.rules = rules
+        self.events = events
+        self.content = content
+        self.capture_roll = capture_roll
+        self.popularity_roll = popularity_roll
+        self.detective_kill = detective_kill
+
+
+def uniform(low, high):
+    """{value: probability} for randint(low, high)"""
+    return {value: 1.0 / (high - low + 1) for value in range(low, high + 1)}
+
+
+def derived(ruleset):
+    """The Derived tables of a ruleset, built once and shared.
+
+    events is None when the ruleset plays the engine's default table
+    unchanged (engine.EVENTS, looked up when used), content None when it
+    plays the built-in content (engine.CLASSIC_CONTENT). detective_kill is the
+    {change: probability} of the first detective kill and of later ones.
+    """
+    tables = ruleset._derived
+    if tables is None:
+        shared = intern(ruleset)
+        tables = shared._derived
+        if tables is None:
+            tables = _derive(shared)
+            object.__setattr__(shared, "_derived", tables)
+        object.__setattr__(ruleset, "_derived", tables)
+    return tables
+
+
+def _derive(ruleset):
+    table = None
+    if (ruleset.events is not None or ruleset.breaking_news_chance is not None
+            or ruleset.skip_news_chance is not None):
+        table = event_tables.load(ruleset.events)
+        table = event_tables.EventTable(
+            _with_chance(table.breaking_news, ruleset.breaking_news_chance),
+            _with_chance(table.skip_news, ruleset.skip_news_chance),
+            name=table.name)
+
+    first = {-value: p for value, p in uniform(*ruleset.first_detective_kill_roll).items()}
+    later = {}
+    chance = ruleset.detective_kill_decrease_chance
+    for value, p in uniform(*ruleset.detective_kill_decrease_roll).items():
+        later[-value] = later.get(-value, 0.0) + chance * p
+    for value, p in uniform(*ruleset.detective_kill_increase_roll).items():
+        later[value] = later.get(value, 0.0) + (1 - chance) * p
+    content = None if ruleset.content is None else content_packs.load(ruleset.content)
+    return Derived(ruleset, table, content, uniform(*ruleset.capture_roll),
+                   uniform(*ruleset.popularity_roll), (first, later))
+
+
+def _with_chance(section, chance):
+    if chance is None:
+        return section
+    return event_tables.EventSection(chance, section.specs)
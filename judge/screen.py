@@ -0,0 +1,412 @@
+"""
+Full-screen terminal front end for THE JUDGE (curses).
+
+The line-by-line game reprints the whole turn screen - banner, opinion bar,
+headline and every target card - each turn and streams the narration under
+it, so over a slow connection the scrollback grows by a few kilobytes a
+turn. ScreenRenderer instead keeps fixed panels:
+
+    stats      turn, public opinion, the capture risk warning
+    headline   this turn's news
+    targets    today's targets (and the forecast, with --forecast)
+    log        this turn's narration, typed in
+    prompts    the bottom two rows, where the player answers
+
+Each panel names the Game fields it is drawn from. Before every prompt the
+renderer compares them with the values it last drew and repaints only the
+panels whose fields changed; curses then sends just the cells that differ
+from what is on the terminal. The log is appended to (with runs of blank
+lines squeezed to one) and wiped once the player has decided the next turn,
+so it costs about what the narration itself costs. A prompt goes back to
+the row that last asked the same question, so the turn's question and the
+detective's stay put and are rewritten only where they differ.
+
+`python -m judge.screen` plays scripted games on a pseudo-terminal with
+both front ends and compares the bytes they send per turn.
+
+Usage:
+    python -m judge.screen
+    python -m judge.screen --games 10 --speed 0 --size 80x24
+"""
+
+import argparse
+import curses
+import locale
+import os
+import random
+import sys
+import textwrap
+import time
+from collections import deque, namedtuple
+
+from judge import engine
+from judge.render import FRAME_RATE, Renderer
+
+LOG_KEEP = 60  # log lines printed to the terminal after the screen closes
+MIN_LOG = 4  # rows the log keeps when the panels don't all fit
+# Asks for the emoji form of a symbol (the game's ⚠️ and 🛡️). Terminals draw
+# that two cells wide while curses counts one, which leaves the rest of the
+# row misplaced, so the screen shows the plain symbols
+EMOJI_STYLE = "\ufe0f"
+MAX_FRACTION = 0.5  # bytes per turn the panels may send, as a fraction of the turn screen's
+
+# title: shown in the rule above it; fields: the Game fields it is drawn from; lines(game): its text
+Panel = namedtuple("Panel", ["title", "fields", "lines"])
+
+
+def _stats(game):
+    return [game.turn_title(), "Opinion " + game.opinion_bar(), " ".join(game.risk_warning())]
+
+
+def _headline(game):
+    return [f"\"{game.headline}\""]
+
+
+def _targets(game):
+    lines = []
+    for i, criminal in enumerate(game.current_criminals, 1):
+        lines.append(f"[{i}] {criminal.name} - {criminal.crime}")
+        lines.append(f"    {'★' * criminal.danger_level}{'☆' * (10 - criminal.danger_level)}  "
+                     f"{game.detective_text(criminal)}")
+        if game.show_forecast:
+            lines.extend("    " + text.strip() for text in _text(game.display_forecast(i - 1)))
+    if game.show_forecast and engine.can_skip(game.state):
+        skip = [text.strip() for text in _text(game.display_skip_forecast())]
+        lines.extend([skip[0], "    " + skip[1]])
+    return lines
+
+
+def _text(ops):
+    """The non-blank lines a display generator writes"""
+    return [text for text in "".join(op.text for op in ops).split("\n") if text.strip()]
+
+
+PANELS = (
+    Panel("THE JUDGE", ("turn", "popularity", "capture_risk", "skips_remaining"), _stats),
+    Panel("NEWS HEADLINE", ("headline",), _headline),
+    # Every step advances the turn, so "turn" also stands in for the rest of
+    # the state the forecast reads
+    Panel("TODAY'S TARGETS", ("turn", "current_criminals", "killed_detectives", "executed_names"), _targets),
+)
+
+
+def panel_heights(game):
+    """Rows each panel is given: enough for its fullest frame"""
+    targets = 3 * 2  # up to three targets, two lines each
+    if game.show_forecast:
+        targets += 3 * 2 + 2  # arrest odds with and without the detective, then laying low
+    return [3, 2, targets]
+
+
+class ScreenRenderer(Renderer):
+    """Fixed panels repainted only when their Game fields change, above a typed log.
+
+    `game` is the Game whose session is run; `speed` scales the typewriter
+    and pauses like AnimatedRenderer's, and `instant` shows everything at
+    once. Prompts are read on the prompt rows unless `answer` is given.
+    """
+
+    panels = True
+
+    def __init__(self, game, speed=1.0, instant=False, frame_rate=FRAME_RATE, answer=None):
+        super().__init__(answer)
+        self.scripted = answer is not None
+        self.game = game
+        self.speed = speed
+        self.instant = instant
+        self.tick = 1.0 / frame_rate
+        self.windows = []  # (Panel, curses window) per panel
+        self.drawn = {}  # Panel: the field values it was last drawn from
+        self.log = None
+        self.prompts = None  # the two prompt rows
+        self.asked = [None, None]  # the prompt each row shows
+        self.last_row = 1  # the row asked on last
+        self.newlines = 2  # newlines ending the log so far; 2 squeezes blank lines at the top
+        self.log_turn = None  # the turn the log shows the narration of
+        self.tail = deque(maxlen=LOG_KEEP)  # the log's last lines, printed once the screen closes
+        self.tail.append("")
+
+    def run(self, script):
+        locale.setlocale(locale.LC_ALL, "")
+        curses.wrapper(self._run, script)
+        if not self.scripted:
+            sys.stdout.write("\n".join(self.tail).rstrip("\n") + "\n")
+            sys.stdout.flush()
+
+    def _run(self, screen, script):
+        self.layout(screen)
+        super().run(script)
+        if not self.scripted:
+            self.ask("\n\n(Press Enter to close the notebook)")
+
+    def layout(self, screen):
+        """Create the panel windows and draw the rules between them, once"""
+        rows, cols = screen.getmaxyx()
+        heights = panel_heights(self.game)
+        spare = rows - len(PANELS) - 1 - MIN_LOG - 2 - sum(heights)  # rules, log, prompt rows
+        if spare < 0:
+            heights[-1] = max(1, heights[-1] + spare)  # the targets give way first
+        try:
+            curses.curs_set(1)
+        except curses.error:
+            pass
+        y = 0
+        for panel, height in zip(PANELS, heights):
+            self._rule(screen, y, panel.title, cols)
+            self.windows.append((panel, curses.newwin(height, cols, y + 1, 0)))
+            y += height + 1
+        self._rule(screen, y, "NOTEBOOK", cols)
+        screen.noutrefresh()
+        self.log = curses.newwin(max(1, rows - y - 3), cols, y + 1, 0)
+        self.log.scrollok(True)
+        self.log.idlok(True)  # scroll with the terminal's own line scrolling
+        self.prompts = curses.newwin(2, cols, rows - 2, 0)
+
+    @staticmethod
+    def _rule(screen, y, title, cols):
+        try:
+            screen.addnstr(y, 0, ("-- %s " % title).ljust(cols, "-"), cols - 1)
+        except curses.error:
+            pass
+
+    def frame(self):
+        """Repaint the panels whose fields changed since they were last drawn"""
+        game = self.game
+        for panel, window in self.windows:
+            values = tuple(getattr(game, name) for name in panel.fields)
+            if self.drawn.get(panel) == values:
+                continue
+            self.drawn[panel] = values
+            height, width = window.getmaxyx()
+            window.erase()
+            rows = []
+            for text in panel.lines(game):
+                text = text.replace(EMOJI_STYLE, "")
+                rows.extend(textwrap.wrap(text, width - 1) or [""])
+            for y, text in enumerate(rows[:height]):
+                try:
+                    window.addstr(y, 0, text)
+                except curses.error:
+                    pass  # a wide character ran past the edge
+            window.noutrefresh()
+        self.log.noutrefresh()  # so the log's pending text goes out in the same update
+
+    def _add(self, text):
+        # At most one blank line in a row
+        head, *rest = text.replace(EMOJI_STYLE, "").split("\n")
+        if head:
+            self.newlines = 0
+        pieces = [head]
+        for piece in rest:
+            if self.newlines < 2:
+                pieces.append("\n")
+                self.newlines += 1
+            if piece:
+                pieces.append(piece)
+                self.newlines = 0
+        text = "".join(pieces)
+        try:
+            self.log.addstr(text)
+        except curses.error:
+            pass
+        head, *rest = text.split("\n")
+        self.tail[-1] += head
+        self.tail.extend(rest)
+
+    def write(self, text):
+        self._add(text)
+
+    def type_text(self, text, delay):
+        if self.instant:
+            self._add(text)
+            return
+        per_frame = self.tick * self.speed / delay  # characters per frame
+        start = time.perf_counter()
+        written = 0
+        frame = 0
+        while written < len(text):
+            frame += 1
+            due = min(len(text), max(written + 1, int(frame * per_frame)))
+            self._add(text[written:due])
+            self.log.refresh()
+            time.sleep(max(0.0, start + due * delay / self.speed - time.perf_counter()))
+            written = due
+
+    def pause(self, seconds):
+        if not self.instant:
+            self.log.refresh()
+            time.sleep(seconds / self.speed)
+
+    def ask(self, prompt):
+        self.frame()
+        text = prompt.lstrip("\n")
+        if text in self.asked:
+            row = self.asked.index(text)
+        else:
+            row = 1 - self.last_row
+            self.asked[row] = text
+        self.last_row = row
+        width = self.prompts.getmaxyx()[1]
+        self.prompts.move(row, 0)
+        self.prompts.clrtoeol()
+        try:
+            self.prompts.addnstr(row, 0, text, width - 4)  # room for the reply
+        except curses.error:
+            pass
+        self.prompts.noutrefresh()
+        curses.doupdate()
+        if self.scripted:
+            reply = self.answer(prompt)
+        else:
+            curses.echo()
+            try:
+                reply = self.prompts.getstr().decode("utf-8", "replace")
+            finally:
+                curses.noecho()
+        if self.log_turn != self.game.turn:
+            # The player has read how the last turn went: start this turn's
+            # narration on a clean log instead of scrolling the old one away
+            self.log_turn = self.game.turn
+            self.log.erase()
+            self.newlines = 2
+        return reply
+
+
+class _Counter:
+    """A stream that only counts the bytes written to it"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode("utf-8"))
+
+    def flush(self):
+        pass
+
+
+def _policy(seed):
+    """Scripted replies, the same sequence for the same seed"""
+    rng = random.Random(seed)
+
+    def answer(prompt):
+        if "Kill the detective" in prompt:
+            return rng.choice("yn")
+        return rng.choice(["1", "2", "1", "s"])
+    return answer
+
+
+def line_bytes(seed):
+    """(whole game, turn screens and prompts, turns) in bytes the line-by-line game sends for game `seed`"""
+    from judge.game import Game
+    from judge.render import InstantRenderer
+
+    stream = _Counter()
+    screens = _Counter()
+    policy = _policy(seed)
+    game = Game(random.Random(seed))
+    shown = set()
+
+    def answer(prompt):
+        if "Who will you judge" in prompt and game.turn not in shown:
+            shown.add(game.turn)
+            screens.write("".join(op.text for op in game.display_turn()))
+        reply = policy(prompt)
+        stream.write(prompt + reply + "\n")
+        screens.write(prompt + reply + "\n")
+        return reply
+    game.play(InstantRenderer(stream, answer), intro=False)
+    return stream.bytes, screens.bytes, len(shown)
+
+
+def screen_bytes(seed, speed, size, narrate=True):
+    """Bytes ScreenRenderer sends to a `size` (rows, cols) terminal for game `seed`.
+
+    Without `narrate` the game only asks, so only the panels and the prompt
+    row are drawn.
+    """
+    import fcntl
+    import pty
+    import struct
+    import termios
+
+    pid, master = pty.fork()
+    if pid == 0:
+        status = 1
+        try:
+            from judge.game import Game
+
+            fcntl.ioctl(1, termios.TIOCSWINSZ, struct.pack("HHHH", size[0], size[1], 0, 0))
+            os.environ["TERM"] = "xterm"
+            os.environ.pop("LINES", None)
+            os.environ.pop("COLUMNS", None)
+            game = Game(random.Random(seed))
+            renderer = ScreenRenderer(game, speed or 1.0, instant=not speed, answer=_policy(seed))
+            renderer.quiet = not narrate
+            game.play(renderer, intro=False)
+            status = 0
+        finally:
+            os._exit(status)
+    total = 0
+    try:
+        while True:
+            try:
+                chunk = os.read(master, 65536)
+            except OSError:  # EIO once the child has exited
+                break
+            if not chunk:
+                break
+            total += len(chunk)
+    finally:
+        os.close(master)
+        _, status = os.waitpid(pid, 0)
+    if status:
+        raise RuntimeError("the screen game for seed %d failed" % seed)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the bytes per turn of the line and full-screen front ends")
+    parser.add_argument("--games", type=int, default=5, help="scripted games to play with each")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first game")
+    parser.add_argument("--speed", type=float, default=20.0,
+                        help="typewriter speed of the screen games (0 for instant)")
+    parser.add_argument("--size", default="80x24", help="terminal COLSxROWS")
+    parser.add_argument("--max-fraction", type=float, default=MAX_FRACTION,
+                        help="fail if the panels send more than this fraction of the turn screens' bytes")
+    args = parser.parse_args(argv)
+    try:
+        cols, rows = (int(n) for n in args.size.lower().split("x"))
+    except ValueError:
+        parser.error("--size must look like 80x24")
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    print("bytes per turn        turn screen + prompts           whole game")
+    print("%-6s %6s %10s %10s %6s %10s %10s %6s"
+          % ("seed", "turns", "line", "panels", "ratio", "line", "screen", "ratio"))
+    totals = [0, 0, 0, 0, 0]
+    for seed in range(args.seed, args.seed + args.games):
+        sent, screens, turns = line_bytes(seed)
+        panels = screen_bytes(seed, args.speed, (rows, cols), narrate=False)
+        drawn = screen_bytes(seed, args.speed, (rows, cols))
+        row = (turns, screens, panels, sent, drawn)
+        totals = [total + n for total, n in zip(totals, row)]
+        print(_row(seed, *row))
+    print(_row("all", *totals))
+    turns, screens, panels, sent, drawn = totals
+    fraction = panels / screens
+    verdict = "FAIL" if fraction > args.max_fraction else "ok"
+    print("\n%s: the panels sent %.0f%% of the turn screens' bytes (budget %.0f%%); "
+          "%.0f%% of the whole game's, narration included"
+          % (verdict, fraction * 100, args.max_fraction * 100, drawn / sent * 100))
+    return 1 if verdict == "FAIL" else 0
+
+
+def _row(label, turns, screens, panels, sent, drawn):
+    return "%-6s %6d %10.0f %10.0f %6.2f %10.0f %10.0f %6.2f" % (
+        label, turns, screens / turns, panels / turns, panels / screens, sent / turns, drawn / turns, drawn / sent)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Multi-session network server for THE JUDGE.
+
+Every TCP connection gets its own Game, and all of them share one asyncio
+event loop: the typewriter effect is paced with asyncio.sleep instead of
+time.sleep, and prompts wait on the connection instead of input(), so idle
+players and players in the middle of an animation cost nothing but memory.
+
+Typed text is written a tick's worth of characters at a time (same speed as
+the terminal, far fewer wake-ups) and text shown at once is gathered into a
+single write per pause or prompt. A session whose client stops reading waits
+once its write buffer is full, so a slow client only ever holds up its own
+game, and is dropped after the idle timeout. Plain telnet
+works as a client; each prompt is followed by a telnet Go Ahead so scripted
+clients (see judge.loadgen) know when it is their turn.
+
+Given several --rules files the server is an A/B test: sessions take turns
+between the rulesets (session number modulo their count), all played in the
+same process, and the rules derived tables are built once per ruleset.
+
+Usage:
+    python -m judge.server --port 4000
+    python -m judge.server --rules classic.json --rules fewer_skips.json
+    python -m judge.server --leaderboard scores.db
+    telnet localhost 4000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+
+from judge import instrument, rules as rulesets
+from judge.advisor import Advisor
+from judge.game import Game
+from judge.leaderboard import LeaderboardWriter
+from judge.render import Prompt, Pause
+
+DEFAULT_PORT = 4000
+TICK = 0.05  # at most one typewriter write per session per tick
+IDLE_TIMEOUT = 600  # seconds a session may sit at a prompt or stalled write
+WRITE_BUFFER_HIGH = 64 * 1024  # bytes buffered per connection before writes wait
+MAX_LINE = 1024
+BACKLOG = 4096  # pending connections, so a burst of players is queued, not refused
+
+IAC = 255
+GO_AHEAD = bytes([IAC, 249])
+_SUBNEGOTIATION_START, _SUBNEGOTIATION_END = 250, 240
+_OPTION_COMMANDS = range(251, 255)  # WILL, WONT, DO, DONT
+
+
+def telnet_text(text):
+    """Encode game text for a telnet connection"""
+    return text.replace("\n", "\r\n").encode("utf-8")
+
+
+def strip_telnet(data):
+    """Decode one line from a client, dropping telnet commands"""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte != IAC:
+            out.append(byte)
+            i += 1
+        elif i + 1 < len(data) and data[i + 1] == IAC:
+            out.append(IAC)
+            i += 2
+        elif i + 1 < len(data) and data[i + 1] == _SUBNEGOTIATION_START:
+            end = data.find(bytes([IAC, _SUBNEGOTIATION_END]), i + 2)
+            i = len(data) if end < 0 else end + 2
+        elif i + 1 < len(data) and data[i + 1] in _OPTION_COMMANDS:
+            i += 3
+        else:
+            i += 2
+    return out.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+class Session:
+    """One connection playing its own Game"""
+
+    def __init__(self, reader, writer, rng, instant=False, idle_timeout=IDLE_TIMEOUT, hints=None,
+                 rules=rulesets.CLASSIC, leaderboard=None):
+        self.reader = reader
+        self.writer = writer
+        self.game = Game(rng, rules=rules)
+        self.game.leaderboard = leaderboard
+        if hints:
+            self.game.advisor = Advisor(hints)
+        self.instant = instant
+        self.idle_timeout = idle_timeout
+        self.pending = []  # instant text not yet sent
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+
+    async def send(self, data):
+        self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > WRITE_BUFFER_HIGH:
+            # Only a client that stopped reading gets here; give up on it eventually
+            await asyncio.wait_for(self.writer.drain(), self.idle_timeout)
+
+    async def write(self, op):
+        """Show a Write op, typing it out at its own pace"""
+        if self.instant or not op.delay:
+            self.pending.append(op.text)
+            return
+        await self.flush()
+        step = max(1, int(TICK / op.delay))
+        for start in range(0, len(op.text), step):
+            chunk = op.text[start:start + step]
+            await self.send(telnet_text(chunk))
+            await asyncio.sleep(len(chunk) * op.delay)
+
+    async def flush(self):
+        """Send text that was shown at once, in a single write"""
+        if self.pending:
+            text = "".join(self.pending)
+            self.pending.clear()
+            await self.send(telnet_text(text))
+
+    async def ask(self, prompt):
+        """Send a prompt and wait for the reply line; None if the player left"""
+        self.pending.append(prompt)
+        text = "".join(self.pending)
+        self.pending.clear()
+        await self.send(telnet_text(text) + GO_AHEAD)
+        data = await asyncio.wait_for(self.reader.readline(), self.idle_timeout)
+        if not data:
+            return None
+        return strip_telnet(data)
+
+    async def run(self):
+        script = self.game.session()
+        reply = None
+        try:
+            while True:
+                try:
+                    op = script.send(reply)
+                except StopIteration:
+                    break
+                reply = None
+                if type(op) is Prompt:
+                    reply = await self.ask(op.text)
+                    if reply is None:
+                        break
+                elif type(op) is Pause:
+                    if not self.instant:
+                        await self.flush()
+                        await asyncio.sleep(op.seconds)
+                else:
+                    await self.write(op)
+            await self.flush()
+        finally:
+            script.close()
+
+
+class GameServer:
+    """Accepts connections and runs one Session per player"""
+
+    def __init__(self, seed=None, instant=False, idle_timeout=IDLE_TIMEOUT, max_sessions=10000,
+                 hints=None, rules=(rulesets.CLASSIC,), leaderboard=None):
+        self.seed = seed
+        self.leaderboard = leaderboard  # judge.leaderboard.LeaderboardWriter shared by every session
+        self.hints = hints  # seconds each hint may search, None for no hints
+        self.rules = tuple(rules)  # Rulesets sessions take turns between
+        self.instant = instant
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.active = 0
+        self.served = 0
+
+    def session_rng(self, number):
+        """Reproducible stream per session when seeded, fresh entropy otherwise"""
+        if self.seed is None:
+            return random.Random()
+        return random.Random("judge-server:%s:%d" % (self.seed, number))
+
+    def session_rules(self, number):
+        """The Ruleset session `number` plays by"""
+        return self.rules[number % len(self.rules)]
+
+    async def handle(self, reader, writer):
+        if self.active >= self.max_sessions:
+            writer.write(telnet_text("The notebook is in use. Try again later.\n"))
+            writer.close()
+            return
+        number = self.served
+        self.served += 1
+        self.active += 1
+        try:
+            session = Session(reader, writer, self.session_rng(number), self.instant,
+                              self.idle_timeout, self.hints, self.session_rules(number),
+                              self.leaderboard)
+            await session.run()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError):
+            pass  # the player dropped, stalled or sent garbage; only their session ends
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start listening and return the asyncio Server"""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE, backlog=BACKLOG)
+
+
+async def serve(host, port, **options):
+    server = await GameServer(**options).start(host, port)
+    for sock in server.sockets:
+        print("Serving THE JUDGE on %s:%d" % sock.getsockname()[:2])
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-session network server for THE JUDGE")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--seed", default=None, help="make every session's game reproducible")
+    parser.add_argument("--instant", action="store_true", help="no typewriter effect or pauses")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="seconds before an unresponsive session is dropped")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="concurrent players")
+    parser.add_argument("--hints", metavar="MS", type=float, default=None,
+                        help="answer 'h' with a hint searched for MS milliseconds (it blocks the event loop that long)")
+    parser.add_argument("--rules", metavar="FILE", action="append", default=[],
+                        help="ruleset file (see judge.rules); repeat to split sessions between rulesets")
+    parser.add_argument("--leaderboard", metavar="FILE",
+                        help="record every finished game in a leaderboard database (see judge.leaderboard)")
+    parser.add_argument("--profile", metavar="SPEC",
+                        help="time the game's phases: summary, folded:FILE, cprofile:FILE (see judge.instrument)")
+    args = parser.parse_args(argv)
+    try:
+        instrument.configure(args.profile)
+    except ValueError as error:
+        parser.error(str(error))
+    try:
+        rules = [rulesets.load(path) for path in args.rules] or [rulesets.CLASSIC]
+    except (OSError, ValueError) as error:
+        parser.error("can't load rules: %s" % error)
+    leaderboard = None
+    if args.leaderboard:
+        try:
+            leaderboard = LeaderboardWriter(args.leaderboard)
+        except sqlite3.Error as error:
+            parser.error("can't open leaderboard %s: %s" % (args.leaderboard, error))
+
+    try:
+        asyncio.run(serve(args.host, args.port, seed=args.seed, instant=args.instant,
+                          idle_timeout=args.idle_timeout, max_sessions=args.max_sessions,
+                          hints=args.hints / 1000 if args.hints else None, rules=rules,
+                          leaderboard=leaderboard))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if leaderboard is not None:
+            leaderboard.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
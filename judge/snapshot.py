@@ -0,0 +1,289 @@
+"""
+Compact binary snapshots and action logs for THE JUDGE.
+
+A snapshot is a GameState plus the state of its random number generator,
+packed into a few kilobytes (almost all of it the Mersenne Twister state).
+Names are stored as positions in the content databases - executed names as
+one bitmask for criminals and one for detectives, this turn's offer as
+(criminal, detective) index pairs, the headline as an index into the
+headline lists, the game's rules as the JSON of how they differ from the
+classic ones (empty for a classic game) - and a checksum of the databases
+guards against loading a snapshot into a game with different content.
+Games playing a content pack (judge.content) can't be saved.
+Saving or loading one takes a few microseconds, so a game can checkpoint
+after every turn. Version 1 snapshots, from before rulesets, load as
+classic games.
+
+An action log is an append-only file: a snapshot of the starting point, one
+two-byte record per decision, and a snapshot of the final state once the
+game is over. Because the engine draws every random number from the saved
+generator, replaying the decisions headlessly (judge.replay) must land on
+exactly the recorded final state.
+"""
+
+import json
+import os
+import random
+import struct
+import zlib
+from array import array
+
+from judge import engine, rules
+from judge.engine import (
+    CRIMINAL_DATABASE,
+    DETECTIVE_DATABASE,
+    Criminal,
+    GameState,
+    Action,
+)
+
+MAGIC = b"JDG"
+VERSION = 2
+READABLE = (1, 2)
+NO_INDEX = 0xFFFF
+
+_HEADLINES = tuple(engine.LOW_POP_HEADLINES + engine.MEDIUM_POP_HEADLINES
+                   + engine.HIGH_POP_HEADLINES + engine.UNSTOPPABLE_HEADLINES)
+_HEADLINE_INDEX = {headline: i for i, headline in enumerate(_HEADLINES)}
+_CRIMINAL_INDEX = {c.name: i for i, c in enumerate(CRIMINAL_DATABASE)}
+_DETECTIVE_INDEX = {name: i for i, name in enumerate(DETECTIVE_DATABASE)}
+_CRIMINAL_MASK_BYTES = (len(CRIMINAL_DATABASE) + 7) // 8
+_DETECTIVE_MASK_BYTES = (len(DETECTIVE_DATABASE) + 7) // 8
+
+# Snapshots only make sense against the content they were made with
+CONTENT_CHECKSUM = zlib.crc32("\0".join(
+    [c.name for c in CRIMINAL_DATABASE] + list(DETECTIVE_DATABASE) + list(_HEADLINES)
+).encode("utf-8"))
+
+_HEADER = struct.Struct("<3sBI")
+# turn, effectiveness, popularity, capture risk, detectives killed, skips,
+# high popularity streak, headline, flags (game over, won, has rng), offer size
+_STATE = struct.Struct("<IiHHHHIHBB")
+_OFFER = struct.Struct("<HH")
+_RULES = struct.Struct("<H")  # length of the rules JSON
+_RNG = struct.Struct("<BBd")  # version, has gauss_next, gauss_next
+_RNG_WORDS = 625
+
+_GAME_OVER, _WON, _HAS_RNG = 1, 2, 4
+
+
+class SnapshotError(ValueError):
+    """The data is not a snapshot or log this version of the game can read"""
+
+
+def dumps(state, rng=None):
+    """Pack a GameState (and optionally its rng's state) into bytes"""
+    if state.cooldown:
+        raise SnapshotError("endless games can't be saved: their targets aren't in the databases")
+    if state.rules.content is not None:
+        raise SnapshotError("games with a content pack can't be saved: their targets aren't in the databases")
+    criminals = detectives = 0
+    for name in state.executed_names:
+        index = _CRIMINAL_INDEX.get(name)
+        if index is not None:
+            criminals |= 1 << index
+        else:
+            detectives |= 1 << _DETECTIVE_INDEX[name]
+
+    flags = (_GAME_OVER if state.game_over else 0) | (_WON if state.won else 0)
+    rng_state = None
+    if rng is not None:
+        flags |= _HAS_RNG
+        rng_state = rng.getstate()
+
+    headline = NO_INDEX if state.headline is None else _HEADLINE_INDEX[state.headline]
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, CONTENT_CHECKSUM),
+        _STATE.pack(state.turn, state.effectiveness, state.popularity, state.capture_risk,
+                    state.killed_detectives, state.skips_remaining,
+                    state.turns_with_high_popularity, headline, flags,
+                    len(state.current_criminals)),
+        criminals.to_bytes(_CRIMINAL_MASK_BYTES, "little"),
+        detectives.to_bytes(_DETECTIVE_MASK_BYTES, "little"),
+    ]
+    for criminal in state.current_criminals:
+        detective = criminal.detective_in_charge
+        parts.append(_OFFER.pack(_CRIMINAL_INDEX[criminal.name],
+                                 NO_INDEX if detective is None else _DETECTIVE_INDEX[detective]))
+    ruleset = b"" if state.rules == rules.CLASSIC else rules.dumps(state.rules).encode("utf-8")
+    parts.append(_RULES.pack(len(ruleset)))
+    parts.append(ruleset)
+    if rng_state is not None:
+        version, internal, gauss_next = rng_state
+        parts.append(_RNG.pack(version, gauss_next is not None, gauss_next or 0.0))
+        parts.append(array("I", internal).tobytes())
+    return b"".join(parts)
+
+
+def _names(mask, database):
+    names = []
+    index = 0
+    while mask:
+        if mask & 1:
+            names.append(database[index])
+        mask >>= 1
+        index += 1
+    return names
+
+
+def loads(data):
+    """Unpack bytes from dumps(); returns (state, rng), rng None if not saved"""
+    try:
+        magic, version, checksum = _HEADER.unpack_from(data)
+        if magic != MAGIC or version not in READABLE:
+            raise SnapshotError("not a THE JUDGE snapshot (or from another version)")
+        if checksum != CONTENT_CHECKSUM:
+            raise SnapshotError("snapshot was made with different criminals, detectives or headlines")
+        offset = _HEADER.size
+        (turn, effectiveness, popularity, capture_risk, killed_detectives, skips_remaining,
+         streak, headline, flags, offered) = _STATE.unpack_from(data, offset)
+        offset += _STATE.size
+
+        criminals = int.from_bytes(data[offset:offset + _CRIMINAL_MASK_BYTES], "little")
+        offset += _CRIMINAL_MASK_BYTES
+        detectives = int.from_bytes(data[offset:offset + _DETECTIVE_MASK_BYTES], "little")
+        offset += _DETECTIVE_MASK_BYTES
+        executed = [c.name for c in _names(criminals, CRIMINAL_DATABASE)]
+        executed += _names(detectives, DETECTIVE_DATABASE)
+
+        current = []
+        for _ in range(offered):
+            criminal, detective = _OFFER.unpack_from(data, offset)
+            offset += _OFFER.size
+            name, crime, danger = CRIMINAL_DATABASE[criminal]
+            current.append(Criminal(name, crime, danger,
+                                    None if detective == NO_INDEX else DETECTIVE_DATABASE[detective]))
+
+        ruleset = rules.CLASSIC
+        if version >= 2:
+            (length,) = _RULES.unpack_from(data, offset)
+            offset += _RULES.size
+            if length:
+                ruleset = rules.from_dict(json.loads(data[offset:offset + length].decode("utf-8")))
+            offset += length
+
+        rng = None
+        if flags & _HAS_RNG:
+            version, has_gauss, gauss_next = _RNG.unpack_from(data, offset)
+            offset += _RNG.size
+            internal = array("I")
+            internal.frombytes(data[offset:offset + 4 * _RNG_WORDS])
+            offset += 4 * _RNG_WORDS
+            rng = random.Random()
+            rng.setstate((version, tuple(internal), gauss_next if has_gauss else None))
+        if offset != len(data):
+            raise SnapshotError("snapshot has %d unexpected trailing bytes" % (len(data) - offset))
+    except SnapshotError:
+        raise
+    except rules.RulesetError as error:
+        raise SnapshotError("snapshot has rules this version can't play: %s" % error) from error
+    except (struct.error, IndexError, ValueError) as error:
+        raise SnapshotError("corrupt snapshot: %s" % error) from error
+
+    state = GameState(
+        turn=turn,
+        effectiveness=effectiveness,
+        popularity=popularity,
+        capture_risk=capture_risk,
+        killed_detectives=killed_detectives,
+        skips_remaining=skips_remaining,
+        turns_with_high_popularity=streak,
+        executed_names=frozenset(executed),
+        current_criminals=tuple(current),
+        headline=None if headline == NO_INDEX else _HEADLINES[headline],
+        game_over=bool(flags & _GAME_OVER),
+        won=bool(flags & _WON),
+        rules=ruleset,
+    )
+    return state, rng
+
+
+def save(path, state, rng=None):
+    """Write a snapshot file atomically (a crash never leaves half a save)"""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(dumps(state, rng))
+    os.replace(temporary, path)
+
+
+def load(path):
+    """(state, rng) from a snapshot file"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+# -- action logs ----------------------------------------------------------
+
+_START, _ACTION, _END = b"S", b"A", b"E"
+_LENGTH = struct.Struct("<I")
+_SKIP_CODE = 0xFF
+
+
+def encode_action(action):
+    """One byte: 0xFF to skip, else target index * 2 + kill detective"""
+    if action.index == engine.SKIP_INDEX:
+        return _SKIP_CODE
+    return action.index << 1 | bool(action.kill_detective)
+
+
+def decode_action(code):
+    if code == _SKIP_CODE:
+        return engine.SKIP_TURN
+    return Action(code >> 1, bool(code & 1))
+
+
+class ActionLog:
+    """Append-only record of one game: start snapshot, decisions, end snapshot"""
+
+    def __init__(self, path, state, rng):
+        self.file = open(path, "wb")
+        self._snapshot(_START, state, rng)
+
+    def _snapshot(self, kind, state, rng):
+        data = dumps(state, rng)
+        self.file.write(kind + _LENGTH.pack(len(data)) + data)
+        self.file.flush()
+
+    def append(self, action):
+        self.file.write(_ACTION + bytes([encode_action(action)]))
+        self.file.flush()
+
+    def finish(self, state, rng):
+        """Record the final state and close the log"""
+        self._snapshot(_END, state, rng)
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+
+def read_log(path):
+    """(start snapshot bytes, [Action], end snapshot bytes or None) from a log file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    start = end = None
+    actions = []
+    offset = 0
+    try:
+        while offset < len(data):
+            kind = data[offset:offset + 1]
+            offset += 1
+            if kind == _ACTION:
+                actions.append(decode_action(data[offset]))
+                offset += 1
+            elif kind in (_START, _END):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                offset += _LENGTH.size
+                snapshot = data[offset:offset + length]
+                offset += length
+                if kind == _START:
+                    start = snapshot
+                else:
+                    end = snapshot
+            else:
+                raise SnapshotError("unknown record %r at byte %d" % (kind, offset - 1))
+    except (struct.error, IndexError) as error:
+        raise SnapshotError("truncated action log") from error
+    if start is None:
+        raise SnapshotError("action log has no starting snapshot")
+    return start, actions, end
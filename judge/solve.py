@@ -0,0 +1,466 @@
+"""
+Exact optimal-policy solver for THE JUDGE.
+
+The game is a finite Markov decision process. Before the targets are drawn, a
+turn is described by (turn, popularity, capture risk, skips remaining,
+detectives killed); the offer then adds each target's danger level and
+whether a detective is on the case. The solver computes, by backward
+induction from the last turn, the maximum probability of surviving to the end
+from every such state, using the exact distributions of
+calculate_capture_risk (randint(-5, 10)), the popularity gain
+(randint(5, 15)), calculate_detective_kill_risk, popularity protection,
+the random events of the event table and the 0/100 clamping in execute.
+Only event tables without turn or stat conditions can be solved.
+
+Each (turn, skips, killed) layer is a 101 x 101 popularity-by-risk table,
+computed with whole-array operations: the dice are separable convolutions
+over the two axes, and the expectation over offers uses the elementary
+symmetric polynomials of the targets' value distributions (targets are drawn
+without replacement from the turn's pool).
+
+Modelling notes - the things the solved state deliberately leaves out:
+  * The high popularity streak only picks headlines, so it has no effect on
+    the outcome and is dropped.
+  * Which names have already been executed is not tracked: every turn's
+    offer is drawn from the full tier pool of generate_criminals. In real
+    games executed criminals leave the pool, so late-game offers differ a
+    little; `--verify` plays the solver's policy in the real engine to show
+    the size of that gap.
+  * Detective pools never run dry (at most four detectives can be killed),
+    so targets below danger 7 always have a detective and targets of danger
+    7+ have one half of the time.
+
+Answers for concrete states are kept in a transposition table keyed on a
+packed state integer. Layers are stored at checkpoints and recomputed on
+demand through a bounded LRU cache, so memory stays flat for long games.
+
+NumPy is required. Usage:
+    python -m judge.solve
+    python -m judge.solve --verify 20000
+    python -m judge.solve --max-turns 500 --max-layers 16
+"""
+
+import argparse
+import math
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from judge import engine
+from judge import events as event_tables
+from judge.forecast import (
+    CAPTURE_RANDOM,
+    POPULARITY_RANDOM,
+    convolve as _convolve,
+    detective_kill_distribution,
+)
+from judge.engine import (
+    MAX_TURNS,
+    MAX_SKIPS,
+    POPULARITY_PROTECTION_THRESHOLD,
+    POPULARITY_PROTECTION_BONUS,
+    CAPTURE_RISK_SKIP_THRESHOLD,
+    CAPTURE_RISK_SKIP_REDUCTION,
+    POPULARITY_SKIP_PENALTY,
+    DETECTIVE_NAMES_HIDDEN_THRESHOLD,
+    CRIMINAL_DATABASE,
+    Action,
+)
+
+STAT_SIZE = 101  # popularity and capture risk both run 0-100
+MAX_KILLS = DETECTIVE_NAMES_HIDDEN_THRESHOLD  # no detective can be reached after this
+NO_DETECTIVE_DANGER = 7  # targets this dangerous go without a detective half the time
+TUTORIAL_TARGET = (1, True)  # Marcus Webb, with Detective Sarah Chen
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("the solver needs NumPy: pip install numpy")
+
+
+def pack_state(turn, popularity, capture_risk, skips_remaining, killed_detectives, offer=()):
+    """Pack a decision state into one integer.
+
+    Layout from the low bits: capture risk (7), popularity (7), skips (4),
+    detectives killed (3), up to three offered targets (5 bits each: danger
+    level * 2 + has detective, sorted), then the turn.
+    """
+    key = 0
+    for danger, has_detective in sorted(offer):
+        key = (key << 5) | (danger << 1) | has_detective
+    key |= len(offer) << 15
+    return ((((turn << 17 | key) << 3 | killed_detectives) << 4 | skips_remaining) << 7
+            | popularity) << 7 | capture_risk
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def _pool_counts(turn):
+    """{danger: count} of the full target pool generate_criminals uses on this turn"""
+    counts = {}
+    for _, _, danger in engine.CRIMINAL_TIERS[engine.pool_tier(turn)]:
+        counts[danger] = counts.get(danger, 0) + 1
+    return counts
+
+
+def _elementary_symmetric(power_sums, k):
+    """e_k from power sums p_1..p_k (Newton's identities)"""
+    e = [1.0]
+    for m in range(1, k + 1):
+        total = 0.0
+        for i in range(1, m + 1):
+            total = total + (-1) ** (i - 1) * e[m - i] * power_sums[i]
+        e.append(total / m)
+    return e[k]
+
+
+class Solver:
+    """Backward-induction solver with bounded layer storage.
+
+    A layer holds, for one turn, the win probability of every
+    (skips remaining, detectives killed, popularity, capture risk) state
+    before that turn's targets are drawn.
+    """
+
+    def __init__(self, max_turns=MAX_TURNS, max_layers=32, cache_size=1 << 16, events=None):
+        _require_numpy()
+        self.max_turns = max_turns
+        events = events or engine.EVENTS
+        self.news = events.breaking_news.outcomes()
+        self.skip_news = events.skip_news.outcomes()
+        self.max_layers = max(2, max_layers)
+        # Half the layer budget goes to evenly spaced checkpoints, the rest to
+        # recently used layers recomputed from them
+        self.interval = max(1, math.ceil(max_turns / (self.max_layers // 2)))
+        self.checkpoints = {}
+        self.layers = LRUCache(self.max_layers - self.max_layers // 2)
+        self.table = LRUCache(cache_size)
+        self.after = LRUCache(64)  # post-dice grids used by queries
+        self.start_value = None
+
+        dangers = sorted({c[2] for c in CRIMINAL_DATABASE})
+        self.dangers = dangers
+        kernels = {False: CAPTURE_RANDOM}
+        kernels[True] = _convolve(CAPTURE_RANDOM, detective_kill_distribution(1))
+        self.kernels = {kill: (np.array(sorted(k)), np.array([k[v] for v in sorted(k)]))
+                        for kill, k in kernels.items()}
+        low = min(min(offsets) for offsets, _ in self.kernels.values())
+        high = max(max(offsets) for offsets, _ in self.kernels.values())
+        # Risk before dice: r + 2d + 10 for the detective bonus
+        self.base_risk_size = STAT_SIZE + 2 * dangers[-1] + 10
+        self.risk_low = low
+        self.risk_size = self.base_risk_size + high - low
+        # Popularity before dice: p + 3d
+        self.base_pop_size = STAT_SIZE + 3 * dangers[-1]
+        self.pop_size = self.base_pop_size + max(POPULARITY_RANDOM)
+        self._pop_offsets = np.array(sorted(POPULARITY_RANDOM))
+        self._pop_probs = np.array([POPULARITY_RANDOM[z] for z in sorted(POPULARITY_RANDOM)])
+        self._build_outcome_index()
+
+    # -- tables -----------------------------------------------------------
+
+    def _build_outcome_index(self):
+        """Where every (popularity, risk) after the dice lands next turn"""
+        pp = np.arange(self.pop_size)[:, None]
+        rr = np.arange(self.risk_size)[None, :] + self.risk_low
+        protected = pp >= POPULARITY_PROTECTION_THRESHOLD
+        risk = np.where(protected, np.maximum(0, rr - POPULARITY_PROTECTION_BONUS), rr)
+        risk = np.clip(risk, 0, 100)
+        popularity = np.minimum(pp, 100)
+        self._safe = risk < 100
+        self._stay = (np.broadcast_to(popularity, risk.shape), np.minimum(risk, 100))
+        self._news = [(p, (np.broadcast_to(np.clip(popularity + dp, 0, 100), risk.shape),
+                           np.clip(risk + dr, 0, 100)))
+                      for p, dp, dr in self.news]
+
+    def _after_dice(self, next_values):
+        """Win probability for each (popularity, risk) right after the dice.
+
+        next_values is the next turn's 101 x 101 table, or None on the last
+        turn, where surviving the arrest check wins.
+        """
+        if next_values is None:
+            return self._safe.astype(np.float64)
+        value = (1 - sum(p for p, _ in self._news)) * next_values[self._stay]
+        for p, landed in self._news:
+            value += p * next_values[landed]
+        return np.where(self._safe, value, 0.0)
+
+    def _expected(self, after_dice, kill):
+        """Expectation of after_dice over the dice, indexed by pre-dice (pop, risk)"""
+        offsets, probs = self.kernels[kill]
+        width = self.base_risk_size
+        by_risk = np.zeros((self.pop_size, width))
+        for offset, p in zip(offsets, probs):
+            start = offset - self.risk_low
+            by_risk += p * after_dice[:, start:start + width]
+        height = self.base_pop_size
+        out = np.zeros((height, width))
+        for offset, p in zip(self._pop_offsets, self._pop_probs):
+            out += p * by_risk[offset:offset + height]
+        return out
+
+    @staticmethod
+    def _target_value(expected, danger, has_detective):
+        """Value of executing one target, per current (popularity, risk)"""
+        base = 2 * danger + (10 if has_detective else 0)
+        return expected[3 * danger:3 * danger + STAT_SIZE, base:base + STAT_SIZE]
+
+    def _skip_value(self, next_values):
+        """Value of laying low, or 0 where skipping is not allowed"""
+        if next_values is None:
+            landed = np.ones((STAT_SIZE, STAT_SIZE))
+        else:
+            index = np.arange(STAT_SIZE)
+            landed = self._skip_landing(next_values, index[:, None], index[None, :])
+        allowed = np.arange(STAT_SIZE)[None, :] >= CAPTURE_RISK_SKIP_THRESHOLD
+        return np.where(allowed, landed, 0.0)
+
+    def _skip_landing(self, next_values, popularity, risk):
+        """Next-turn value after laying low from (popularity, risk), news included"""
+        popularity = np.maximum(0, popularity - POPULARITY_SKIP_PENALTY)
+        risk = np.maximum(0, risk - CAPTURE_RISK_SKIP_REDUCTION)
+        value = (1 - sum(p for p, _, _ in self.skip_news)) * next_values[popularity, risk]
+        for p, dp, dr in self.skip_news:
+            value = value + p * next_values[np.clip(popularity + dp, 0, 100), np.clip(risk + dr, 0, 100)]
+        return value
+
+    # -- one layer --------------------------------------------------------
+
+    def _offer_expectation(self, turn, values, floor):
+        """E[max(floor, best offered target)] over the turn's offer.
+
+        values maps (danger, has_detective) to that target's value table.
+        """
+        if turn == 1:
+            return np.maximum(floor, values[TUTORIAL_TARGET])
+        counts = _pool_counts(turn)
+        total = sum(counts.values())
+        k = min(min(3, 2 + (turn // 5)), total)
+        thresholds = np.sort(np.stack([floor] + list(values.values())), axis=0)
+
+        power_sums = [None] + [np.zeros_like(thresholds) for _ in range(k)]
+        for danger, count in counts.items():
+            if danger >= NO_DETECTIVE_DANGER:
+                below = 0.5 * (values[(danger, True)] <= thresholds) \
+                    + 0.5 * (values[(danger, False)] <= thresholds)
+            else:
+                below = (values[(danger, True)] <= thresholds).astype(np.float64)
+            for m in range(1, k + 1):
+                power_sums[m] += count * below ** m
+        all_below = _elementary_symmetric(power_sums, k) / math.comb(total, k)
+        cdf = all_below * (floor <= thresholds)
+        mass = np.diff(cdf, axis=0, prepend=0.0)
+        return (mass * thresholds).sum(axis=0)
+
+    def _compute_layer(self, turn, next_layer):
+        layer = np.zeros((MAX_SKIPS + 1, MAX_KILLS + 1, STAT_SIZE, STAT_SIZE))
+        types = [(d, True) for d in self.dangers] + \
+            [(d, False) for d in self.dangers if d >= NO_DETECTIVE_DANGER]
+        for skips in range(MAX_SKIPS + 1):
+            spare = [None] * (MAX_KILLS + 1)
+            kill = [None] * (MAX_KILLS + 1)
+            for killed in range(MAX_KILLS + 1):
+                after = self._after_dice(None if next_layer is None else next_layer[skips, killed])
+                spare[killed] = self._expected(after, False)
+                if killed > 0:
+                    kill[killed] = self._expected(after, True)
+            for killed in range(MAX_KILLS + 1):
+                values = {}
+                for danger, has_detective in types:
+                    value = self._target_value(spare[killed], danger, has_detective)
+                    if has_detective and killed < MAX_KILLS:
+                        value = np.maximum(value, self._target_value(kill[killed + 1], danger, True))
+                    values[(danger, has_detective)] = value
+                if skips > 0:
+                    floor = self._skip_value(None if next_layer is None else next_layer[skips - 1, killed])
+                else:
+                    floor = np.zeros((STAT_SIZE, STAT_SIZE))
+                layer[skips, killed] = self._offer_expectation(turn, values, floor)
+        return layer
+
+    # -- storage ----------------------------------------------------------
+
+    def solve(self):
+        """Solve the whole game; returns the win probability from the start"""
+        next_layer = None
+        for turn in range(self.max_turns, 0, -1):
+            layer = self._compute_layer(turn, next_layer)
+            self._store(turn, layer)
+            next_layer = layer
+        self.start_value = float(next_layer[MAX_SKIPS, 0, 0, 0])
+        return self.start_value
+
+    def _store(self, turn, layer):
+        if turn % self.interval == 0 or turn == 1:
+            self.checkpoints[turn] = layer
+        else:
+            self.layers.put(turn, layer)
+
+    def layer(self, turn):
+        """Values for `turn` (None past the last turn), recomputing if evicted"""
+        if turn > self.max_turns:
+            return None
+        if self.start_value is None:
+            self.solve()
+        found = self.checkpoints.get(turn)
+        if found is None:
+            found = self.layers.get(turn)
+        if found is not None:
+            return found
+        # Recompute down from the nearest layer still held above this one
+        above = turn + 1
+        while above <= self.max_turns and above not in self.checkpoints \
+                and above not in self.layers.data:
+            above += 1
+        layer = self.layer(above)
+        for t in range(above - 1, turn - 1, -1):
+            layer = self._compute_layer(t, layer)
+            self._store(t, layer)
+        return layer
+
+    def memory_bytes(self):
+        held = list(self.checkpoints.values()) + list(self.layers.data.values())
+        return sum(layer.nbytes for layer in held)
+
+    # -- queries ----------------------------------------------------------
+
+    def state_value(self, turn, popularity, capture_risk, skips_remaining, killed_detectives):
+        """Win probability before the turn's targets are known"""
+        layer = self.layer(turn)
+        return float(layer[skips_remaining, killed_detectives, popularity, capture_risk])
+
+    def action_values(self, state):
+        """[(Action, win probability)] for every legal action in an engine state"""
+        offer = tuple((c.danger_level, c.detective_in_charge is not None)
+                      for c in state.current_criminals)
+        key = pack_state(state.turn, state.popularity, state.capture_risk,
+                         state.skips_remaining, state.killed_detectives, offer)
+        by_target = self.table.get(key)
+        if by_target is None:
+            by_target = self._target_values(state, sorted(set(offer)))
+            self.table.put(key, by_target)
+
+        results = []
+        for action in engine.legal_actions(state):
+            if action.index == engine.SKIP_INDEX:
+                value = by_target["skip"]
+            else:
+                criminal = state.current_criminals[action.index]
+                target = (criminal.danger_level, criminal.detective_in_charge is not None)
+                value = by_target[target + (action.kill_detective,)]
+            results.append((action, value))
+        return results
+
+    def _target_values(self, state, targets):
+        next_layer = self.layer(state.turn + 1)
+        skips, killed = state.skips_remaining, state.killed_detectives
+        p, r = state.popularity, state.capture_risk
+        out = {}
+        spare = self._after_dice_at(state.turn, skips, killed)
+        kill = self._after_dice_at(state.turn, skips, killed + 1) if killed < MAX_KILLS else None
+        for danger, has_detective in targets:
+            pop = 3 * danger + p
+            risk = 2 * danger + (10 if has_detective else 0) + r
+            out[(danger, has_detective, False)] = self._expected_cell(spare, pop, risk, False)
+            if has_detective and kill is not None:
+                out[(danger, has_detective, True)] = self._expected_cell(kill, pop, risk, True)
+        if skips > 0 and r >= CAPTURE_RISK_SKIP_THRESHOLD:
+            out["skip"] = 1.0 if next_layer is None else float(
+                self._skip_landing(next_layer[skips - 1, killed], p, r))
+        return out
+
+    def _after_dice_at(self, turn, skips, killed):
+        key = (turn, skips, killed)
+        found = self.after.get(key)
+        if found is None:
+            next_layer = self.layer(turn + 1)
+            found = self._after_dice(None if next_layer is None else next_layer[skips, killed])
+            self.after.put(key, found)
+        return found
+
+    def _expected_cell(self, after_dice, pop, risk, kill):
+        """One cell of _expected: the dice expectation from pre-dice (pop, risk)"""
+        offsets, probs = self.kernels[kill]
+        rows = after_dice[pop + self._pop_offsets]
+        window = rows[:, risk + offsets - self.risk_low]
+        return float(self._pop_probs @ window @ probs)
+
+    def best_action(self, state):
+        """Optimal action and its win probability for an engine state"""
+        return max(self.action_values(state), key=lambda item: item[1])
+
+    def policy(self, state, rng):
+        """Play optimally; usable anywhere a judge.policies policy is"""
+        return self.best_action(state)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exact optimal-policy solver for THE JUDGE")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS, help="length of the game to solve")
+    parser.add_argument("--max-layers", type=int, default=32, help="turn layers to keep in memory")
+    parser.add_argument("--verify", type=int, default=0, metavar="GAMES",
+                        help="play this many games with the optimal policy in the real engine")
+    parser.add_argument("--seed", default="0", help="seed for --verify")
+    parser.add_argument("--events", metavar="FILE", help="event table file, or \"legacy\" for the original events")
+    args = parser.parse_args(argv)
+
+    try:
+        events = event_tables.load(args.events) if args.events else None
+        solver = Solver(args.max_turns, args.max_layers, events=events)
+    except (OSError, ValueError) as error:
+        parser.error("can't solve with events from %s: %s" % (args.events, error))
+    start = time.perf_counter()
+    value = solver.solve()
+    elapsed = time.perf_counter() - start
+    print("Optimal win probability: %.6f" % value)
+    print("Solved %d turns in %.2fs, holding %.1f MB of layers"
+          % (args.max_turns, elapsed, solver.memory_bytes() / 1e6))
+
+    if args.verify:
+        if args.max_turns != MAX_TURNS:
+            parser.error("--verify needs --max-turns %d to match the engine" % MAX_TURNS)
+        from judge.simulate import run_shard
+        stats = run_shard(solver.policy, args.seed, 0, args.verify, events=args.events)
+        rate, low, high = stats.win_rate()
+        print("Real engine with the optimal policy: %.4f [%.4f, %.4f] over %d games"
+              % (rate, low, high, stats.games))
+        print("Transposition table: %d entries, %d hits, %d misses"
+              % (len(solver.table), solver.table.hits, solver.table.misses))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
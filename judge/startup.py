@@ -0,0 +1,156 @@
+"""
+Startup benchmark for THE JUDGE.
+
+Starts The-Judge.py in fresh processes and times how long each takes to
+reach its first prompt - "Who will you judge?" for `play --skip-intro` -
+in wall time and in CPU time (the process's time on the CPU, read from
+/proc/PID/schedstat the moment the prompt shows up, so the typewriter's
+sleeping isn't counted). A bare interpreter (`python -c pass`) is timed
+the same way for comparison, and a tool's --help shows what a tooling
+subcommand pays before it does any work. `-X importtime` then lists the
+modules that cost the most to import on the way to the prompt.
+
+Exits with status 1 if `play --skip-intro` takes more than --max-ms of CPU
+time to reach its prompt (median over --runs). A bare interpreter takes
+15-20 ms of that and the game about 40 ms in all, most of it importing
+judge.engine and json, so the margin is about 10 ms. The median over 20
+runs keeps a busy moment on the machine from failing the gate.
+
+Usage:
+    python -m judge.startup
+    python -m judge.startup --runs 20 --max-ms 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "The-Judge.py")
+PROMPT = b"Who will you judge?"
+MAX_MS = 50.0
+
+# (label, arguments after the interpreter, output that marks the end; None to wait for exit)
+SCENARIOS = (
+    ("python -c pass", ["-c", "pass"], None),
+    ("play --skip-intro", [SCRIPT, "play", "--skip-intro"], PROMPT),
+    ("play --skip-intro --instant", [SCRIPT, "play", "--skip-intro", "--instant"], PROMPT),
+    ("simulate --help", [SCRIPT, "simulate", "--help"], None),
+)
+
+
+def cpu_ms(pid):
+    """CPU time of a running process in milliseconds, or None without /proc"""
+    try:
+        with open("/proc/%d/schedstat" % pid) as f:
+            return int(f.read().split()[0]) / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def time_run(arguments, marker):
+    """(wall ms, CPU ms or None) until `marker` appears on stdout, or until exit"""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable] + arguments, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, env=env)
+    try:
+        if marker is None:
+            usage = os.wait4(process.pid, 0)[2]
+            process.returncode = 0  # reaped above
+            return (time.perf_counter() - start) * 1000, (usage.ru_utime + usage.ru_stime) * 1000
+        seen = b""
+        while marker not in seen:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                raise RuntimeError("%s exited before its prompt" % " ".join(arguments))
+            seen = seen[-len(marker):] + chunk
+        return (time.perf_counter() - start) * 1000, cpu_ms(process.pid)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            process.wait()
+        process.stdin.close()
+        process.stdout.close()
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def import_times(arguments, marker, top=10):
+    """The `top` slowest imports (cumulative microseconds, module) on the way to `marker`"""
+    process = subprocess.Popen([sys.executable, "-X", "importtime"] + arguments, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        seen = b""
+        while marker not in seen:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                break
+            seen = seen[-len(marker):] + chunk
+    finally:
+        process.kill()
+        _, errors = process.communicate()
+    rows = []
+    for line in errors.decode("utf-8", "replace").splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[1].strip().isdigit():
+            name = fields[2].rstrip()
+            if name == name.lstrip():  # only imports made directly by the program
+                continue
+            if len(name) - len(name.lstrip()) == 1:
+                rows.append((int(fields[1]), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def run(runs=20):
+    """{label: [(wall ms, CPU ms)]} over `runs` runs of each scenario"""
+    results = {label: [] for label, _, _ in SCENARIOS}
+    for _ in range(runs):
+        for label, arguments, marker in SCENARIOS:
+            results[label].append(time_run(arguments, marker))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time THE JUDGE's startup and first prompt")
+    parser.add_argument("--runs", type=int, default=20, help="processes started per scenario")
+    parser.add_argument("--max-ms", type=float, default=MAX_MS,
+                        help="CPU time play --skip-intro may take to its first prompt (median)")
+    parser.add_argument("--imports", type=int, default=10, help="slowest imports to list (0 for none)")
+    args = parser.parse_args(argv)
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    results = run(args.runs)
+    print("%-30s %10s %10s %10s" % ("to first prompt (median)", "wall ms", "cpu ms", "min cpu"))
+    for label, samples in results.items():
+        cpu = [c for _, c in samples if c is not None]
+        print("%-30s %10.1f %10s %10s" % (label, median([w for w, _ in samples]),
+                                          "%.1f" % median(cpu) if cpu else "n/a",
+                                          "%.1f" % min(cpu) if cpu else "n/a"))
+    if args.imports:
+        print("\nSlowest imports on the way to the prompt (cumulative, -X importtime):")
+        for micros, name in import_times([SCRIPT, "play", "--skip-intro", "--instant"], PROMPT, args.imports):
+            print("  %8.1f ms  %s" % (micros / 1000, name))
+
+    cpu = [c for _, c in results["play --skip-intro"] if c is not None]
+    if not cpu:
+        print("\nCPU time isn't available here (no /proc); nothing checked")
+        return 0
+    if median(cpu) > args.max_ms:
+        print("\nFAIL: play --skip-intro took %.1f ms of CPU to its first prompt (budget %.0f ms)"
+              % (median(cpu), args.max_ms))
+        return 1
+    print("\nok: play --skip-intro reaches its first prompt in %.1f ms of CPU (budget %.0f ms)"
+          % (median(cpu), args.max_ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
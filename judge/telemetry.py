@@ -0,0 +1,350 @@
+"""
+Per-turn telemetry for THE JUDGE: record every decision of every game, then
+summarise the lot without loading it into memory.
+
+TelemetryWriter takes one row per decision - which game, which turn, what
+was chosen and what it did to capture risk and popularity - and stores it
+in typed column arrays allocated a chunk at a time. Every CHUNK_ROWS rows
+the columns are handed to a background thread through a bounded queue
+(so a slow disk holds the game loop back instead of growing memory without
+limit), which compresses each column and appends the chunk to a .jtl file.
+If writing fails, the thread keeps emptying the queue so the game is never
+stuck on it, and the next flush() or close() raises the error:
+
+    header  b"JTL1", column count, then (name, array typecode) per column
+    chunk   row count, then per column: compressed length, zlib data
+
+Aggregate streams the chunks of any number of files, decompressing only the
+columns it needs, into per-turn survival curves and capture risk histograms.
+It uses NumPy when it is installed and plain Python otherwise.
+
+Usage:
+    python -m judge.simulate --games 1000000 --telemetry runs/cautious
+    python -m judge.telemetry runs/cautious
+"""
+
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from judge import engine
+
+MAGIC = b"JTL1"
+CHUNK_ROWS = 1 << 16
+MAX_PENDING_CHUNKS = 4  # chunks queued for the writer thread before record() waits
+COMPRESSION_LEVEL = 1
+
+COLUMNS = (
+    ("game", "Q"),  # game number, unique within a run
+    ("turn", "I"),  # endless games run past 65535 turns
+    ("action", "b"),  # index of the chosen target, -1 for a skip
+    ("danger", "B"),  # danger level of the target, 0 for a skip
+    ("detective_killed", "B"),
+    ("risk_delta", "h"),  # capture risk change over the decision
+    ("popularity_delta", "h"),
+    ("capture_risk", "B"),  # after the decision
+    ("popularity", "B"),
+    ("event", "B"),  # NO_EVENT, BREAKING_NEWS or SKIP_NEWS
+    ("outcome", "B"),  # PLAYING, ARRESTED or WON after the decision
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+NO_EVENT, BREAKING_NEWS, SKIP_NEWS = 0, 1, 2
+PLAYING, ARRESTED, WON = 0, 1, 2
+_EVENT_IDS = {engine.BREAKING_NEWS: BREAKING_NEWS, engine.SKIP_NEWS: SKIP_NEWS}
+RISK_BINS = 10  # capture risk histogram buckets of 10 points (100 joins the last)
+
+_COUNT = struct.Struct("<I")
+_SWAP = sys.byteorder != "little"  # files are little-endian
+
+
+class TelemetryWriter:
+    """Buffers decision rows and streams them to a .jtl file"""
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, max_pending=MAX_PENDING_CHUNKS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._new_columns()
+        self.file = open(path, "wb")
+        header = [MAGIC, struct.pack("<H", len(COLUMNS))]
+        for name, typecode in COLUMNS:
+            header.append(struct.pack("<B", len(name)) + name.encode("ascii") + typecode.encode("ascii"))
+        self.file.write(b"".join(header))
+        self.queue = queue.Queue(max_pending)
+        self.error = None  # what stopped the writer thread writing, if anything did
+        self.thread = threading.Thread(target=self._drain, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    def _new_columns(self):
+        self.columns = [array(typecode, [0]) * self.chunk_rows for _, typecode in COLUMNS]
+        (self._game, self._turn, self._action, self._danger, self._detective, self._risk,
+         self._popularity_delta, self._capture, self._popularity, self._event,
+         self._outcome) = self.columns
+        self.pending = 0
+
+    def record(self, game, before, action, after, events):
+        """Add the row for one decision: `before` --action--> `after`, with its events"""
+        row = self.pending
+        self._game[row] = game
+        self._turn[row] = before.turn
+        if action.index == engine.SKIP_INDEX:
+            self._action[row] = -1
+            self._danger[row] = 0
+        else:
+            self._action[row] = action.index
+            self._danger[row] = before.current_criminals[action.index].danger_level
+        # A legal kill always succeeds, and the news drawn after a decision is
+        # its last event (bar WON), so neither needs a scan of the events
+        self._detective[row] = action.kill_detective
+        kind = events[-1].kind
+        if kind == engine.WON:
+            kind = events[-2].kind
+        self._event[row] = _EVENT_IDS.get(kind, NO_EVENT)
+        self._risk[row] = after.capture_risk - before.capture_risk
+        self._popularity_delta[row] = after.popularity - before.popularity
+        self._capture[row] = after.capture_risk
+        self._popularity[row] = after.popularity
+        self._outcome[row] = WON if after.won else ARRESTED if after.game_over else PLAYING
+        self.pending = row + 1
+        if self.pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered rows to the writer thread; raises RuntimeError if it has failed"""
+        self._check()
+        if self.pending:
+            self.rows += self.pending
+            columns = self.columns
+            if self.pending < self.chunk_rows:
+                columns = [column[:self.pending] for column in columns]
+            self.queue.put(columns)
+            self._new_columns()
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError("can't write telemetry to %s: %s" % (self.path, self.error)) from self.error
+
+    def _drain(self):
+        while True:
+            columns = self.queue.get()
+            if columns is None:
+                return
+            if self.error is not None:
+                continue  # keep the queue moving; flush() reports the error
+            try:
+                parts = [_COUNT.pack(len(columns[0]))]
+                for column in columns:
+                    if _SWAP:
+                        column.byteswap()
+                    data = zlib.compress(column.tobytes(), COMPRESSION_LEVEL)
+                    parts.append(_COUNT.pack(len(data)))
+                    parts.append(data)
+                self.file.write(b"".join(parts))
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        """Write everything still buffered and close the file; raises RuntimeError if writing failed"""
+        try:
+            self.flush()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+            try:
+                self.file.close()
+            except OSError as error:
+                self.error = self.error or error
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_chunks(path, columns=COLUMN_NAMES):
+    """Yield {name: array} per chunk of a .jtl file, decoding only `columns`"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a telemetry file" % path)
+        (count,) = struct.unpack("<H", f.read(2))
+        schema = []
+        for _ in range(count):
+            (length,) = struct.unpack("<B", f.read(1))
+            name = f.read(length).decode("ascii")
+            schema.append((name, f.read(1).decode("ascii")))
+        wanted = set(columns)
+        while True:
+            head = f.read(_COUNT.size)
+            if not head:
+                return
+            chunk = {}
+            for name, typecode in schema:
+                (length,) = _COUNT.unpack(f.read(_COUNT.size))
+                if name not in wanted:
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+                values = array(typecode)
+                values.frombytes(zlib.decompress(f.read(length)))
+                if _SWAP:
+                    values.byteswap()
+                chunk[name] = values
+            yield chunk
+
+
+def telemetry_files(paths):
+    """Expand directories into the .jtl files inside them"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith(".jtl")))
+        else:
+            files.append(path)
+    return files
+
+
+class Aggregate:
+    """Streaming, mergeable per-turn statistics over telemetry rows"""
+
+    NEEDED = ("turn", "capture_risk", "outcome")
+
+    def __init__(self):
+        self.rows = 0
+        self.reached = {}  # turn -> games that made a decision on that turn
+        self.arrested = {}  # turn -> games arrested by that turn's decision
+        self.won = {}  # turn -> games won with that turn's decision
+        self.risk = {}  # turn -> [count per capture risk bucket after the decision]
+
+    def _counts(self, turn):
+        return self.risk.setdefault(turn, [0] * RISK_BINS)
+
+    def add_chunk(self, chunk):
+        turns, risks, outcomes = (chunk[name] for name in self.NEEDED)
+        self.rows += len(turns)
+        if np is not None:
+            self._add_numpy(np.frombuffer(turns, turns.typecode), np.frombuffer(risks, np.uint8),
+                            np.frombuffer(outcomes, np.uint8))
+            return
+        for turn, risk, outcome in zip(turns, risks, outcomes):
+            self.reached[turn] = self.reached.get(turn, 0) + 1
+            if outcome == ARRESTED:
+                self.arrested[turn] = self.arrested.get(turn, 0) + 1
+            elif outcome == WON:
+                self.won[turn] = self.won.get(turn, 0) + 1
+            self._counts(turn)[min(risk // 10, RISK_BINS - 1)] += 1
+
+    def _add_numpy(self, turns, risks, outcomes):
+        # Count by position among the turns present, so endless games' turn numbers stay cheap
+        present, index = np.unique(turns, return_inverse=True)
+        size = len(present)
+        for counts, mask in ((self.reached, None), (self.arrested, outcomes == ARRESTED),
+                             (self.won, outcomes == WON)):
+            for position, count in enumerate(np.bincount(index if mask is None else index[mask],
+                                                         minlength=size)):
+                if count:
+                    turn = int(present[position])
+                    counts[turn] = counts.get(turn, 0) + int(count)
+        buckets = np.minimum(risks // 10, RISK_BINS - 1).astype(np.intp)
+        table = np.bincount(index.astype(np.intp) * RISK_BINS + buckets,
+                            minlength=size * RISK_BINS).reshape(size, RISK_BINS)
+        for position in range(size):
+            counts = self._counts(int(present[position]))
+            for bucket, count in enumerate(table[position]):
+                counts[bucket] += int(count)
+
+    def add_file(self, path):
+        for chunk in read_chunks(path, self.NEEDED):
+            self.add_chunk(chunk)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for mine, theirs in ((self.reached, other.reached), (self.arrested, other.arrested),
+                             (self.won, other.won)):
+            for turn, count in theirs.items():
+                mine[turn] = mine.get(turn, 0) + count
+        for turn, counts in other.risk.items():
+            mine = self._counts(turn)
+            for bucket, count in enumerate(counts):
+                mine[bucket] += count
+        return self
+
+    def survival(self):
+        """[(turn, games reaching it, arrested on it, hazard, share still free after it)]"""
+        games = self.reached.get(1, 0) or max(self.reached.values(), default=0)
+        out = []
+        alive = games
+        for turn in sorted(self.reached):
+            reached = self.reached[turn]
+            arrested = self.arrested.get(turn, 0)
+            alive -= arrested
+            out.append((turn, reached, arrested, arrested / reached if reached else 0.0,
+                        alive / games if games else 0.0))
+        return out
+
+    def report(self):
+        lines = ["Rows: %d" % self.rows, "",
+                 "Survival by turn:",
+                 "  turn   reached  arrested  hazard  still free"]
+        for turn, reached, arrested, hazard, free in self.survival():
+            lines.append("  %4d %9d %9d %6.2f%% %9.2f%%" % (turn, reached, arrested, hazard * 100, free * 100))
+        lines += ["", "Capture risk after the decision (% of the turn's decisions):",
+                  "  turn " + "".join("%6s" % ("%d+" % (10 * b)) for b in range(RISK_BINS))]
+        for turn in sorted(self.risk):
+            counts = self.risk[turn]
+            total = sum(counts) or 1
+            lines.append("  %4d " % turn + "".join("%6.1f" % (100 * c / total) for c in counts))
+        return "\n".join(lines)
+
+
+def _aggregate_file(path):
+    return Aggregate().add_file(path)
+
+
+def aggregate(paths, workers=None):
+    """Aggregate every telemetry file under `paths`, one file per worker process at a time"""
+    files = telemetry_files(paths)
+    total = Aggregate()
+    if workers == 1 or len(files) < 2:
+        for path in files:
+            total.add_file(path)
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_aggregate_file, files):
+            total.merge(part)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise THE JUDGE telemetry files")
+    parser.add_argument("paths", nargs="+", help=".jtl files or directories of them")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    if not telemetry_files(args.paths):
+        parser.error("no telemetry files found")
+    start = time.perf_counter()
+    total = aggregate(args.paths, args.workers)
+    elapsed = time.perf_counter() - start
+    print(total.report())
+    print("\nAggregated %d rows in %.2fs (%.0f rows/s)" % (total.rows, elapsed, total.rows / elapsed if elapsed else 0))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
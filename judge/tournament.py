@@ -0,0 +1,189 @@
+"""
+Round-robin tournament between THE JUDGE's policies.
+
+Every policy plays the same numbered games. Common random numbers keep the
+comparison fair: game g draws each turn's targets and headline from a stream
+seeded by (seed, g, turn), its dice (capture risk rolls, detective gambles,
+news) from another stream seeded the same way, and the policy's own coin
+flips from a third. So on turn t of game g every policy is offered the
+targets drawn from the same numbers, and whatever it does, the next turn's
+draw does not shift - differences between policies come from their
+decisions, not from luck. (Targets a policy has already executed leave the
+pool, so offers can still differ once their histories do.)
+
+Games are split into blocks that a process pool plays for every policy; the
+results are merged into one SimulationStats per policy plus a win/loss bit
+per game, which gives each policy's paired difference to the leader: with
+common random numbers that interval is much narrower than comparing two
+independent win rates.
+
+Usage:
+    python -m judge.tournament --games 100000
+    python -m judge.tournament --games 20000 --policies greedy,min_risk,cautious
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from judge import engine
+from judge import events as event_tables
+from judge.policies import BOTS, POLICIES, get_policy
+from judge.simulate import SimulationStats, Z_95
+
+DEFAULT_BLOCK_SIZE = 2000
+DEFAULT_POLICIES = ("first", "random", "cautious") + tuple(BOTS)
+
+# Streams of one game, in the low bits of its seeds
+_DRAWS, _DICE, _CHOICES = 0, 1, 2
+
+
+def game_key(seed, game):
+    """Base seed of game `game` in a tournament seeded with `seed`"""
+    digest = hashlib.sha256(("judge-tournament:%s" % seed).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little") << 64 | game << 24
+
+
+def play_paired_game(policy, key, table=None):
+    """Play one game on the common random number streams of `key`"""
+    draws, dice, choices = random.Random(), random.Random(), random.Random()
+    draws.seed(key | 1 << 2 | _DRAWS)
+    choices.seed(key | _CHOICES)
+    state = engine.new_game(draws)
+    step = engine.step
+    while not state.game_over:
+        turn = state.turn
+        dice.seed(key | turn << 2 | _DICE)
+        draws.seed(key | (turn + 1) << 2 | _DRAWS)
+        state, _ = step(state, policy(state, choices), dice, table, draws)
+    return state
+
+
+def run_block(policy, seed, start, stop, events=None):
+    """Play games start..stop-1 with one policy; returns (stats, win bits)"""
+    resolved = get_policy(policy)
+    table = event_tables.load(events) if events else None
+    stats = SimulationStats()
+    wins = bytearray(stop - start)
+    for offset, game in enumerate(range(start, stop)):
+        state = play_paired_game(resolved, game_key(seed, game), table)
+        stats.add(state)
+        wins[offset] = state.won
+    return stats, bytes(wins)
+
+
+def _run_block(task):
+    return run_block(*task)
+
+
+class Standing:
+    """One policy's merged results"""
+
+    def __init__(self, name, games):
+        self.name = name
+        self.stats = SimulationStats()
+        self.wins = bytearray(games)
+
+    def paired_difference(self, other, z=Z_95):
+        """(mean, low, high) of this policy's win rate minus another's, game by game"""
+        n = len(self.wins)
+        if n == 0:
+            return 0.0, 0.0, 0.0
+        total = total_sq = 0
+        for mine, theirs in zip(self.wins, other.wins):
+            d = mine - theirs
+            total += d
+            total_sq += d * d
+        mean = total / n
+        variance = max(0.0, total_sq / n - mean * mean) * n / max(1, n - 1)
+        margin = z * math.sqrt(variance / n)
+        return mean, mean - margin, mean + margin
+
+
+def tournament(games, policies=DEFAULT_POLICIES, seed=0, workers=None,
+               block_size=DEFAULT_BLOCK_SIZE, events=None):
+    """Play `games` paired games with every policy; returns Standings, best first"""
+    for policy in policies:
+        get_policy(policy)  # fail fast on a bad name
+    blocks = [(start, min(start + block_size, games)) for start in range(0, games, block_size)]
+    tasks = [(policy, seed, start, stop, events) for policy in policies for start, stop in blocks]
+    standings = {policy: Standing(policy, games) for policy in policies}
+
+    def collect(task, result):
+        policy, _, start, stop, _ = task
+        stats, wins = result
+        standing = standings[policy]
+        standing.stats.merge(stats)
+        standing.wins[start:stop] = wins
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        for task in tasks:
+            collect(task, _run_block(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for task, result in zip(tasks, pool.map(_run_block, tasks)):
+                collect(task, result)
+    return sorted(standings.values(), key=lambda s: (-s.stats.wins, s.name))
+
+
+def report(standings):
+    """The ranked table"""
+    leader = standings[0]
+    lines = ["%-4s %-18s %8s %17s %18s %7s %7s %7s %7s %6s %5s" % (
+        "rank", "policy", "win", "95% CI", "vs leader (paired)",
+        "WORST", "BAD", "GOOD", "BEST", "turns", "dets")]
+    for rank, standing in enumerate(standings, 1):
+        stats = standing.stats
+        rate, low, high = stats.win_rate()
+        if standing is leader:
+            versus = "-"
+        else:
+            mean, d_low, d_high = standing.paired_difference(leader)
+            versus = "%+.2f [%+.2f,%+.2f]" % (mean * 100, d_low * 100, d_high * 100)
+        endings = stats.ending_rates()
+        lines.append("%-4d %-18s %7.2f%% %17s %18s %s %6.2f %5.2f" % (
+            rank, standing.name, rate * 100, "[%.2f, %.2f]" % (low * 100, high * 100), versus,
+            " ".join("%6.2f%%" % (endings[name][0] * 100) for name in engine.ENDINGS),
+            stats.turns_survived()[0], stats.detectives_killed()[0]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Round-robin tournament between THE JUDGE policies")
+    parser.add_argument("--games", type=int, default=20000, help="games per policy")
+    parser.add_argument("--policies", default=",".join(DEFAULT_POLICIES),
+                        help="comma separated policies (from %s)" % ", ".join(sorted(POLICIES)))
+    parser.add_argument("--seed", default="0", help="seed for the run (any string)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="games per task")
+    parser.add_argument("--events", metavar="FILE", help="event table file, or \"legacy\" for the original events")
+    args = parser.parse_args(argv)
+
+    policies = [name.strip() for name in args.policies.split(",") if name.strip()]
+    unknown = [name for name in policies if name not in POLICIES]
+    if unknown:
+        parser.error("unknown policies: %s" % ", ".join(unknown))
+    if args.events:
+        try:
+            event_tables.load(args.events)
+        except (OSError, ValueError) as error:
+            parser.error("can't load events from %s: %s" % (args.events, error))
+
+    start = time.perf_counter()
+    standings = tournament(args.games, policies, args.seed, args.workers, args.block_size, args.events)
+    elapsed = time.perf_counter() - start
+    print(report(standings))
+    print("\n%d policies x %d games in %.2fs" % (len(policies), args.games, elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
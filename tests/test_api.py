@@ -0,0 +1,114 @@
+"""Tokens carry and guard the game, and each turn's dice come from the secret"""
+
+import io
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from judge import api, engine
+
+SECRET = "test secret"
+
+
+def plain(state):
+    """`state` with its targets as field dicts (Criminal compares by identity)"""
+    return state._replace(current_criminals=tuple(vars(c) for c in state.current_criminals))
+
+
+def request(service, method, path, body=None):
+    """(status, JSON reply) of one request, run through Handler without a socket"""
+    data = b"" if body is None else body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    raw = "%s %s HTTP/1.1\r\nHost: test\r\nContent-Length: %d\r\n\r\n" % (method, path, len(data))
+    handler = api.Handler.__new__(api.Handler)
+    handler.server = SimpleNamespace(service=service)
+    handler.client_address = ("test", 0)
+    handler.rfile = io.BytesIO(raw.encode("ascii") + data)
+    handler.wfile = io.BytesIO()
+    handler.handle_one_request()
+    head, _, reply = handler.wfile.getvalue().partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(reply)
+
+
+def test_token_round_trip():
+    tokens = api.Tokens(SECRET)
+    rng = random.Random(0)
+    state = engine.new_game(rng)
+    while not state.game_over:
+        nonce, decoded = tokens.decode(tokens.encode(12345, state))
+        assert nonce == 12345 and plain(decoded) == plain(state)
+        state, _ = engine.step(state, engine.Action(0, False), rng)
+
+
+def test_tampered_token_rejected():
+    tokens = api.Tokens(SECRET)
+    token = tokens.encode(1, engine.new_game(random.Random(0)))
+    for i in range(len(token)):
+        changed = token[:i] + ("A" if token[i] != "A" else "B") + token[i + 1:]
+        try:
+            nonce, state = tokens.decode(changed)
+        except api.TokenError:
+            continue
+        # base64's padding bits may change without changing the bytes
+        assert (nonce, plain(state)) == (1, plain(tokens.decode(token)[1]))
+    for bad in ("", "not base64!", token[:-4]):
+        with pytest.raises(api.TokenError):
+            tokens.decode(bad)
+    with pytest.raises(api.TokenError):
+        api.Tokens("another secret").decode(token)
+
+
+def test_turn_dice_seeded_by_secret():
+    tokens = api.Tokens(SECRET)
+    draws = tokens.rng(7, 3).random()
+    assert tokens.rng(7, 3).random() == draws
+    assert draws not in (tokens.rng(7, 4).random(), tokens.rng(8, 3).random(),
+                         api.Tokens("another secret").rng(7, 3).random())
+
+
+def test_act_uses_turn_dice():
+    service = api.Service(SECRET)
+    token = service.new_game(nonce=99)["token"]
+    nonce, state = service.tokens.decode(token)
+    assert plain(state) == plain(engine.new_game(service.tokens.rng(99, 0)))
+    for _ in range(3):
+        expected, _ = engine.step(state, engine.Action(0, False), service.tokens.rng(nonce, state.turn))
+        reply = service.act(token, engine.Action(0, False))
+        # Sending a token again replays the same dice: undoing can't reroll
+        assert service.act(token, engine.Action(0, False)) == reply
+        token = reply["token"]
+        nonce, state = service.tokens.decode(token)
+        assert plain(state) == plain(expected)
+
+
+def test_endpoints():
+    service = api.Service(SECRET)
+    status, new = request(service, "POST", "/new")
+    assert status == 201 and new["state"]["turn"] == 1
+    status, shown = request(service, "GET", "/state?token=" + new["token"])
+    assert status == 200 and shown["state"] == new["state"]
+    status, acted = request(service, "POST", "/act", {"token": new["token"], "action": {"target": 0}})
+    assert status == 200 and acted["state"]["turn"] == 2
+    assert acted["events"][0] == {"kind": engine.EXECUTE, "criminal": new["state"]["targets"][0]["name"]}
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("GET", "/state?token=AAAA", None, 403),
+    ("POST", "/act", {"token": "AAAA", "action": "skip"}, 403),
+    ("POST", "/act", b"{not json", 400),
+    ("POST", "/act", {"action": "skip"}, 400),
+    ("POST", "/new", b"x" * (api.MAX_BODY + 1), 400),
+    ("GET", "/games", None, 404),
+])
+def test_bad_requests(method, path, body, status):
+    got, reply = request(api.Service(SECRET), method, path, body)
+    assert got == status and "error" in reply
+
+
+def test_illegal_moves():
+    service = api.Service(SECRET)
+    token = service.new_game(nonce=1)["token"]
+    for action in ("skip", {"target": 5}, {"target": "0"}, {"target": 0, "kill_detective": "yes"}):
+        status, reply = request(service, "POST", "/act", {"token": token, "action": action})
+        assert status == 400 and "error" in reply
@@ -0,0 +1,25 @@
+"""The batch simulator against the scalar engine, compared statistically"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from judge import batch
+
+GAMES = 4000
+LIMIT = 4.0
+
+
+@pytest.mark.parametrize("events", [None, "legacy"])
+@pytest.mark.parametrize("policy", ["first", "random", "cautious"])
+def test_batch_matches_engine(policy, events):
+    passed, rows = batch.crosscheck(GAMES, policy, seed=3, workers=1, limit=LIMIT, events=events)
+    failures = ["%s: engine %.4f, batch %.4f, z %.2f" % row for row in rows if abs(row[3]) > LIMIT]
+    assert passed, "; ".join(failures)
+
+
+def test_batch_is_seeded():
+    a = batch.simulate_batch(2000, "random", seed=5, chunk_size=700, workers=1)
+    b = batch.simulate_batch(2000, "random", seed=5, chunk_size=700, workers=2)
+    assert (a.wins, a.turns, a.endings) == (b.wins, b.turns, b.endings)
+    assert a.games == 2000
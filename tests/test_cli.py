@@ -0,0 +1,65 @@
+"""play's command line turns bad option values into usage errors"""
+
+import socket
+
+import pytest
+
+from judge import cli
+
+
+def usage_error(capsys, *argv):
+    with pytest.raises(SystemExit) as exit:
+        cli.play(["--skip-intro", "--instant", *argv])
+    assert exit.value.code == 2
+    return capsys.readouterr().err
+
+
+def test_missing_difficulty(tmp_path, capsys):
+    assert "can't load difficulty" in usage_error(capsys, "--difficulty", str(tmp_path / "missing.json"))
+
+
+def test_invalid_difficulty(tmp_path, capsys):
+    preset = tmp_path / "bad.json"
+    preset.write_text("{not json")
+    assert "can't load difficulty" in usage_error(capsys, "--difficulty", str(preset))
+
+
+def test_missing_events(tmp_path, capsys):
+    assert "can't load events" in usage_error(capsys, "--events", str(tmp_path / "missing.json"))
+
+
+def test_invalid_events(tmp_path, capsys):
+    table = tmp_path / "bad.json"
+    table.write_text("[]")
+    assert "can't load events" in usage_error(capsys, "--events", str(table))
+
+
+def test_invalid_profile(capsys):
+    assert "unknown profile output" in usage_error(capsys, "--profile", "flamegraph")
+
+
+def test_missing_resume(tmp_path, capsys):
+    assert "can't resume" in usage_error(capsys, "--resume", str(tmp_path / "missing.sav"))
+
+
+def test_invalid_resume(tmp_path, capsys):
+    save = tmp_path / "bad.sav"
+    save.write_bytes(b"not a save")
+    assert "can't resume" in usage_error(capsys, "--resume", str(save))
+
+
+def test_unopenable_leaderboard(tmp_path, capsys):
+    path = tmp_path / "missing" / "board.db"
+    assert "can't open leaderboard" in usage_error(capsys, "--leaderboard", str(path))
+
+
+def test_invalid_broadcast_address(capsys):
+    assert "--broadcast must be" in usage_error(capsys, "--broadcast", "port")
+
+
+def test_broadcast_port_in_use(capsys):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        assert "can't broadcast" in usage_error(capsys, "--broadcast", str(port))
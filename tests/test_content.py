@@ -0,0 +1,40 @@
+"""Content packs are found next to the ruleset naming them and checked before use"""
+
+import json
+
+import pytest
+
+from judge import content, engine, rules
+
+
+@pytest.fixture
+def pack(tmp_path):
+    source = str(tmp_path / "classic.json")
+    content.export(engine.CLASSIC_CONTENT, source)
+    path = tmp_path / "classic.jcp"
+    content.compile_pack(source, str(path))
+    return path
+
+
+def test_pack_relative_to_ruleset(pack, tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"content": pack.name}))
+    monkeypatch.chdir(tmp_path.parent)
+    ruleset = rules.load(str(path))
+    assert ruleset.content == str(pack)
+    assert list(rules.derived(ruleset).content.criminals) == list(engine.CLASSIC_CONTENT.criminals)
+
+
+def test_corrupt_pack_rejected(pack):
+    data = bytearray(pack.read_bytes())
+    data[-1] ^= 0xFF
+    pack.write_bytes(bytes(data))
+    with pytest.raises(content.ContentError, match="checksum"):
+        content.load(str(pack))
+
+
+@pytest.mark.parametrize("size", [0, 10, 100])
+def test_truncated_pack_rejected(pack, size):
+    pack.write_bytes(pack.read_bytes()[:size])
+    with pytest.raises(content.ContentError):
+        content.load(str(pack))
@@ -0,0 +1,51 @@
+"""Endless mode keeps executed_names at the cooldown size and brings names back after it"""
+
+import random
+
+from judge import engine
+from judge.endless import PARDON_RISK, Endless
+
+COOLDOWN = 10
+TURNS = 400
+
+
+def play(mode, rng, kill):
+    """Yield (state before, state after, names written) for TURNS endless turns, pardoning arrests"""
+    state = mode.new_game(rng)
+    for _ in range(TURNS):
+        target = state.current_criminals[0]
+        action = engine.Action(0, kill and engine.can_kill_detective(state, 0))
+        after, _ = mode.step(state, action, rng)
+        if after.game_over:
+            after = mode.begin_turn(after._replace(turn=state.turn + 1, capture_risk=PARDON_RISK,
+                                                   game_over=False), rng)
+        written = [target.name] + ([target.detective_in_charge] if action.kill_detective else [])
+        yield state, after, written
+        state = after
+
+
+def test_cooldown_queue_stays_bounded():
+    mode = Endless(cooldown=COOLDOWN)
+    sizes = []
+    for _, state, _ in play(mode, random.Random(1), kill=True):
+        assert state.executed_names == frozenset(state.cooldown)
+        assert len(state.cooldown) <= COOLDOWN
+        sizes.append(len(state.cooldown))
+    assert sizes[-1] == COOLDOWN
+
+
+def test_names_return_after_cooldown():
+    mode = Endless(cooldown=COOLDOWN)
+    history = []  # every name written, in order
+    returned = 0
+    for before, after, written in play(mode, random.Random(2), kill=False):
+        for criminal in before.current_criminals:
+            assert criminal.name not in before.executed_names
+            if criminal.name in history:
+                # Back on the list only after COOLDOWN names were written since
+                last = len(history) - 1 - history[::-1].index(criminal.name)
+                assert len(history) - 1 - last >= COOLDOWN
+                returned += 1
+        history += written
+        assert after.executed_names == frozenset(history[-COOLDOWN:])
+    assert returned > 0
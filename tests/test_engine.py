@@ -0,0 +1,61 @@
+"""engine.step with the legacy event table against the original game.
+
+The expected values were recorded by playing the original single-file
+The-Judge.py (the repository's first commit) through its prompts: the global
+`random` module seeded with the game number, and answers drawn from
+random.Random(-1 - game) - a target number or "s" when laying low is offered,
+then "y" or "n" when a detective can be killed. The engine gets the same two
+streams and the same choices, so it must end every game in the same state.
+"""
+
+import random
+import zlib
+
+from judge import engine, events
+
+# (turn, effectiveness, popularity, capture risk, detectives killed,
+#  skips remaining, won, crc32 of the sorted executed names) for games 0-11
+FIRST_GAMES = [
+    (4, 16, 57, 100, 2, 5, False, 1208895971),
+    (5, 30, 96, 100, 3, 5, False, 1061024144),
+    (18, 146, 100, 100, 4, 2, False, 1130567827),
+    (7, 58, 100, 100, 3, 5, False, 3413391741),
+    (21, 172, 100, 80, 4, 3, True, 3906884907),
+    (21, 166, 100, 87, 4, 2, True, 1826744835),
+    (7, 48, 100, 100, 4, 5, False, 1623866000),
+    (20, 162, 100, 100, 4, 0, False, 1829004308),
+    (21, 168, 100, 73, 4, 3, True, 1194474981),
+    (21, 182, 100, 45, 4, 3, True, 1651223406),
+    (5, 14, 54, 100, 2, 4, False, 3412623745),
+    (13, 74, 100, 100, 4, 4, False, 4047340391),
+]
+
+# crc32 of repr() of the list of those tuples for games 0-999
+ALL_GAMES = 1000
+ALL_GAMES_CRC = 1589383524
+
+
+def play(game):
+    rng = random.Random(game)
+    policy = random.Random(-1 - game)
+    state = engine.new_game(rng)
+    while not state.game_over:
+        choices = list(range(len(state.current_criminals)))
+        if engine.can_skip(state):
+            choices.append(engine.SKIP_INDEX)
+        index = policy.choice(choices)
+        kill = (index != engine.SKIP_INDEX and engine.can_kill_detective(state, index)
+                and policy.choice("yn") == "y")
+        state, _ = engine.step(state, engine.Action(index, kill), rng, events.LEGACY)
+    names = zlib.crc32("|".join(sorted(state.executed_names)).encode())
+    return (state.turn, state.effectiveness, state.popularity, state.capture_risk,
+            state.killed_detectives, state.skips_remaining, state.won, names)
+
+
+def test_first_games_match_original():
+    assert [play(game) for game in range(len(FIRST_GAMES))] == FIRST_GAMES
+
+
+def test_all_games_match_original():
+    games = [play(game) for game in range(ALL_GAMES)]
+    assert zlib.crc32(repr(games).encode()) == ALL_GAMES_CRC
@@ -0,0 +1,124 @@
+"""The alias sampler draws events at their weights, and LEGACY draws as the original game did"""
+
+import random
+
+import pytest
+
+from judge import engine, events
+from judge.events import AliasSampler, EventSection, EventSpec
+
+# Upper 0.1% points of the chi-square distribution by degrees of freedom
+CHI2_999 = {1: 10.83, 2: 13.82, 3: 16.27, 4: 18.47, 5: 20.52, 6: 22.46, 7: 24.32, 9: 27.88, 11: 31.26}
+DRAWS = 200000
+
+
+def chi_square(counts, weights):
+    total = sum(counts)
+    scale = total / sum(weights)
+    return sum((count - weight * scale) ** 2 / (weight * scale) for count, weight in zip(counts, weights))
+
+
+@pytest.mark.parametrize("weights", [
+    [1, 2],
+    [5, 1, 1, 1],
+    [0.5, 3, 1, 10, 2.5, 7],
+    [1, 1000, 3, 3, 50, 1, 8, 200, 2, 30, 9, 4],
+    [3, 3, 3],  # equal weights: rng.choice()
+])
+def test_alias_frequencies(weights):
+    sampler = AliasSampler(range(len(weights)), weights)
+    rng = random.Random(len(weights))
+    counts = [0] * len(weights)
+    for _ in range(DRAWS):
+        counts[sampler.draw(rng)] += 1
+    assert chi_square(counts, weights) < CHI2_999[len(weights) - 1]
+
+
+def test_shipped_table_frequencies():
+    table = events.load()
+    section = table.breaking_news
+    # Stats no event's bounds exclude, so every spec is eligible
+    specs = [spec for spec in section.specs if events._eligible(spec, 10, 50, 50)]
+    rng = random.Random(0)
+    counts = dict.fromkeys(specs, 0)
+    fired = 0
+    for _ in range(DRAWS):
+        spec = section.pick(rng, 10, 50, 50)
+        if spec is not None:
+            fired += 1
+            counts[spec] += 1
+    # The trigger is a binomial draw; 4 standard deviations either way
+    expected = DRAWS * section.chance
+    assert abs(fired - expected) < 4 * (expected * (1 - section.chance)) ** 0.5
+    if len(specs) > 1:
+        assert chi_square(list(counts.values()), [s.weight for s in specs]) < CHI2_999[len(specs) - 1]
+
+
+def test_conditional_frequencies():
+    early = EventSpec("early", 3, max_turn=5)
+    late = EventSpec("late", 1, min_turn=6)
+    always = EventSpec("always", 2)
+    section = EventSection(1.0, [early, late, always])
+    for turn, eligible in ((3, [early, always]), (8, [late, always])):
+        rng = random.Random(turn)
+        counts = dict.fromkeys(eligible, 0)
+        for _ in range(DRAWS // 4):
+            counts[section.pick(rng, turn, 50, 50)] += 1
+        assert chi_square(list(counts.values()), [s.weight for s in eligible]) < CHI2_999[1]
+
+
+def original_random_event(rng, popularity, capture_risk):
+    """The first commit's Game.random_event, minus the printing"""
+    if rng.random() < 0.2:
+        news = [
+            "Your online following has grown significantly! (+20 Popularity)",
+            "Police almost caught a lead! (-10 Capture Risk)",
+            "A famous celebrity praised your actions! (+20 Popularity)",
+            "A rival detective agency takes over the case! (+15 Capture Risk)",
+        ]
+        event = rng.choice(news)
+        if "Popularity" in event:
+            popularity += 20
+            capture_risk -= 13
+        if "Capture Risk -" in event:
+            capture_risk -= 10
+        if "Capture Risk +" in event:
+            capture_risk += 15
+        popularity = min(100, popularity)
+        capture_risk = max(0, min(100, capture_risk))
+        return event, popularity, capture_risk
+    return None, popularity, capture_risk
+
+
+def original_skip_news(rng):
+    """The news the first commit's skip_turn showed, if any"""
+    if rng.random() < 0.15:
+        return rng.choice([
+            "The Judge seems to have gone quiet...",
+            "Is The Judge done? Internet debates intensify.",
+            "Police celebrate what they think is a victory."
+        ])
+    return None
+
+
+def test_legacy_breaking_news():
+    original, legacy = random.Random(7), random.Random(7)
+    stats = random.Random(8)
+    for turn in range(1, 5001):
+        popularity, capture_risk = stats.randint(0, 100), stats.randint(0, 99)
+        drawn = []
+        got = engine.random_event(popularity, capture_risk, legacy, drawn, events.LEGACY, turn % 20)
+        text, *expected = original_random_event(original, popularity, capture_risk)
+        assert got == tuple(expected)
+        assert [payload for _, payload in drawn] == ([] if text is None else [text])
+    assert legacy.getstate() == original.getstate()
+
+
+def test_legacy_skip_news():
+    original, legacy = random.Random(9), random.Random(9)
+    for turn in range(1, 5001):
+        spec = events.LEGACY.skip_news.pick(legacy, turn % 20, 40, 60)
+        assert (None if spec is None else spec.text) == original_skip_news(original)
+        if spec is not None:
+            assert (spec.popularity, spec.capture_risk) == (0, 0)
+    assert legacy.getstate() == original.getstate()
@@ -0,0 +1,88 @@
+"""The leaderboard writer batches rows, counts what it drops, and flushes on close"""
+
+import random
+import sqlite3
+import threading
+
+from judge import engine
+from judge.leaderboard import Leaderboard, LeaderboardWriter, Result, result
+from judge.policies import POLICIES
+from judge.simulate import play_game
+
+
+def game(effectiveness, ending, player="p"):
+    return Result(1.0, player, 10, effectiveness, 50, 8, 1, 2, ending, ending == "BEST", "{}")
+
+
+def rows(path):
+    board = Leaderboard(str(path))
+    try:
+        return board.recent(1 << 20)
+    finally:
+        board.close()
+
+
+def test_batched_writes(tmp_path):
+    path = tmp_path / "board.db"
+    results = [game(i, engine.ENDINGS[i % 4]) for i in range(250)]
+    with LeaderboardWriter(str(path), batch_rows=10) as writer:
+        for r in results:
+            writer.record(r)
+    assert (writer.written, writer.dropped, writer.error) == (250, 0, None)
+    assert 25 <= writer.batches <= 250
+    assert rows(path)[::-1] == results
+
+
+def test_close_flushes(tmp_path):
+    path = tmp_path / "board.db"
+    rng = random.Random(0)
+    states = [play_game(POLICIES["cautious"], rng) for _ in range(20)]
+    writer = LeaderboardWriter(str(path))
+    for state in states:
+        writer.record_state(state, "bot")
+    writer.close()
+    assert not writer.thread.is_alive()
+    recorded = rows(path)[::-1]
+    assert [r[1:] for r in recorded] == [result(state, "bot")[1:] for state in states]
+
+
+def test_top_by_ending(tmp_path):
+    path = tmp_path / "board.db"
+    scores = list(range(40))
+    random.Random(1).shuffle(scores)
+    with LeaderboardWriter(str(path)) as writer:
+        for score in scores:
+            writer.record(game(score, engine.ENDINGS[score % 4]))
+    board = Leaderboard(str(path))
+    try:
+        assert [r.effectiveness for r in board.top(5)] == [39, 38, 37, 36, 35]
+        for i, ending in enumerate(engine.ENDINGS):
+            top = board.top(3, ending)
+            assert [r.effectiveness for r in top] == [36 + i, 32 + i, 28 + i]
+            assert {r.ending for r in top} == {ending}
+        assert board.endings() == dict.fromkeys(engine.ENDINGS, 10)
+    finally:
+        board.close()
+
+
+def test_drops_counted_across_threads(tmp_path):
+    path = tmp_path / "board.db"
+    writer = LeaderboardWriter(str(path), batch_rows=5, max_pending=3)
+    threads = [threading.Thread(target=lambda: [writer.record(game(1, "BAD")) for _ in range(2000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+    assert writer.written + writer.dropped == 8 * 2000
+    assert len(rows(path)) == writer.written
+
+
+def test_failed_writer_drops(tmp_path):
+    path = tmp_path / "board.db"
+    writer = LeaderboardWriter(str(path))
+    writer.error = sqlite3.OperationalError("disk I/O error")  # as if the writer thread had failed
+    writer.record(game(1, "BAD"))
+    writer.close()
+    assert (writer.written, writer.dropped) == (0, 1)
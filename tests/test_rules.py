@@ -0,0 +1,39 @@
+"""Files named in a ruleset are found next to it, whatever the working directory"""
+
+import json
+import os
+import shutil
+
+from judge import events, rules
+
+EVENTS_FILE = os.path.join(os.path.dirname(events.__file__), "data", "events.json")
+
+
+def write_rules(directory, data):
+    path = directory / "rules.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_events_relative_to_ruleset(tmp_path, monkeypatch):
+    shutil.copy(EVENTS_FILE, tmp_path / "table.json")
+    path = write_rules(tmp_path, {"events": "table.json"})
+    monkeypatch.chdir(tmp_path.parent)
+    ruleset = rules.load(path)
+    assert ruleset.events == str(tmp_path / "table.json")
+    assert rules.derived(ruleset).events.name == ruleset.events
+
+
+def test_events_under_rules_key(tmp_path, monkeypatch):
+    (tmp_path / "tables").mkdir()
+    shutil.copy(EVENTS_FILE, tmp_path / "tables" / "table.json")
+    path = write_rules(tmp_path, {"name": "preset", "rules": {"events": "tables/../tables/table.json"}})
+    monkeypatch.chdir(tmp_path / "tables")
+    assert rules.load(path).events == str(tmp_path / "tables" / "table.json")
+
+
+def test_absolute_and_legacy_events_kept(tmp_path):
+    table = str(tmp_path / "table.json")
+    shutil.copy(EVENTS_FILE, table)
+    assert rules.load(write_rules(tmp_path, {"events": table})).events == table
+    assert rules.load(write_rules(tmp_path, {"events": "legacy"})).events == "legacy"